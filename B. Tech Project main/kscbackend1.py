@@ -1,423 +1,1393 @@
-import time
-import pandas as pd
-import numpy as np
-import pyvisa
-import pymeasure
-import re
-from pymeasure.instruments.keithley import Keithley2450
-import logging
-import csv
-import io
-import streamlit as st 
-
-def auto_detect_keithley():
-    """Detect Keithley 2450 and return its resource name."""
-    rm = pyvisa.ResourceManager()
-    instruments = rm.list_resources()
-    for instrument in instruments:
-        try:
-            device = Keithley2450(instrument)
-            if "Keithley 2450" in device.id:
-                return instrument
-        except Exception:
-            continue
-    raise ConnectionError("No Keithley 2450 detected.")
-
-
-# Configure logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
-log = logging.getLogger(__name__)
-
-class KeithleyBackend:
-        
-    def __init__(self):
-        """Initialize the Keithley 2450 backend."""
-        try:
-            resource_name = auto_detect_keithley()
-            self.instrument = Keithley2450(resource_name)
-            self.data = pd.DataFrame()
-        except Exception as e:
-            raise ConnectionError(f"Unable to connect to Keithley 2450: {e}")
-
-    #def __init__(self, resource_name):
-        #"""Initialize the Keithley 2450 backend."""
-        #try:
-            #self.instrument = Keithley2450(resource_name)
-            #self.data = pd.DataFrame()  # To store measurement data
-        #except Exception as e:
-            #raise ConnectionError(f"Unable to connect to Keithley 2450: {e}")
-
-    def stream_data(self):
-        """Stream real-time measurement data."""
-        try:
-            while True:
-                data = self.measure(["Voltage", "Current", "Resistance", "Power"], delay=0.1)
-                yield data
-        except KeyboardInterrupt:
-            log.info("Data streaming stopped by user.")
-        finally:
-            self.instrument.disable_source()
-
-    def fetch_real_time_data(self):
-        """Fetch the most recent measurement data."""
-        try:
-            if not self.data.empty:
-                return self.data.iloc[-1].to_dict()
-            else:
-                return {}
-        except Exception as e:
-            log.exception(f"Error fetching data: {e}")
-            raise RuntimeError(f"Error fetching data: {e}")
-
-
-    def configure_source(self, mode, **kwargs):
-        """
-        Configure the instrument source settings based on the mode.
-        Args:
-            mode: One of ['Voltage Bias', 'Voltage Sweep', 'Voltage List Sweep', 
-                         'Current Bias', 'Current Sweep', 'Current List Sweep']
-            kwargs: Additional parameters like voltage/current levels, range, etc.
-        """
-        try:
-            if mode == "Voltage Bias":
-                self.instrument.apply_voltage(
-                    voltage_range=kwargs.get("voltage_range"),
-                    compliance_current=kwargs.get("current_limit", 0.1)
-                )
-                self.instrument.source_voltage = kwargs["voltage_level"]
-
-            elif mode == "Current Bias":
-                self.instrument.apply_current(
-                    current_range=kwargs.get("current_range"),
-                    compliance_voltage=kwargs.get("voltage_limit", 0.1)
-                )
-                self.instrument.source_current = kwargs["current_level"]
-
-            elif mode == "Voltage Sweep":
-                self.instrument.apply_voltage(
-                    voltage_range=kwargs.get("voltage_range"),
-                    compliance_current=kwargs.get("current_limit", 0.1)
-                )
-                self.setup_sweep("voltage", kwargs)
-
-            elif mode == "Current Sweep":
-                self.instrument.apply_current(
-                    current_range=kwargs.get("current_range"),
-                    compliance_voltage=kwargs.get("voltage_limit", 0.1)
-                )
-                self.setup_sweep("current", kwargs)
-
-            elif mode in ["Voltage List Sweep", "Current List Sweep"]:
-                self.upload_list(kwargs["list_file"], mode)
-
-            self.instrument.enable_source()
-
-        except ValueError as e:  # More specific exception handling
-            raise ValueError(f"Invalid input parameters for source configuration: {e}")
-        except Exception as e:  # Catch any other exceptions during source config
-            raise RuntimeError(f"Error configuring source: {e}")
-        
-    def configure_measurement(self, **kwargs):
-        """Configures measurement settings (NPLC, ranges, etc.)."""
-        try:
-            nplc = kwargs.get("nplc", 1.0) # Default NPLC
-            
-            def _set_range(measurement_type, range_setting):
-                if range_setting == "Auto":
-                    if measurement_type == "voltage":
-                        self.instrument.auto_range_voltage()  # Enable voltage auto-range for measurement
-                    elif measurement_type == "current":
-                        self.instrument.auto_range_current() # Enable current auto-range for measurement
-                    elif measurement_type == "resistance":
-                        pass
-
-                elif range_setting == "Best Fixed":
-                    pass #Best Fixed sets automatic voltage and current range by itself
-
-                else:  # Manual range setting
-                    match = re.match(r"([0-9.]+)([a-zA-Zμ]+)", range_setting)
-                    if match:
-                        value = float(match.group(1))
-                        unit = match.group(2)
-                        if unit.lower() in ("mv", "ma"):
-                            value *= 1e-3
-                        elif unit.lower() in ("v", "a", "ω"):
-                            pass  # No scaling
-                        elif unit.lower() in ("kω"):
-                            value *= 1e3
-                        elif unit.lower() in ("μa",):
-                            value *= 1e-6
-                        elif unit.lower() in ("na"):
-                            value *= 1e-9
-                        setattr(self.instrument, f"{measurement_type.lower()}_range", value)
-                    else:
-                        raise ValueError(f"Invalid {measurement_type} range format: {range_setting}")
-            
-            measurements = kwargs.get("measurements", [])
-            if "Voltage" in measurements:
-                _set_range("voltage", kwargs.get("voltage_range", "Auto")) # Using helper
-                self.instrument.voltage_nplc = nplc
-                self.voltage_type = kwargs.get("voltage_type", "Measured") 
-            if "Current" in kwargs.get("measurements", []):
-                _set_range("current", kwargs.get("current_range", "Auto"))  # Use helper
-                self.instrument.current_nplc = nplc
-                self.current_type = kwargs.get("current_type", "Measured") 
-            if "Resistance" in kwargs.get("measurements", []):
-                _set_range("resistance", kwargs.get("resistance_range", "Auto")) # Use helper
-                self.instrument.resistance_nplc = nplc
-                self.resistance_type = kwargs.get("resistance_type", "Measured") 
-                # Set other resistance settings if needed (e.g., wires)
-
-        except ValueError as e:
-            raise ValueError(f"Invalid measurement parameters: {e}")
-        except Exception as e:
-            log.exception(f"Error configuring measurements: {e}")  # Log unexpected errors
-            raise RuntimeError(f"Error configuring measurements: {e}")
-
-    def setup_sweep(self, sweep_type, params):
-        """
-        Set up a voltage or current sweep.
-        Args:
-            sweep_type: 'voltage' or 'current'
-            params: Sweep parameters (start, stop, steps, delay, sweep_type, dual_sweep, stepper)
-        """
-        try:
-            start = params.get("start", 0.0)
-            stop = params.get("stop", 1.0)
-            num_steps = params.get("steps", 10)
-            delay = params.get("delay", 0.1)
-            sweep_type = params.get("sweep_type", "Linear")
-            dual_sweep = params.get("dual_sweep", False)
-            stepper = params.get("stepper", False)
-
-            if sweep_type == "Linear":
-                values = np.linspace(start, stop, num_steps)
-            elif sweep_type == "Logarithmic":
-                if start <= 0 or stop <= 0:
-                    raise ValueError("Logarithmic sweep requires positive start and stop values.")
-                values = np.logspace(np.log10(start), np.log10(stop), num_steps)
-
-            # Implement stepper functionality (ensures increments are precise)
-            if stepper:  
-                step_size = (stop - start) / (num_steps - 1)
-                values = np.arange(start, stop + step_size, step_size)
-
-            # Handle dual sweep (forward + reverse)
-            if dual_sweep:
-                forward_values = values
-                reverse_values = values[::-1]
-                values = np.concatenate([forward_values, reverse_values])
-
-            if params.get('source_mode') in ["Voltage List Sweep", "Current List Sweep"]: 
-                values = np.array(params.get('list_values', []))  # Directly use the uploaded list values.
-                stepper = True
-
-            data_list = []
-            for value in values:
-                try:
-                    if sweep_type == "voltage":
-                        self.instrument.source_voltage = value
-                    elif sweep_type == "current":
-                        self.instrument.source_current = value
-
-                    time.sleep(delay)
-                    measurement_data = self.measure(params['measurements'], 0)
-
-                # Append measurement to list of dictionaries
-                    data_list.append(measurement_data)
-
-                except Exception as e:  # Handle errors within sweep
-                    log.exception(f"Error during {sweep_type} sweep at {value}: {e}")
-                    if isinstance(e, pymeasure.instruments.InstrumentError): #Example specific pymeasure error handling
-                        st.error(f"Instrument error during sweep. Check connections.")
-                        raise  # Reraise after logging to stop the measurement
-
-            self.data = pd.DataFrame(data_list) # Dataframe creation outside loop
-
-
-        except ValueError as e: # Handling the logspace issue for zero and neg values
-            raise ValueError(f"Invalid sweep parameters: {e}")
-        except Exception as e:
-            raise RuntimeError(f"Error setting up {sweep_type} sweep: {e}")
-
-    def upload_list(self, file, mode, params):  # Add 'params' here
-        """
-        Upload a CSV list for list sweep mode.  
-        """
-        try:
-            if not file:  # Check if file is uploaded
-                raise ValueError("No file uploaded")
-
-            values = []
-            reader = csv.reader(io.StringIO(file.getvalue().decode("utf-8")))
-            next(reader, None)  # Skip header (if present)
-            for row in reader:
-                try:
-                    if not row:  # Handle empty rows
-                        continue
-                    if len(row) != 1:
-                        raise ValueError("Invalid CSV format: Each row must have exactly one value.")
-                    values.append(float(row[0]))
-                except ValueError as e:
-                    log.warning(f"Skipping invalid row in CSV: {row} - {e}")
-                    continue  # Skip to the next row
-
-            delay = params.get("delay_seconds", 0.1)
-
-            data_list = []  # Collect data during list sweep
-            for value in values:
-                try:
-                    if mode == "Voltage List Sweep":
-                        self.instrument.source_voltage = value
-                    elif mode == "Current List Sweep":
-                        self.instrument.source_current = value
-                    time.sleep(delay)  # Or use the delay from 'params'
-                    measurement_data = self.measure(params.get("measurements", []), 0) #Use params here as well for correct measurement settings
-                    data_list.append(measurement_data)
-                except Exception as e:
-                    log.exception(f"Error during {mode} at {value}: {e}")
-                    raise  # Re-raise to stop the measurement
-
-            self.data = pd.DataFrame(data_list)
-
-            params['list_values'] = values # store list values for stepper functionality
-            params['steps'] = len(values) # Forcing number of steps to be equal to list length
-            self.setup_sweep('voltage' if mode == 'Voltage List Sweep' else 'current', params)
-
-        except ValueError as ve:
-            raise RuntimeError(f"CSV validation error: {ve}")
-        except Exception as e:
-            raise RuntimeError(f"Error uploading list: {e}")
-
-    def measure(self, measurements, delay):
-        """
-        Perform measurements and collect data.
-        Args:
-            measurements: List of enabled measurements (e.g., ['Voltage', 'Current'])
-            delay: Delay between measurements
-        """
-        try:
-            measurement_data = {}  # Corrected data storage
-            if "Voltage" in measurements:
-                if self.voltage_type == "Programmed":
-                    measurement_data["Voltage (V)"] = self.instrument.source_voltage  
-                else: 
-                    measurement_data["Voltage (V)"] = self.instrument.voltage     
-            
-            if "Current" in measurements:
-                if self.voltage_type == "Programmed":
-                    measurement_data["Current (A)"] = self.instrument.source_current  
-                else: 
-                    measurement_data["Current (A)"] = self.instrument.current     
-            
-            if "Resistance" in measurements:
-                measurement_data["Resistance (Ω)"] = self.instrument.resistance
-
-            if 'Power' in measurements:
-                measurement_data['Power (W)'] = measurement_data.get("Voltage (V)", 0) * measurement_data.get("Current (A)", 0)
-
-            if "Timestamp" in measurements:
-                measurement_data["Timestamp"] = time.time()
-
-            time.sleep(delay)
-            return measurement_data # Return the data instead of appending here
-        except Exception as e:
-            log.exception(f"Error during measurement: {e}")  # Log the exception
-            self.instrument.shutdown()  # added for safe shutdown on error
-            raise
-        
-    def run_measurement(self, settings):
-        try:
-
-            input_jacks = settings.get('input_jacks')
-            if input_jacks == "Front":
-                self.instrument.input_jacks = "front"  # Use lowercase "front"
-            elif input_jacks == "Rear":
-                self.instrument.input_jacks = "rear"   # Use lowercase "rear"
-
-            sensing_mode = settings.get('sensing_mode')
-            if sensing_mode == "2-Wire":
-                self.instrument.sensing_mode = "2wire"     # Use "2wire"
-            elif sensing_mode == "4-Wire":
-                self.instrument.sensing_mode = "4wire"     # Use "4wire"
-
-            output_off_state = settings.get('output_off_state')
-            valid_off_states = {   # Mapping for valid values
-                "Normal": "normal",
-                "High-Z": "highz",
-                "Zero": "zero",
-                "Guard": "guard" 
-            }
-            self.instrument.output_off_state = valid_off_states.get(output_off_state, "normal") # Default to "normal"
-
-            high_capacitance = settings.get('high_capacitance')
-            self.instrument.high_capacitance = high_capacitance == "On" # Boolean True/False
-
-            offset_compensated_ohms = settings.get('offset_compensated_ohms')
-            self.instrument.offset_compensated_ohms = offset_compensated_ohms == "On"
-
-            self.configure_source(settings.get("source_mode"), **settings)
-            self.configure_measurement(**settings)
-            self.instrument.enable_source()
-
-            data_list = [] # List to store data
-
-            source_mode = settings.get("source_mode")
-            if source_mode == "Voltage Bias" or source_mode == "Current Bias":
-                num_measurements = settings.get("num_measurements", 1)
-                delay = settings.get("delay_seconds", 0.1) 
-
-                for _ in range(num_measurements): # Looping for multiple readings
-                    measurement_data = self.measure(settings.get("measurements", []), delay)
-                    data_list.append(measurement_data)
-
-            elif source_mode in ["Voltage Sweep", "Current Sweep", "Voltage List Sweep", "Current List Sweep"]: #Sweep and List Sweep already updated with measurement inside loop
-
-                # Get measurements once and save to data frame (already implemented in setup_sweep and upload_list)
-                if source_mode in ["Voltage List Sweep", "Current List Sweep"]:
-                    self.upload_list(settings["list_file"], source_mode, settings)
-
-                elif source_mode in ["Voltage Sweep", "Current Sweep"]:
-                    sweep_type = "voltage" if source_mode == "Voltage Sweep" else "current"
-                    self.setup_sweep(sweep_type, settings)
-                self.data = self.data
-
-            else:
-                raise ValueError(f"Unsupported source mode: {source_mode}")
-
-            if source_mode in ["Voltage Bias", "Current Bias"]:    
-                self.data = pd.DataFrame(data_list)
-
-        except Exception as e:
-            log.exception(f"Error during measurement: {e}")
-            self.data = pd.DataFrame()  # Clear data in case of an error
-            raise RuntimeError(f"Error during measurement: {e}")  # More specific error message
-        finally:
-            self.instrument.disable_source()
-
-    def shutdown(self):
-        """Safely shutdown the instrument."""
-        try:
-            self.instrument.shutdown()
-        except Exception as e:
-            raise RuntimeError(f"Error shutting down: {e}")
-
-    def export_data(self, format_type):
-        """
-        Export the measurement data to the specified format.
-        Args:
-            format_type: 'csv', 'excel', or 'image'
-        """
-        try:
-            if format_type == "csv":
-                self.data.to_csv("measurement_data.csv", index=False)
-            elif format_type == "excel":
-                self.data.to_excel("measurement_data.xlsx", index=False)
-            elif format_type == "image":
-                import matplotlib.pyplot as plt
-                plt.figure()
-                self.data.plot()
-                plt.savefig("graph_image.png")
-        except Exception as e:
-            raise RuntimeError(f"Error exporting data: {e}")
- 
\ No newline at end of file
+import time
+import numpy as np
+import re
+import logging
+import os
+import json
+import functools
+import threading
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor, wait
+from kscringbuffer1 import RingBuffer
+from kscrecords1 import MeasurementRecords
+from kscstats1 import RunningStatistics
+from kscprofile1 import Profiler, TimedAdapter
+from kscdatabase1 import RunDatabase, DATABASE_PATH
+from kscplan1 import SWEEP_FUNCTIONS, validate_list_values, plan_from_params, list_plan
+from kscexport1 import open_sink, export_run
+
+def parse_range(range_setting):
+    """
+    Convert a range setting such as "200mV", "10μA" or 2.0 to a value in base units.
+    Returns None for "Auto", "Best Fixed" or no setting.
+    """
+    if range_setting is None or range_setting in ("Auto", "Best Fixed"):
+        return None
+    if isinstance(range_setting, (int, float)):
+        return float(range_setting)
+    match = re.match(r"([0-9.]+)\s*([a-zA-ZμµΩω]+)", range_setting)
+    if not match or match.group(2).lower() not in RANGE_UNITS:
+        raise ValueError(f"Invalid range format: {range_setting}")
+    return float(match.group(1)) * RANGE_UNITS[match.group(2).lower()]
+
+
+# Known instruments from earlier discovery scans, and how long they are trusted
+REGISTRY_PATH = os.path.join(os.path.expanduser("~"), ".ksc", "instruments.json")
+REGISTRY_TTL = 7 * 24 * 3600
+
+
+def timing_statistics(timestamps, requested_interval):
+    """
+    Compare achieved point spacing with the requested interval.
+    Returns mean/p50/p99 interval and mean/p50/p99/max absolute jitter in seconds, or {} for < 2 points.
+    """
+    intervals = np.diff(np.asarray(timestamps, dtype=float))
+    if len(intervals) == 0:
+        return {}
+    jitter = np.abs(intervals - requested_interval)
+    return {
+        "points": len(intervals) + 1,
+        "requested_interval": requested_interval,
+        "mean_interval": float(np.mean(intervals)),
+        "p50_interval": float(np.percentile(intervals, 50)),
+        "p99_interval": float(np.percentile(intervals, 99)),
+        "mean_jitter": float(np.mean(jitter)),
+        "p50_jitter": float(np.percentile(jitter, 50)),
+        "p99_jitter": float(np.percentile(jitter, 99)),
+        "max_jitter": float(np.max(jitter)),
+    }
+
+
+def adaptive_refinement(x, y, tolerance=0.02, min_step=0.0):
+    """
+    Pick new sweep points between measured ones where the response is not yet resolved.
+    An interval is split at its midpoint when the response changes by more than tolerance
+    (as a fraction of its full-scale span) across it, or when the slope bends enough at
+    either end that linear interpolation would be off by more than tolerance.
+    Args:
+        x: Source values measured so far
+        y: Measured response at x
+        tolerance: Allowed change/interpolation error as a fraction of full scale
+        min_step: Intervals narrower than 2 * min_step are never split
+    """
+    order = np.argsort(x)
+    x = np.asarray(x, dtype=float)[order]
+    y = np.asarray(y, dtype=float)[order]
+    span_x = x[-1] - x[0] if len(x) > 1 else 0.0
+    span_y = np.nanmax(y) - np.nanmin(y) if len(y) > 1 else 0.0
+    if span_x == 0 or not span_y > 0:
+        return np.array([])
+    dx = np.diff(x) / span_x
+    dy = np.diff(y) / span_y
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slope = dy / dx
+    bend = np.abs(np.diff(slope))  # Slope change at each interior point
+    error = np.zeros(len(dx))
+    error[:-1] = np.fmax(error[:-1], bend * dx[:-1])
+    error[1:] = np.fmax(error[1:], bend * dx[1:])
+    split = (np.abs(dy) > tolerance) | (error > tolerance)
+    split &= np.diff(x) >= 2 * min_step
+    return (x[:-1][split] + x[1:][split]) / 2
+
+
+def plan_ranges(predicted, ranges, headroom=1.1):
+    """
+    Pick the smallest fixed measure range that holds each predicted reading.
+    Args:
+        predicted: Expected readings (sign is ignored; NaN gets the largest range)
+        ranges: Available ranges in ascending order
+        headroom: Factor applied to the prediction before choosing a range
+    """
+    ranges = np.asarray(ranges, dtype=float)
+    index = np.searchsorted(ranges, np.abs(np.asarray(predicted, dtype=float)) * headroom)
+    return ranges[np.minimum(index, len(ranges) - 1)]
+
+
+def predict_readings(samples, readings, values):
+    """
+    Predict the reading magnitude at each value from sampled points: the larger of the
+    two neighbouring samples, which never underestimates a monotonic response.
+    """
+    order = np.argsort(samples)
+    samples = np.asarray(samples, dtype=float)[order]
+    readings = np.abs(np.asarray(readings, dtype=float))[order]
+    right = np.clip(np.searchsorted(samples, values), 0, len(samples) - 1)
+    left = np.clip(right - 1, 0, len(samples) - 1)
+    return np.fmax(readings[left], readings[right])
+
+
+def is_keithley_2450(idn):
+    """True if an *IDN? reply belongs to a Keithley 2450."""
+    return bool(idn) and "KEITHLEY" in idn.upper() and "2450" in idn
+
+
+def _probe_resource(rm, resource_name, timeout):
+    """Open a VISA resource and return its *IDN? reply, or None if it does not answer in time."""
+    try:
+        resource = rm.open_resource(resource_name, open_timeout=int(timeout * 1000))
+    except Exception:
+        return None
+    try:
+        resource.timeout = int(timeout * 1000)
+        return resource.query("*IDN?").strip()
+    except Exception:
+        return None
+    finally:
+        try:
+            resource.close()
+        except Exception:
+            pass
+
+
+def _load_registry(registry_path):
+    try:
+        with open(registry_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_registry(registry_path, registry):
+    try:
+        os.makedirs(os.path.dirname(registry_path), exist_ok=True)
+        with open(registry_path, "w") as f:
+            json.dump(registry, f, indent=2)
+    except OSError as e:
+        log.warning(f"Could not write instrument registry {registry_path}: {e}")
+
+
+def _register(registry, resource_name, idn):
+    parts = [part.strip() for part in idn.split(",")]
+    registry[resource_name] = {
+        "idn": idn,
+        "serial": parts[2] if len(parts) > 2 else "",
+        "last_seen": time.time(),
+    }
+
+
+def discover_keithleys(timeout=2.0, use_cache=True, registry_path=REGISTRY_PATH, ttl=REGISTRY_TTL):
+    """
+    Find connected Keithley 2450s.
+    Args:
+        timeout: Per-resource open/query timeout in seconds
+        use_cache: Try resources from the on-disk registry first and skip the full scan if any answer
+        registry_path: JSON file recording known resources and serial numbers
+        ttl: Seconds a registry entry is trusted before the bus is scanned again
+    Returns:
+        List of (resource_name, idn) tuples
+    """
+    import pyvisa
+    rm = pyvisa.ResourceManager()
+    registry = _load_registry(registry_path)
+
+    if use_cache:
+        now = time.time()
+        cached = [name for name, entry in registry.items() if now - entry.get("last_seen", 0) < ttl]
+        found = _probe_all(rm, cached, timeout)
+        if found:
+            for resource_name, idn in found:
+                _register(registry, resource_name, idn)
+            _save_registry(registry_path, registry)
+            return found
+
+    found = _probe_all(rm, rm.list_resources(), timeout)
+    for resource_name, idn in found:
+        _register(registry, resource_name, idn)
+    _save_registry(registry_path, registry)
+    return found
+
+
+def _probe_all(rm, resource_names, timeout):
+    """Query *IDN? on all resources concurrently and keep the Keithley 2450s, in resource order."""
+    resource_names = list(resource_names)
+    if not resource_names:
+        return []
+    executor = ThreadPoolExecutor(max_workers=min(16, len(resource_names)))
+    futures = [executor.submit(_probe_resource, rm, name, timeout) for name in resource_names]
+    wait(futures, timeout=timeout * 2)  # Hard cap in case a driver ignores its timeout
+    executor.shutdown(wait=False, cancel_futures=True)
+    found = []
+    for resource_name, future in zip(resource_names, futures):
+        idn = future.result() if future.done() else None
+        if is_keithley_2450(idn):
+            found.append((resource_name, idn))
+    return found
+
+
+def auto_detect_keithley(timeout=2.0, use_cache=True, registry_path=REGISTRY_PATH, ttl=REGISTRY_TTL):
+    """Detect Keithley 2450 and return its resource name."""
+    found = discover_keithleys(timeout, use_cache, registry_path, ttl)
+    if not found:
+        raise ConnectionError("No Keithley 2450 detected.")
+    return found[0][0]
+
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+log = logging.getLogger(__name__)
+
+# Reading buffer used for instrument-side (buffered and trigger-model) runs
+READING_BUFFER = "defbuffer1"
+# Columns of a measurement row, in display order
+MEASUREMENT_COLUMNS = ["Voltage (V)", "Current (A)", "Resistance (Ω)", "Conductance (S)", "Power (W)", "Timestamp"]
+# Maximum number of values sent per :SOUR:LIST command
+LIST_CHUNK_SIZE = 100
+# SCPI sense functions for each measurement type
+MEASURE_FUNCTIONS = {"voltage": "VOLT", "current": "CURR", "resistance": "RES"}
+# Points read from a list file and executed per instrument run
+LIST_SWEEP_CHUNK = 2500
+# A point-by-point sweep hands its new readings to the ring buffer, sink and subscribers
+# every LOOP_FLUSH_POINTS points or LOOP_FLUSH_SECONDS seconds, whichever comes first
+LOOP_FLUSH_POINTS = 50
+LOOP_FLUSH_SECONDS = 0.25
+# Fixed measure ranges of the 2450 used by the "Predictive" range planner
+MEASURE_RANGES = {
+    "CURR": [10e-9, 100e-9, 1e-6, 10e-6, 100e-6, 1e-3, 10e-3, 100e-3, 1.0],
+    "VOLT": [0.02, 0.2, 2.0, 20.0, 200.0],
+}
+# Value the 2450 returns for a reading beyond the fixed range
+OVERFLOW_READING = 9.9e37
+# Points sampled (with autorange) to predict ranges before a buffered sweep
+PRESCAN_POINTS = 11
+# Averaging filter types of the 2450 (:SENS:<function>:AVER:TCON)
+FILTER_TYPES = {"Repeat": "REP", "Moving": "MOV"}
+# Readings per trigger-model run in a statistics-only bias run; the instrument buffer holds one segment
+STATISTICS_SEGMENT = 10000
+# From this keep_every on, a statistics run fetches the retained readings one query each instead of
+# reading the whole segment back (one query round trip costs about as much as ~50 readings of block data)
+SPARSE_KEEP_EVERY = 50
+# Buffer readback as IEEE-754 float64 (:FORM:DATA REAL) with :FORM:BORD SWAP, i.e. little-endian
+BINARY_DTYPE = "<f8"
+# Unit suffix scaling for range settings
+RANGE_UNITS = {
+    "v": 1.0, "mv": 1e-3,
+    "a": 1.0, "ma": 1e-3, "μa": 1e-6, "µa": 1e-6, "na": 1e-9,
+    "ω": 1.0, "kω": 1e3, "mω": 1e6,
+}
+
+
+def read_ieee_block(adapter, dtype=BINARY_DTYPE):
+    """
+    Read one IEEE 488.2 definite-length block (#<digit count><byte count><data>) and its
+    terminator from a pymeasure adapter, straight into a NumPy array without parsing text.
+    """
+    start = adapter.read_bytes(2)
+    if start[:1] != b"#" or not start[1:2].isdigit() or start[1:2] == b"0":
+        raise ValueError(f"Expected a definite-length binary block, got {start!r}")
+    length = int(adapter.read_bytes(int(start[1:2])))
+    data = adapter.read_bytes(length) if length else b""
+    if len(data) != length:
+        raise ValueError(f"Binary block truncated: {len(data)} of {length} bytes")
+    adapter.read_bytes(-1, break_on_termchar=True)  # Message terminator after the block
+    return np.frombuffer(data, dtype=dtype)
+
+
+def read_list_values(source, chunk_size=LIST_SWEEP_CHUNK, warn=True):
+    """
+    Yield the first column of a list-sweep CSV as float arrays of at most chunk_size values.
+    Only the first column is read; a non-numeric first row is taken as a header and other
+    non-numeric cells are skipped.
+    Args:
+        source: File path or file-like object (e.g. a Streamlit upload)
+        chunk_size: Rows parsed per chunk
+        warn: Log skipped rows
+    """
+    import pandas as pd
+    if hasattr(source, "seek"):
+        source.seek(0)  # Allow several passes over an uploaded file
+    chunks = pd.read_csv(source, header=None, usecols=[0], chunksize=chunk_size, on_bad_lines="skip")
+    for i, chunk in enumerate(chunks):
+        values = pd.to_numeric(chunk[0], errors="coerce").to_numpy(dtype=float)
+        invalid = np.isnan(values)
+        if invalid.any():
+            skipped = int(invalid.sum()) - int(i == 0 and invalid[0])  # Header row is expected
+            if warn and skipped:
+                log.warning(f"Skipping {skipped} non-numeric rows in list file.")
+            values = values[~invalid]
+        yield values
+
+
+class RunAborted(RuntimeError):
+    """Raised inside a run stopped by KeithleyBackend.abort()."""
+
+
+def profiled(phase):
+    """Charge a KeithleyBackend method's time to a profiler phase when profiling is enabled."""
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if self.profiler is None:
+                return method(self, *args, **kwargs)
+            with self.profiler.phase(phase):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class KeithleyBackend:
+        
+    def __init__(self, instrument=None, resource_name=None, buffer_capacity=100000):
+        """
+        Initialize the Keithley 2450 backend.
+        Args:
+            instrument: Optional ready-made instrument to drive (e.g. a SimulatedKeithley2450)
+            resource_name: Optional VISA resource name; auto-detected when omitted
+            buffer_capacity: Number of recent readings kept in the live ring buffer
+        """
+        try:
+            if instrument is None:
+                if resource_name is None:
+                    resource_name = auto_detect_keithley()
+                from pymeasure.instruments.keithley import Keithley2450
+                instrument = Keithley2450(resource_name)
+            self.instrument = instrument
+            self._data = None  # Last run's DataFrame; see the data property
+            self.buffer = RingBuffer(MEASUREMENT_COLUMNS, buffer_capacity)  # Bounded live readings
+            self._run_times = RingBuffer(["Timestamp"], buffer_capacity)  # Reading times of the current run
+            self.timing_stats = {}  # Achieved vs requested point spacing of the last run
+            self.source_function = "voltage"  # Quantity being sourced, the other one is sensed
+            self._buffer_epoch = None  # Host time of the first reading in the instrument buffer
+            self._state = {}  # Mirror of settings last written to the instrument
+            self.sink = None  # Streaming file sink for the current run
+            self.last_run_path = None  # File streamed by the last run
+            self.file_only_points = None  # Readings of the last run held only by last_run_path (more than the buffer)
+            self.profiler = None  # Profiler while profiling is enabled
+            self.prometheus_path = None  # Metrics file rewritten after each profiled run
+            self.predictive_ranges = set()  # Sense functions ranged by the planner instead of autorange
+            self.range_changes = 0  # Measure range changes made by the planner in the last sweep
+            self.run_database = None  # RunDatabase every run is recorded in, when enabled
+            self._instrument_id = None  # Cached *IDN? reply
+            self.last_run_id = None  # Run database id of the last recorded run
+            self.statistics = {}  # Streaming statistics of the last statistics-only bias run, per column
+            self.subscribers = []  # Callables given every block of new readings as {column: array}
+            self.binary_transfer = True  # Read instrument buffers back as binary blocks instead of ASCII
+            self._abort = threading.Event()  # Set by abort() to stop the current run
+        except Exception as e:
+            raise ConnectionError(f"Unable to connect to Keithley 2450: {e}")
+
+    @property
+    def data(self):
+        """DataFrame of the last run; empty before the first run or after a failed one."""
+        if self._data is None:
+            import pandas as pd  # Deferred so scripts that never look at data start quickly
+            self._data = pd.DataFrame()
+        return self._data
+
+    @data.setter
+    def data(self, frame):
+        self._data = frame
+
+    def stream_data(self):
+        """Stream real-time measurement data (readings are also kept in self.buffer)."""
+        try:
+            while True:
+                data = self.measure(["Voltage", "Current", "Resistance", "Power"], delay=0.1)
+                yield data
+        except KeyboardInterrupt:
+            log.info("Data streaming stopped by user.")
+        finally:
+            self.instrument.disable_source()
+
+    def fetch_real_time_data(self):
+        """Fetch the most recent measurement data."""
+        try:
+            return self.buffer.latest()
+        except Exception as e:
+            log.exception(f"Error fetching data: {e}")
+            raise RuntimeError(f"Error fetching data: {e}")
+
+
+    @profiled("configure")
+    def configure_source(self, mode, enable=True, **kwargs):
+        """
+        Configure the instrument source settings based on the mode.
+        Args:
+            mode: One of ['Voltage Bias', 'Voltage Sweep', 'Voltage List Sweep', 
+                         'Current Bias', 'Current Sweep', 'Current List Sweep']
+            enable: Turn the output on; False leaves that to the caller (e.g. after a synchronised start)
+            kwargs: Additional parameters like voltage/current levels, range, etc.
+        """
+        try:
+            self.source_function = "voltage" if mode.startswith("Voltage") else "current"
+
+            function = SWEEP_FUNCTIONS[self.source_function]
+            if self.source_function == "voltage":
+                source_range = kwargs.get("voltage_range")
+                limit_header, limit = ":SOUR:VOLT:ILIM", kwargs.get("current_limit", 0.1)
+            else:
+                source_range = kwargs.get("current_range")
+                limit_header, limit = ":SOUR:CURR:VLIM", kwargs.get("voltage_limit", 0.1)
+
+            self._write_setting(":SOUR:FUNC", function)
+            range_value = parse_range(source_range)
+            if range_value is None:  # Auto / Best Fixed / unset
+                self._write_setting(f":SOUR:{function}:RANG:AUTO", "ON")
+                self._state.pop(f":SOUR:{function}:RANG", None)
+            else:
+                self._write_setting(f":SOUR:{function}:RANG", range_value)
+            self._write_setting(limit_header, limit)
+
+            # Bias levels are applied here; sweeps and list sweeps are executed by run_measurement
+            if mode == "Voltage Bias":
+                self.instrument.source_voltage = kwargs["voltage_level"]
+            elif mode == "Current Bias":
+                self.instrument.source_current = kwargs["current_level"]
+
+            if enable:
+                self.instrument.enable_source()
+
+        except ValueError as e:  # More specific exception handling
+            raise ValueError(f"Invalid input parameters for source configuration: {e}")
+        except Exception as e:  # Catch any other exceptions during source config
+            raise RuntimeError(f"Error configuring source: {e}")
+        
+    @profiled("configure")
+    def configure_measurement(self, **kwargs):
+        """Configures measurement settings (NPLC, ranges, etc.)."""
+        try:
+            nplc = kwargs.get("nplc", 1.0) # Default NPLC
+            
+            # The predictive planner only ranges sweeps; bias and live runs autorange instead
+            sweeping = not kwargs.get("source_mode", "Sweep").endswith("Bias")
+
+            def _set_range(measurement_type, range_setting):
+                function = MEASURE_FUNCTIONS[measurement_type]
+                self.predictive_ranges.discard(function)
+                if range_setting == "Auto" or (range_setting == "Predictive" and not sweeping):
+                    # Enable auto-range for measurement; the fixed range is no longer known
+                    self._write_setting(f":SENS:{function}:RANG:AUTO", "ON")
+                    self._state.pop(f":SENS:{function}:RANG", None)
+
+                elif range_setting == "Predictive":
+                    # Sweeps set a fixed range ahead of each point, so the 2450 never autoranges mid-sweep
+                    self._write_setting(f":SENS:{function}:RANG:AUTO", "OFF")
+                    self.predictive_ranges.add(function)
+
+                elif range_setting == "Best Fixed":
+                    pass #Best Fixed sets automatic voltage and current range by itself
+
+                else:  # Manual range setting
+                    value = parse_range(range_setting)
+                    self._write_setting(f":SENS:{function}:RANG:AUTO", "OFF")
+                    self._write_setting(f":SENS:{function}:RANG", value)
+            
+            measurements = kwargs.get("measurements", [])
+            if "Voltage" in measurements:
+                _set_range("voltage", kwargs.get("voltage_range", "Auto")) # Using helper
+                self._write_setting(":SENS:VOLT:NPLC", nplc)
+                self.voltage_type = kwargs.get("voltage_type", "Measured") 
+            if "Current" in kwargs.get("measurements", []):
+                _set_range("current", kwargs.get("current_range", "Auto"))  # Use helper
+                self._write_setting(":SENS:CURR:NPLC", nplc)
+                self.current_type = kwargs.get("current_type", "Measured") 
+            if "Resistance" in kwargs.get("measurements", []):
+                _set_range("resistance", kwargs.get("resistance_range", "Auto")) # Use helper
+                self._write_setting(":SENS:RES:NPLC", nplc)
+                self.resistance_type = kwargs.get("resistance_type", "Measured") 
+                # Set other resistance settings if needed (e.g., wires)
+
+            # Sense whichever quantity is not sourced; the source value is returned with every reading
+            function = SWEEP_FUNCTIONS[self.source_function]
+            sense = "CURR" if self.source_function == "voltage" else "VOLT"
+            self._write_setting(":SENS:FUNC", f'"{sense}"')
+            # "Measured" reads back the actual source output, "Programmed" reports the set level
+            source_type = kwargs.get(f"{self.source_function}_type", "Measured")
+            readback = "OFF" if source_type == "Programmed" else "ON"
+            self._write_setting(f":SOUR:{function}:READ:BACK", readback)
+
+            # Averaging filter on the sensed quantity: each stored reading averages filter_count conversions
+            filter_type = kwargs.get("filter_type", "Off")
+            if filter_type in FILTER_TYPES:
+                self._write_setting(f":SENS:{sense}:AVER:TCON", FILTER_TYPES[filter_type])
+                self._write_setting(f":SENS:{sense}:AVER:COUN", int(kwargs.get("filter_count", 10)))
+                self._write_setting(f":SENS:{sense}:AVER", "ON")
+            elif filter_type == "Off":
+                self._write_setting(f":SENS:{sense}:AVER", "OFF")
+            else:
+                raise ValueError(f"Unknown filter type: {filter_type}")
+            self._clear_buffer()
+
+        except ValueError as e:
+            raise ValueError(f"Invalid measurement parameters: {e}")
+        except Exception as e:
+            log.exception(f"Error configuring measurements: {e}")  # Log unexpected errors
+            raise RuntimeError(f"Error configuring measurements: {e}")
+
+    def setup_sweep(self, sweep_type, params):
+        """
+        Set up a voltage or current sweep.
+        Args:
+            sweep_type: 'voltage' or 'current'
+            params: Sweep parameters (start, stop, steps, step, delay, sweep_type, dual_sweep, stepper, buffered);
+                    sweep_type 'Adaptive' also reads tolerance, min_step, max_step and max_points
+        """
+        try:
+            self.source_function = sweep_type
+            grid_type = params.get("sweep_type", "Linear")
+            buffered = params.get("buffered", False) or params.get("hardware_timed", False)
+            source_range = parse_range(params.get(f"{sweep_type}_range"))
+
+            self.range_changes = 0
+            if grid_type == "Adaptive":
+                records = self._run_adaptive_sweep(sweep_type, params, buffered, source_range)
+                with self._phase("post-process"):
+                    self.data = records.to_frame(params['measurements'])
+                if self._predictive(sweep_type):
+                    log.info(f"Predictive ranging: {self.range_changes} measure range changes over {len(self.data)} points.")
+                return
+
+            # Compiled and validated once per recipe; repeated sweeps reuse the cached plan
+            plan = plan_from_params(sweep_type, params, source_range)
+            records = self._execute_plan(plan, params['measurements'], buffered)
+
+            with self._phase("post-process"):
+                self.data = records.to_frame(params['measurements'])  # Derived columns computed once, vectorized
+            if self._predictive(sweep_type):
+                log.info(f"Predictive ranging: {self.range_changes} measure range changes over {len(plan)} points.")
+
+
+        except RunAborted:
+            raise
+        except ValueError as e: # Handling the logspace issue for zero and neg values
+            raise ValueError(f"Invalid sweep parameters: {e}")
+        except Exception as e:
+            raise RuntimeError(f"Error setting up {sweep_type} sweep: {e}")
+
+    def _run_adaptive_sweep(self, sweep_type, params, buffered, source_range=None):
+        """
+        Measure a coarse grid, then keep inserting points where the response bends or
+        changes quickly (see adaptive_refinement) until it is resolved. Returns the records
+        sorted by source value; a dual sweep repeats the final grid in reverse.
+        """
+        # The coarse grid is an ordinary linear plan; refinement points lie inside its validated span
+        coarse_params = dict(params, sweep_type="Linear", stepper=False, dual_sweep=False, step=None)
+        if params.get("max_step"):
+            span = abs(params.get("stop", 1.0) - params.get("start", 0.0))
+            coarse_params["steps"] = max(params.get("steps", 10), int(np.ceil(span / params["max_step"])) + 1)
+        coarse = plan_from_params(sweep_type, coarse_params, source_range)
+        start, stop, delay = coarse.start, coarse.stop, coarse.delay
+        tolerance = params.get("tolerance", 0.02)
+        min_step = params.get("min_step", abs(stop - start) / 1000)
+        max_points = params.get("max_points", 10000)
+        measurements = params['measurements']
+
+        def run_points(values, known=None):
+            # Readings so far predict the measure ranges of refinement points
+            return self._run_points(sweep_type, values, delay, measurements, buffered, known)
+
+        records = run_points(coarse.values)
+        passes = 0
+        while len(records) < max_points:
+            new_values = adaptive_refinement(records.source, records.reading, tolerance, min_step)
+            new_values = new_values[:max_points - len(records)]
+            if len(new_values) == 0:
+                break
+            records.extend_records(run_points(new_values, (records.source, records.reading)))
+            passes += 1
+
+        records.sort()
+        log.info(f"Adaptive {sweep_type} sweep: {len(records)} points after {passes} refinement passes.")
+        if params.get("dual_sweep", False):
+            records.extend_records(run_points(records.source[::-1].copy(), (records.source, records.reading)))
+        return records
+
+    def _run_points(self, sweep_type, values, delay, measurements, buffered, known=None):
+        """
+        Measure arbitrary source values, from the instrument's list memory or point by point.
+        known: Optional (source values, readings) already measured, used instead of a range pre-scan
+        """
+        if buffered and self._predictive(sweep_type):
+            return self._run_predictive_buffered(sweep_type, values, delay, measurements, known)
+        if buffered:
+            self._load_list_sweep(sweep_type, values, delay)
+            return self._run_buffered(sweep_type, measurements, len(values) * delay)
+        return self._run_loop_sweep(sweep_type, values, delay, measurements)
+
+    def _run_loop_sweep(self, sweep_type, values, delay, measurements):
+        """Source and measure each sweep point from Python (fallback path)."""
+        records = MeasurementRecords(sweep_type, len(values))
+        sense = "CURR" if sweep_type == "voltage" else "VOLT"
+        predictive = self._predictive(sweep_type)
+        history = []  # (source, reading) of the last points, used to predict the next range
+        stored = 0  # Readings already passed to _store
+        last_flush = time.monotonic()
+        try:
+            for value in values:
+                self._check_abort()
+                try:
+                    with self._phase("source"):
+                        if sweep_type == "voltage":
+                            self.instrument.source_voltage = value
+                        elif sweep_type == "current":
+                            self.instrument.source_current = value
+
+                    with self._phase("settle"):
+                        time.sleep(delay)
+                    if not predictive:
+                        source, reading, relative_time = self._read_point()
+                    else:
+                        # Extrapolate the last two readings to this point and set the range before reading
+                        if len(history) == 2 and history[1][0] != history[0][0]:
+                            (x0, y0), (x1, y1) = history
+                            predicted = max(abs(y1), abs(y1 + (y1 - y0) / (x1 - x0) * (value - x1)))
+                            self._set_measure_range(sense, plan_ranges(predicted, MEASURE_RANGES[sense])[()])
+                        source, reading, relative_time = self._read_ranged(sense, first=not history)
+                        history = (history + [(source, reading)])[-2:]
+                    records.append(source, reading, self._buffer_epoch + relative_time)
+
+                except Exception as e:  # Log the failing point; the caller reports the error to the user
+                    log.exception(f"Error during {sweep_type} sweep at {value}: {e}")
+                    raise  # Stop the measurement
+                # Stream readings while sweeping so the sink, live plots and subscribers keep up
+                if len(records) - stored >= LOOP_FLUSH_POINTS or time.monotonic() - last_flush >= LOOP_FLUSH_SECONDS:
+                    self._store(records.view(stored), measurements)
+                    stored = len(records)
+                    last_flush = time.monotonic()
+        finally:
+            # Whatever was measured is kept, also when the sweep is aborted or fails
+            self._store(records.view(stored), measurements)
+        return records
+
+    def _predictive(self, sweep_type):
+        """True if the quantity sensed during this sweep is ranged by the planner."""
+        return ("CURR" if sweep_type == "voltage" else "VOLT") in self.predictive_ranges
+
+    def _set_measure_range(self, sense, value):
+        """Set a fixed measure range, counting it if the range actually changes."""
+        if self._write_setting(f":SENS:{sense}:RANG", f"{value:g}"):
+            self.range_changes += 1
+
+    def _step_range_up(self, sense):
+        """Move to the next larger range after an overflow; False if already on the largest."""
+        ranges = MEASURE_RANGES[sense]
+        current = float(self._state.get(f":SENS:{sense}:RANG", ranges[-1]))
+        larger = [value for value in ranges if value > current]
+        if not larger:
+            return False
+        self._set_measure_range(sense, larger[0])
+        return True
+
+    def _read_ranged(self, sense, first=False):
+        """
+        One reading with the planner's fixed range. Overflows are repeated on the next larger
+        range; the first point of a sweep is also repeated on the range that fits it.
+        """
+        if f":SENS:{sense}:RANG" not in self._state:
+            self._set_measure_range(sense, MEASURE_RANGES[sense][-1])  # Safe start
+        while True:
+            source, reading, relative_time = self._read_point()
+            if abs(reading) >= OVERFLOW_READING:
+                if self._step_range_up(sense):
+                    continue
+                return source, float("nan"), relative_time
+            if first:
+                first = False
+                before = self.range_changes
+                self._set_measure_range(sense, plan_ranges(reading, MEASURE_RANGES[sense])[()])
+                if self.range_changes != before:
+                    continue
+            return source, reading, relative_time
+
+    def _run_predictive_buffered(self, sweep_type, values, delay, measurements, known=None):
+        """
+        Buffered sweep with ranges planned from a quick autoranged pre-scan (or from readings
+        already known). The sweep is split into runs of points sharing a range, and each run
+        is loaded and triggered after setting its range, so the instrument never autoranges
+        during the sweep.
+        """
+        sense = "CURR" if sweep_type == "voltage" else "VOLT"
+        values = np.asarray(values, dtype=float)
+        if known is None:
+            known = self._prescan(sweep_type, values, delay)
+        plan = plan_ranges(predict_readings(*known, values), MEASURE_RANGES[sense])
+        boundaries = np.flatnonzero(np.diff(plan)) + 1
+        records = MeasurementRecords(sweep_type, len(values))
+        for segment_values, segment_range in zip(np.split(values, boundaries), plan[np.r_[0, boundaries]]):
+            self._set_measure_range(sense, segment_range)
+            block, epoch = self._run_segment(sweep_type, sense, segment_values, delay)
+            records.extend(block, epoch)
+        self._store(records, measurements)
+        return records
+
+    def _prescan(self, sweep_type, values, delay, points=PRESCAN_POINTS):
+        """Sample the sweep at a few points with autorange; returns (source values, readings)."""
+        sense = "CURR" if sweep_type == "voltage" else "VOLT"
+        order = np.argsort(values)
+        samples = np.unique(values[order][np.linspace(0, len(values) - 1, min(points, len(values))).astype(int)])
+        self._write_setting(f":SENS:{sense}:RANG:AUTO", "ON")
+        self._state.pop(f":SENS:{sense}:RANG", None)  # Autorange moves the range
+        self._load_list_sweep(sweep_type, samples, delay)
+        block, _ = self._trigger_and_read(sweep_type, len(samples) * delay)
+        self._write_setting(f":SENS:{sense}:RANG:AUTO", "OFF")
+        return block[:, 0], block[:, 1]
+
+    def _run_segment(self, sweep_type, sense, values, delay):
+        """Run one fixed-range list segment, repeating overflowed points on larger ranges."""
+        self._load_list_sweep(sweep_type, values, delay)
+        block, epoch = self._trigger_and_read(sweep_type, len(values) * delay)
+        overflow = np.flatnonzero(np.abs(block[:, 1]) >= OVERFLOW_READING)
+        while len(overflow) and self._step_range_up(sense):
+            self._load_list_sweep(sweep_type, values[overflow], delay)
+            retry, retry_epoch = self._trigger_and_read(sweep_type, len(overflow) * delay)
+            retry[:, 2] += retry_epoch - epoch  # Keep times relative to the segment start
+            block[overflow] = retry
+            overflow = overflow[np.abs(retry[:, 1]) >= OVERFLOW_READING]
+        return self._mask_overflows(block), epoch
+
+    def _execute_plan(self, plan, measurements, buffered):
+        """Run a SweepPlan on the instrument's sweep engine, from its list memory, or point by point."""
+        if buffered and plan.native_grid and not self._predictive(plan.sweep_type):
+            # Plain linear/log grids map onto the 2450's own sweep commands
+            self._load_grid_sweep(plan)
+            return self._run_buffered(plan.sweep_type, measurements, plan.duration)
+        return self._run_points(plan.sweep_type, plan.values, plan.delay, measurements, buffered)
+
+    @profiled("configure")
+    def _load_grid_sweep(self, plan):
+        """Program a linear or logarithmic plan into the instrument's sweep engine."""
+        function = plan.function
+        self._forget_source_range(function)
+        shape = "LOG" if plan.grid_type == "Logarithmic" else "LIN"
+        dual = "ON" if plan.dual_sweep else "OFF"
+        self.instrument.write(
+            f':SOUR:SWE:{function}:{shape} {plan.start:.15g}, {plan.stop:.15g}, {plan.num_steps:d}, {plan.delay:g}, '
+            f'1, BEST, OFF, {dual}, "{READING_BUFFER}"'
+        )
+
+    @profiled("configure")
+    def _load_list_sweep(self, sweep_type, values, delay):
+        """Load arbitrary sweep values into the source list and program a list sweep."""
+        function = SWEEP_FUNCTIONS[sweep_type]
+        self._forget_source_range(function)
+        for i in range(0, len(values), LIST_CHUNK_SIZE):
+            chunk = ", ".join(f"{value:.15g}" for value in values[i:i + LIST_CHUNK_SIZE])
+            append = ":APP" if i else ""  # First chunk replaces the list, the rest append
+            self.instrument.write(f":SOUR:LIST:{function}{append} {chunk}")
+        self.instrument.write(f':SOUR:SWE:{function}:LIST 1, {delay:g}, 1, OFF, "{READING_BUFFER}"')
+
+    def _run_buffered(self, sweep_type, measurements, expected_duration):
+        """
+        Start a sweep or trigger-model sequence already loaded on the instrument and
+        read it back in one transfer.
+        Args:
+            sweep_type: Sourced quantity, 'voltage' or 'current'
+            measurements: List of enabled measurements
+            expected_duration: Estimated run time in seconds, used for the completion timeout
+        """
+        block, epoch = self._trigger_and_read(sweep_type, expected_duration)
+        records = MeasurementRecords(sweep_type, len(block))
+        records.extend(self._mask_overflows(block), epoch)
+        self._store(records, measurements)
+        return records
+
+    @profiled("read")
+    def _trigger_and_read(self, sweep_type, expected_duration):
+        """Run the loaded sweep and return its (source, reading, relative time) block and time origin."""
+        count, epoch = self._trigger(sweep_type, expected_duration)
+        return self._read_block(count), epoch
+
+    def _trigger(self, sweep_type, expected_duration):
+        """Run the loaded sweep into a cleared buffer; returns the number of readings and the time origin."""
+        # Sourcing voltage means the reading is current and vice versa
+        sense = "CURR" if sweep_type == "voltage" else "VOLT"
+        self._write_setting(":SENS:FUNC", f'"{sense}"')
+        self._clear_buffer()
+        epoch = time.time()
+        self.instrument.write(":INIT")
+        self._wait_for_trigger_model(timeout=expected_duration + 10.0)
+        return int(self.instrument.ask(f':TRAC:ACT? "{READING_BUFFER}"')), epoch
+
+    def _read_block(self, count):
+        """Read the first count readings of the buffer as an (n, 3) block of source, reading, relative time."""
+        if count == 0:
+            return np.empty((0, 3))
+        query = f':TRAC:DATA? 1, {count}, "{READING_BUFFER}", SOUR, READ, REL'
+        if self.binary_transfer:
+            from pyvisa.errors import VisaIOError  # A real instrument times out through VISA, not TimeoutError
+            try:
+                self._data_format("REAL")
+                self.instrument.write(query)
+                return read_ieee_block(self.instrument.adapter).astype(float).reshape(-1, 3)
+            except (ValueError, TimeoutError, VisaIOError) as e:
+                log.warning(f"Binary buffer readback failed ({e}); using ASCII from now on.")
+                self.binary_transfer = False
+                self.instrument.adapter.flush_read_buffer()
+        self._data_format("ASC")
+        raw = self.instrument.values(query)
+        return np.asarray(raw, dtype=float).reshape(-1, 3)
+
+    def _read_readings(self, indices):
+        """Read single buffer readings (0-based indices) as an (n, 3) block, one short query each."""
+        self._data_format("ASC")
+        rows = [self.instrument.values(f':TRAC:DATA? {i + 1}, {i + 1}, "{READING_BUFFER}", SOUR, READ, REL')
+                for i in indices]
+        return np.asarray(rows, dtype=float).reshape(-1, 3)
+
+    @staticmethod
+    def _mask_overflows(block):
+        """Replace overflow readings (beyond a fixed measure range) in a readback block with NaN."""
+        block[np.abs(block[:, 1]) >= OVERFLOW_READING, 1] = np.nan
+        return block
+
+    def _data_format(self, data_format):
+        """Select ASCII ('ASC') or binary ('REAL') reading data; single-reading queries are parsed as ASCII."""
+        if data_format == "REAL":
+            self._write_setting(":FORM:BORD", "SWAP")
+        self._write_setting(":FORM:DATA", data_format)
+
+    def _buffer_statistics(self):
+        """Mean, sample standard deviation, minimum and maximum of the buffer readings, from the instrument."""
+        self._data_format("ASC")
+        return [float(self.instrument.ask(f':TRAC:STAT:{name}? "{READING_BUFFER}"'))
+                for name in ("AVER", "STDD", "MIN", "MAX")]
+
+    def _forget_source_range(self, function):
+        """Sweep commands pick the source function and range themselves (BEST)."""
+        for header in (":SOUR:FUNC", f":SOUR:{function}:RANG", f":SOUR:{function}:RANG:AUTO"):
+            self._state.pop(header, None)
+
+    def _clear_buffer(self):
+        """Clear the instrument reading buffer and forget its time origin."""
+        self.instrument.write(f':TRAC:CLE "{READING_BUFFER}"')
+        self._buffer_epoch = None
+
+    def _wait_for_trigger_model(self, timeout, interval=0.05):
+        """Poll the trigger model until it leaves the running state."""
+        deadline = time.monotonic() + timeout
+        wait = 0.001  # Back off from 1 ms so short sweeps are not held up by the poll interval
+        while True:
+            state = self.instrument.ask(":TRIG:STAT?").strip().split(";")[0].upper()
+            if state in ("IDLE", "EMPTY"):
+                return
+            if state in ("ABORTED", "FAILED"):
+                raise RuntimeError(f"Instrument sweep ended with trigger state {state}")
+            if self._abort.is_set():
+                self.instrument.write(":ABOR")
+                raise RunAborted("Run aborted.")
+            if time.monotonic() > deadline:
+                self.instrument.write(":ABOR")
+                raise TimeoutError("Timed out waiting for instrument sweep to complete.")
+            time.sleep(wait)
+            wait = min(wait * 2, interval)
+
+    @profiled("post-process")
+    def _store(self, records, measurements):
+        """Pass a finished block of records to the live ring buffer, the run's sink and the timing log."""
+        if len(records) == 0:
+            return
+        columns = records.columns(measurements)
+        self.buffer.extend_columns(columns)
+        if self.sink is not None:
+            self.sink.extend_columns(columns)
+        self._run_times.extend_columns({"Timestamp": records.time})
+        self._publish(columns)
+
+    def _record(self, rows):
+        """Keep new readings in the live ring buffer and the run's streaming sink."""
+        if len(rows) == 1:
+            self.buffer.append(rows[0])
+        else:
+            self.buffer.extend(rows)
+        if self.sink is not None:
+            self.sink.extend(rows)
+        if self.subscribers:
+            self._publish({column: np.array([row.get(column, np.nan) for row in rows], dtype=float)
+                           for column in MEASUREMENT_COLUMNS if column in rows[0]})
+
+    def subscribe(self, callback):
+        """
+        Call callback({column: array}) with every block of new readings, on the acquiring thread.
+        The callback must be quick and must not use the instrument.
+        """
+        self.subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self.subscribers:
+            self.subscribers.remove(callback)
+
+    def _publish(self, columns):
+        for callback in list(self.subscribers):
+            try:
+                callback(columns)
+            except Exception as e:
+                log.warning(f"Reading subscriber failed: {e}")
+
+    def _build_row(self, voltage, current, timestamp, measurements):
+        """Assemble one measurement dictionary from a voltage/current reading pair."""
+        measurement_data = {}
+        if "Voltage" in measurements:
+            measurement_data["Voltage (V)"] = voltage
+        if "Current" in measurements:
+            measurement_data["Current (A)"] = current
+        if "Resistance" in measurements:
+            measurement_data["Resistance (Ω)"] = voltage / current if current else float("nan")
+        if "Conductance" in measurements:
+            measurement_data["Conductance (S)"] = current / voltage if voltage else float("nan")
+        if "Power" in measurements:
+            measurement_data["Power (W)"] = voltage * current
+        if "Timestamp" in measurements:
+            measurement_data["Timestamp"] = timestamp
+        return measurement_data
+
+    def upload_list(self, file, mode, params):
+        """
+        Run a list sweep from a CSV file whose first column holds the source values.
+        The file is validated in a first pass, then executed chunk by chunk (each point once);
+        only one chunk of values is held in memory and readings go to the ring buffer/sink.
+        Args:
+            file: CSV path or file-like object
+            mode: 'Voltage List Sweep' or 'Current List Sweep'
+            params: Run settings (delay_seconds, measurements, buffered, source range/limit, list_chunk_size)
+        """
+        try:
+            if not file:  # Check if file is uploaded
+                raise ValueError("No file uploaded")
+
+            sweep_type = "voltage" if mode == "Voltage List Sweep" else "current"
+            function = SWEEP_FUNCTIONS[sweep_type]
+            source_range = parse_range(params.get(f"{sweep_type}_range"))
+            limit = params.get("current_limit" if sweep_type == "voltage" else "voltage_limit")
+            chunk_size = params.get("list_chunk_size", LIST_SWEEP_CHUNK)
+            delay = params.get("delay_seconds", 0.1)
+            if self.sink is None:
+                self.last_run_path = None  # Called on its own: no earlier run's file belongs to this list
+            self.file_only_points = None
+
+            total = 0
+            for values in read_list_values(file, chunk_size):
+                validate_list_values(values, function, source_range, limit, offset=total)
+                total += len(values)
+            if total == 0:
+                raise ValueError("List file contains no values.")
+
+            # The ring buffer only keeps the last readings: a longer list is streamed to a run file,
+            # which then holds the run for export_data and the run database
+            own_sink = self.sink is None and total > self.buffer.capacity
+            if own_sink:
+                self.sink = open_sink(params.get("stream_format") or "csv", directory=params.get("output_directory", "."))
+                log.info(f"List of {total} points exceeds the {self.buffer.capacity}-reading buffer; "
+                         f"streaming it to {self.sink.path}.")
+            self.source_function = sweep_type
+            self.range_changes = 0
+            self.buffer.clear()
+            try:
+                for values in read_list_values(file, chunk_size, warn=False):
+                    self._check_abort()
+                    self._execute_plan(list_plan(sweep_type, values, delay), params.get("measurements", []),
+                                       params.get("buffered", False))
+            finally:
+                run_file = self.sink.path if self.sink is not None else None
+                if own_sink:
+                    self.sink.close()
+                    self.last_run_path = self.sink.path if self.sink.rows_written else None
+                    self.sink = None
+            if self.buffer.total > self.buffer.capacity:
+                self.file_only_points = self.buffer.total
+                log.warning(f"self.data holds the last {self.buffer.capacity} of {self.buffer.total} readings; "
+                            f"the full list sweep is in {run_file}.")
+            with self._phase("post-process"):
+                self.data = self.buffer.to_frame()
+            if self.file_only_points is not None:  # Mark the table as the tail of a longer run
+                self.data.attrs.update(total_points=self.file_only_points, run_file=run_file)
+            log.info(f"List sweep ran {total} points in chunks of {chunk_size}.")
+
+        except RunAborted:
+            raise
+        except ValueError as ve:
+            raise RuntimeError(f"CSV validation error: {ve}")
+        except Exception as e:
+            raise RuntimeError(f"Error uploading list: {e}")
+
+    def measure(self, measurements, delay):
+        """
+        Perform measurements and collect data.
+        Args:
+            measurements: List of enabled measurements (e.g., ['Voltage', 'Current'])
+            delay: Delay between measurements
+        """
+        try:
+            measurement_data = self._record_reading(*self._read_point(), measurements)
+            if delay:
+                with self._phase("settle"):
+                    time.sleep(delay)
+            return measurement_data # Return the data instead of appending here
+        except Exception as e:
+            log.exception(f"Error during measurement: {e}")  # Log the exception
+            self.instrument.shutdown()  # added for safe shutdown on error
+            raise
+        
+    @profiled("read")
+    def _read_point(self):
+        """Take one reading; returns (source, reading, seconds since the buffer was cleared)."""
+        # Source value, sensed reading and relative timestamp all come back from one query
+        self._data_format("ASC")  # No write unless a binary readback switched the format
+        source, reading, relative_time = self.instrument.values(
+            f':READ? "{READING_BUFFER}", SOUR, READ, REL'
+        )
+        if self._buffer_epoch is None:  # First reading since the buffer was cleared
+            self._buffer_epoch = time.time() - relative_time
+        return source, reading, relative_time
+
+    def _run_bias_statistics(self, num_measurements, delay, measurements, keep_every=0, hardware_timed=False):
+        """
+        Take num_measurements bias readings but keep only streaming statistics of them
+        (self.statistics), plus every keep_every-th reading when keep_every > 0.
+        With hardware_timed the instrument takes the readings in segments of STATISTICS_SEGMENT
+        and computes each segment's statistics itself (:TRAC:STAT), so only four values cross
+        the bus per segment; otherwise each reading is folded in on the host as it arrives.
+        Retained readings cost extra: below SPARSE_KEEP_EVERY the whole segment is read back
+        (24 bytes per reading in binary) and thinned on the host, from it on each retained
+        reading is fetched with its own query.
+        """
+        sensed = "Current (A)" if self.source_function == "voltage" else "Voltage (V)"
+        stats = RunningStatistics()
+        if hardware_timed:
+            self._write_setting(":SENS:COUN", 1)
+            done = 0
+            while done < num_measurements:
+                self._check_abort()
+                count = min(num_measurements - done, STATISTICS_SEGMENT)
+                self.instrument.write(f':TRIG:LOAD "SimpleLoop", {count:d}, {delay:g}, "{READING_BUFFER}"')
+                with self._phase("read"):
+                    taken, epoch = self._trigger(self.source_function, count * delay)
+                    block = None
+                    if taken:
+                        summary = self._buffer_statistics()
+                        if max(abs(summary[2]), abs(summary[3])) < OVERFLOW_READING:
+                            stats.merge_summary(taken, *summary)
+                        else:  # A fixed range overflowed: leave the overflow readings out on the host
+                            log.warning("Readings overflowed the measure range; they are left out of the statistics.")
+                            block = self._mask_overflows(self._read_block(taken))
+                            stats.update_array(block[:, 1])
+                    if keep_every and taken:
+                        # Indices continue across segments, so the retained rows stay evenly spaced
+                        kept = np.arange((-done) % keep_every, taken, keep_every)
+                        if block is not None:
+                            block = block[kept]
+                        elif keep_every >= SPARSE_KEEP_EVERY:
+                            block = self._read_readings(kept)
+                        else:
+                            block = self._read_block(taken)[kept]
+                if keep_every and taken:
+                    records = MeasurementRecords(self.source_function, len(block))
+                    records.extend(self._mask_overflows(block), epoch)
+                    self._store(records, measurements)
+                done += count
+        else:
+            for i in range(num_measurements):
+                self._check_abort()
+                source, reading, relative_time = self._read_point()
+                if abs(reading) >= OVERFLOW_READING:
+                    reading = float("nan")  # Skipped by the statistics, stored as a gap
+                stats.update(reading)
+                if keep_every and i % keep_every == 0:
+                    self._record_reading(source, reading, relative_time, measurements)
+                if delay:
+                    with self._phase("settle"):
+                        time.sleep(delay)
+        summary = stats.summary()
+        self.statistics = {sensed: summary}
+        log.info(f"{sensed}: mean {summary['mean']:.6g}, std {summary['std']:.3g}, "
+                 f"min {summary['min']:.6g}, max {summary['max']:.6g} over {summary['count']} readings.")
+
+    def _record_reading(self, source, reading, relative_time, measurements):
+        """Build, store and return the measurement row for one reading."""
+        if abs(reading) >= OVERFLOW_READING:
+            reading = float("nan")  # Overflow on a fixed range, not a measured value
+        if self.source_function == "voltage":
+            voltage, current = source, reading
+        else:
+            current, voltage = source, reading
+        timestamp = self._buffer_epoch + relative_time
+        measurement_data = self._build_row(voltage, current, timestamp, measurements)
+        self._record([measurement_data])
+        self._run_times.append({"Timestamp": timestamp})
+        return measurement_data
+
+    def run_measurement(self, settings, keep_output=False, record=True, ready=None):
+        """
+        Configure the instrument from settings and run one bias, sweep or list sweep into self.data.
+        Args:
+            settings: Run settings collected by the frontend (source_mode, levels, ranges, measurements, ...)
+            keep_output: Leave the source on after a successful run (back-to-back jobs)
+            record: Store the run in the run database, when one is enabled
+            ready: Optional callable run once the instrument is configured, before the output is
+                   enabled and the first reading taken (e.g. a barrier that starts several instruments together)
+        """
+        if self.profiler is not None:
+            self.profiler.start_run()
+        started = time.time()
+        status = "failed"
+        self._abort.clear()
+        self.last_run_path = None  # Only this run's file may be exported or recorded
+        self.file_only_points = None
+        try:
+            # Stream readings to a per-run file while acquiring (settings: stream_format, output_directory)
+            stream_format = settings.get("stream_format")
+            if stream_format:
+                self.sink = open_sink(stream_format, directory=settings.get("output_directory", "."))
+            self._run_times.clear()
+            self.statistics = {}
+
+            input_jacks = settings.get('input_jacks')
+            if input_jacks == "Front":
+                self._write_setting(":ROUT:TERM", "FRON")
+            elif input_jacks == "Rear":
+                self._write_setting(":ROUT:TERM", "REAR")
+
+            sensing_mode = settings.get('sensing_mode')
+            if sensing_mode in ("2-Wire", "4-Wire"):
+                remote_sense = "ON" if sensing_mode == "4-Wire" else "OFF"
+                for function in ("VOLT", "CURR", "RES"):
+                    self._write_setting(f":SENS:{function}:RSEN", remote_sense)
+
+            source_function = SWEEP_FUNCTIONS["voltage" if settings.get("source_mode", "").startswith("Voltage") else "current"]
+            output_off_state = settings.get('output_off_state')
+            valid_off_states = {   # Mapping for valid values
+                "Normal": "NORM",
+                "High-Z": "HIMP",
+                "Zero": "ZERO",
+                "Guard": "GUAR" 
+            }
+            self._write_setting(f":OUTP:{source_function}:SMOD", valid_off_states.get(output_off_state, "NORM")) # Default to "normal"
+
+            high_capacitance = settings.get('high_capacitance')
+            self._write_setting(f":SOUR:{source_function}:HIGH:CAP", "ON" if high_capacitance == "On" else "OFF")
+
+            offset_compensated_ohms = settings.get('offset_compensated_ohms')
+            self._write_setting(":SENS:RES:OCOM", "ON" if offset_compensated_ohms == "On" else "OFF")
+
+            # With a ready callback the output is enabled only once it returns, so instruments
+            # started together also switch their sources on together
+            self.configure_source(settings.get("source_mode"), enable=ready is None, **settings)
+            self.configure_measurement(**settings)
+            if ready is not None:
+                ready()
+                self.instrument.enable_source()
+
+            source_mode = settings.get("source_mode")
+            if source_mode == "Voltage Bias" or source_mode == "Current Bias":
+                num_measurements = settings.get("num_measurements", 1)
+                delay = settings.get("delay_seconds", 0.1) 
+
+                # measure() stores each reading in the ring buffer, so long bias runs stay bounded
+                self.buffer.clear()
+                requested_interval = delay
+                if settings.get("bias_statistics", False):
+                    keep_every = int(settings.get("keep_every", 0))
+                    requested_interval = delay * max(keep_every, 1)  # Spacing of the retained rows
+                    self._run_bias_statistics(num_measurements, delay, settings.get("measurements", []),
+                                              keep_every, settings.get("hardware_timed", False))
+                elif settings.get("hardware_timed", False):
+                    # The trigger model paces the readings; no host sleeps between points
+                    self._write_setting(":SENS:COUN", 1)
+                    self.instrument.write(f':TRIG:LOAD "SimpleLoop", {num_measurements:d}, {delay:g}, "{READING_BUFFER}"')
+                    self._run_buffered(self.source_function, settings.get("measurements", []),
+                                       num_measurements * delay)
+                else:
+                    for _ in range(num_measurements): # Looping for multiple readings
+                        self._check_abort()
+                        self.measure(settings.get("measurements", []), delay)
+                if self.buffer.total > self.buffer.capacity:
+                    log.warning(f"Bias run kept the last {self.buffer.capacity} of {self.buffer.total} readings.")
+
+            elif source_mode in ["Voltage Sweep", "Current Sweep", "Voltage List Sweep", "Current List Sweep"]: #Sweep and List Sweep already updated with measurement inside loop
+
+                # Get measurements once and save to data frame (already implemented in setup_sweep and upload_list)
+                requested_interval = settings.get("delay", 0.1)
+                if source_mode in ["Voltage List Sweep", "Current List Sweep"]:
+                    requested_interval = settings.get("delay_seconds", 0.1)
+                    self.upload_list(settings["list_file"], source_mode, settings)
+
+                elif source_mode in ["Voltage Sweep", "Current Sweep"]:
+                    sweep_type = "voltage" if source_mode == "Voltage Sweep" else "current"
+                    self.setup_sweep(sweep_type, settings)
+                self.data = self.data
+
+            else:
+                raise ValueError(f"Unsupported source mode: {source_mode}")
+
+            if source_mode in ["Voltage Bias", "Current Bias"]:    
+                with self._phase("post-process"):
+                    self.data = self.buffer.to_frame()
+
+            times = self._run_times.window().get("Timestamp")
+            self.timing_stats = timing_statistics(times if times is not None else [], requested_interval)
+            if self.timing_stats:
+                log.info(
+                    f"Point interval {self.timing_stats['mean_interval']:.6f} s (requested {requested_interval:g} s), "
+                    f"jitter p50 {self.timing_stats['p50_jitter']:.6f} s, p99 {self.timing_stats['p99_jitter']:.6f} s, "
+                    f"max {self.timing_stats['max_jitter']:.6f} s"
+                )
+            status = "completed"
+
+        except RunAborted:
+            log.info("Measurement aborted.")
+            status = "aborted"
+            self.data = None
+            raise
+        except Exception as e:
+            log.exception(f"Error during measurement: {e}")
+            self.data = None  # Clear data in case of an error
+            raise RuntimeError(f"Error during measurement: {e}")  # More specific error message
+        finally:
+            if not keep_output or status != "completed":
+                self.instrument.disable_source()
+            if self.sink is not None:
+                self.sink.close()  # Flushes whatever was acquired, even after an error
+                self.last_run_path = self.sink.path if self.sink.rows_written else None
+                self.sink = None
+            if record and self.run_database is not None:
+                self._record_run(settings, started, status)
+            if self.profiler is not None:
+                phases = self.profiler.end_run()
+                log.info("Run phases: " + ", ".join(f"{name} {seconds:.4f} s" for name, seconds in phases.items()))
+                if self.prometheus_path:
+                    try:
+                        self.profiler.write_prometheus(self.prometheus_path)
+                    except OSError as e:
+                        log.warning(f"Could not write metrics to {self.prometheus_path}: {e}")
+
+    def abort(self):
+        """Stop the current run at the next point or trigger-model poll (safe from any thread)."""
+        self._abort.set()
+
+    def _check_abort(self):
+        if self._abort.is_set():
+            raise RunAborted("Run aborted.")
+
+    @property
+    def instrument_id(self):
+        """The instrument's *IDN? reply, queried once."""
+        if self._instrument_id is None:
+            self._instrument_id = self.instrument.ask("*IDN?").strip()
+        return self._instrument_id
+
+    def enable_run_database(self, path=DATABASE_PATH):
+        """
+        Record every run_measurement (settings, instrument, device, readings) in a local run database.
+        Args:
+            path: SQLite file of the database
+        """
+        if self.run_database is None or self.run_database.path != path:
+            self.disable_run_database()
+            self.run_database = RunDatabase(path)
+        return self.run_database
+
+    def disable_run_database(self):
+        if self.run_database is not None:
+            self.run_database.close()
+            self.run_database = None
+
+    def _record_run(self, settings, started, status):
+        """Store the finished run in the run database; a database problem never fails the run."""
+        try:
+            summary = {"timing": self.timing_stats, "range_changes": self.range_changes,
+                       "statistics": self.statistics}
+            # A run larger than the buffer is recorded by its stream file, not by the truncated self.data
+            in_file = self.file_only_points is not None and self.last_run_path is not None
+            self.last_run_id = self.run_database.record_run(
+                settings, self.data if status == "completed" and not in_file else None, self.instrument_id, started,
+                status=status, stream_file=self.last_run_path, summary=summary,
+                points=self.file_only_points if in_file else None,
+            )
+        except Exception as e:
+            log.warning(f"Could not record the run in {self.run_database.path}: {e}")
+
+    def enable_profiling(self, prometheus_path=None):
+        """
+        Start recording per-SCPI-command latencies and per-phase run times.
+        Args:
+            prometheus_path: Optional .prom file rewritten after every run_measurement
+        """
+        if self.profiler is None:
+            self.profiler = Profiler()
+            self.instrument.adapter = TimedAdapter(self.instrument.adapter, self.profiler)
+        self.prometheus_path = prometheus_path
+        return self.profiler
+
+    def disable_profiling(self):
+        """Stop recording and restore the instrument's own adapter."""
+        self._remove_adapter(TimedAdapter)
+        self.profiler = None
+
+    def enable_recording(self, transcript=None):
+        """
+        Start capturing every SCPI write and read, with times, in a ksctranscript1.Transcript.
+        Args:
+            transcript: Transcript to append to; a new one when None
+        Returns:
+            The transcript (save it with transcript.save(path))
+        """
+        from ksctranscript1 import RecordingAdapter
+        if not isinstance(self.instrument.adapter, RecordingAdapter):
+            self.instrument.adapter = RecordingAdapter(self.instrument.adapter, transcript)
+        return self.instrument.adapter.transcript
+
+    def disable_recording(self):
+        """Stop capturing; returns the transcript recorded so far, or None."""
+        from ksctranscript1 import RecordingAdapter
+        return self._remove_adapter(RecordingAdapter)
+
+    def _remove_adapter(self, proxy_type):
+        """Unwrap one adapter proxy (profiling or recording) wherever it sits in the chain."""
+        parent, adapter = None, self.instrument.adapter
+        while hasattr(adapter, "_adapter"):
+            if isinstance(adapter, proxy_type):
+                if parent is None:
+                    self.instrument.adapter = adapter._adapter
+                else:
+                    parent._adapter = adapter._adapter
+                return getattr(adapter, "transcript", None)
+            parent, adapter = adapter, adapter._adapter
+        return None
+
+    def profile_report(self):
+        """Latency histograms and phase times recorded so far ({} when profiling is off)."""
+        return self.profiler.report() if self.profiler is not None else {}
+
+    def _phase(self, name):
+        return self.profiler.phase(name) if self.profiler is not None else nullcontext()
+
+    def _write_setting(self, header, value):
+        """Write a SCPI setting unless the instrument is already known to hold that value."""
+        if self._state.get(header) == value:
+            return False
+        self.instrument.write(f"{header} {value}")
+        self._state[header] = value
+        return True
+
+    def invalidate_state(self):
+        """Forget the cached instrument state (call after front-panel changes or a reset)."""
+        self._state.clear()
+
+    def reset(self):
+        """Reset the instrument to its defaults and clear the cached state."""
+        try:
+            self.instrument.reset()
+        finally:
+            self.invalidate_state()
+            self._buffer_epoch = None
+
+    def shutdown(self):
+        """Safely shutdown the instrument."""
+        try:
+            self.instrument.shutdown()
+        except Exception as e:
+            raise RuntimeError(f"Error shutting down: {e}")
+
+    def export_data(self, format_type, directory="."):
+        """
+        Export the measurement data to the specified format.
+        When the last run was streamed to disk, the export is built from that file
+        chunk by chunk instead of from self.data.
+        Args:
+            format_type: 'csv', 'excel', or 'image'
+            directory: Output directory; each export gets a unique file name
+        Returns:
+            Path of the exported file
+        """
+        try:
+            return export_run(self.data, format_type, directory, self.last_run_path)
+        except Exception as e:
+            raise RuntimeError(f"Error exporting data: {e}")
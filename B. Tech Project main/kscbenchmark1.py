@@ -0,0 +1,161 @@
+import io
+import json
+import time
+import logging
+import argparse
+import numpy as np
+from kscbackend1 import KeithleyBackend
+from kscsimulator1 import SimulatedKeithley2450
+
+log = logging.getLogger(__name__)
+
+MEASUREMENTS = ["Voltage", "Current", "Resistance", "Power", "Timestamp"]
+
+
+def make_backend(query_latency=1e-3, write_latency=0.0, **kwargs):
+    """Create a KeithleyBackend driving a simulated 2450."""
+    instrument = SimulatedKeithley2450(query_latency=query_latency, write_latency=write_latency, **kwargs)
+    return KeithleyBackend(instrument=instrument)
+
+
+def _result(name, points, elapsed):
+    return {
+        "benchmark": name,
+        "points": points,
+        "seconds": elapsed,
+        "points_per_second": points / elapsed if elapsed > 0 else float("inf"),
+        "latency_ms": 1e3 * elapsed / points if points else 0.0,
+    }
+
+
+def bench_measure(backend, points):
+    """Repeated single measure() calls at a fixed source level."""
+    backend.configure_measurement(measurements=MEASUREMENTS, voltage_type="Measured", current_type="Measured")
+    backend.instrument.apply_voltage(compliance_current=0.1)
+    backend.instrument.source_voltage = 1.0
+    backend.instrument.enable_source()
+    start = time.perf_counter()
+    for _ in range(points):
+        backend.measure(MEASUREMENTS, 0)
+    elapsed = time.perf_counter() - start
+    backend.instrument.disable_source()
+    return _result("measure", points, elapsed)
+
+
+def bench_setup_sweep(backend, points, buffered=False):
+    """Linear voltage sweep through setup_sweep."""
+    backend.configure_measurement(measurements=MEASUREMENTS, voltage_type="Measured", current_type="Measured")
+    params = {"start": 0.0, "stop": 1.0, "steps": points, "delay": 0.0,
+              "measurements": MEASUREMENTS, "buffered": buffered}
+    backend.instrument.enable_source()
+    start = time.perf_counter()
+    backend.setup_sweep("voltage", params)
+    elapsed = time.perf_counter() - start
+    backend.instrument.disable_source()
+    return _result("setup_sweep (buffered)" if buffered else "setup_sweep", points, elapsed)
+
+
+def bench_upload_list(backend, points, buffered=False):
+    """Voltage list sweep from an in-memory CSV file."""
+    backend.configure_measurement(measurements=MEASUREMENTS, voltage_type="Measured", current_type="Measured")
+    lines = ["Voltage (V)"] + [f"{value:g}" for value in np.linspace(0.0, 1.0, points)]
+    csv_file = io.BytesIO("\n".join(lines).encode("utf-8"))
+    params = {"source_mode": "Voltage List Sweep", "delay": 0.0, "delay_seconds": 0.0,
+              "measurements": MEASUREMENTS, "buffered": buffered}
+    backend.instrument.enable_source()
+    start = time.perf_counter()
+    backend.upload_list(csv_file, "Voltage List Sweep", params)
+    elapsed = time.perf_counter() - start
+    backend.instrument.disable_source()
+    return _result("upload_list (buffered)" if buffered else "upload_list", points, elapsed)
+
+
+def bench_bias(backend, points):
+    """run_measurement in Voltage Bias mode."""
+    settings = {"source_mode": "Voltage Bias", "voltage_level": 1.0, "current_limit": 0.1,
+                "num_measurements": points, "delay_seconds": 0.0, "measurements": MEASUREMENTS,
+                "voltage_type": "Measured", "current_type": "Measured"}
+    start = time.perf_counter()
+    backend.run_measurement(settings)
+    elapsed = time.perf_counter() - start
+    return _result("run_measurement (bias)", points, elapsed)
+
+
+def bench_readback(backend, points, binary=True):
+    """Reading a filled instrument buffer back in one transfer, as a binary block or as ASCII text."""
+    backend.binary_transfer = binary
+    backend.configure_measurement(measurements=MEASUREMENTS, voltage_type="Measured", current_type="Measured")
+    backend.instrument.enable_source()
+    backend.setup_sweep("voltage", {"start": 0.0, "stop": 1.0, "steps": points, "delay": 0.0,
+                                    "measurements": MEASUREMENTS, "buffered": True})
+    backend._read_block(1)  # Format switched outside the timed transfer
+    start = time.perf_counter()
+    block = backend._read_block(points)
+    elapsed = time.perf_counter() - start
+    backend.instrument.disable_source()
+    assert len(block) == points
+    return _result("readback (binary)" if binary else "readback (ASCII)", points, elapsed)
+
+
+def bench_parallel(first, second, points):
+    """Bias runs on two instruments at once through MultiKeithleyBackend (points per instrument)."""
+    from kscmulti1 import MultiKeithleyBackend
+    settings = {"source_mode": "Voltage Bias", "voltage_level": 1.0, "current_limit": 0.1,
+                "num_measurements": points, "delay_seconds": 0.0, "measurements": MEASUREMENTS}
+    multi = MultiKeithleyBackend({"smu1": first, "smu2": second})
+    start = time.perf_counter()
+    multi.run_parallel({"smu1": settings, "smu2": settings})
+    elapsed = time.perf_counter() - start
+    multi.shutdown()
+    return _result("run_parallel (2 SMUs)", points, elapsed)
+
+
+def run_benchmarks(points=200, query_latency=1e-3, write_latency=0.0, transfer_rate=0.0):
+    """Run every benchmark on a fresh simulated backend and return the results."""
+    cases = [
+        lambda backend: bench_measure(backend, points),
+        lambda backend: bench_setup_sweep(backend, points),
+        lambda backend: bench_setup_sweep(backend, points, buffered=True),
+        lambda backend: bench_upload_list(backend, points),
+        lambda backend: bench_upload_list(backend, points, buffered=True),
+        lambda backend: bench_bias(backend, points),
+        lambda backend: bench_parallel(backend, make_backend(query_latency=query_latency, write_latency=write_latency,
+                                                             transfer_rate=transfer_rate), points),
+        lambda backend: bench_readback(backend, points, binary=False),
+        lambda backend: bench_readback(backend, points, binary=True),
+    ]
+    results = []
+    for case in cases:
+        backend = make_backend(query_latency=query_latency, write_latency=write_latency, transfer_rate=transfer_rate)
+        results.append(case(backend))
+    return results
+
+
+def format_results(results):
+    lines = [f"{'benchmark':<28}{'points':>8}{'seconds':>10}{'points/s':>12}{'ms/point':>10}"]
+    for r in results:
+        lines.append(f"{r['benchmark']:<28}{r['points']:>8d}{r['seconds']:>10.3f}"
+                     f"{r['points_per_second']:>12.1f}{r['latency_ms']:>10.3f}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="KeithleyBackend throughput benchmarks (simulated 2450).")
+    parser.add_argument("--points", type=int, default=200, help="Points per benchmark")
+    parser.add_argument("--query-latency", type=float, default=1e-3, help="Simulated seconds per query")
+    parser.add_argument("--write-latency", type=float, default=0.0, help="Simulated seconds per write")
+    parser.add_argument("--transfer-rate", type=float, default=0.0,
+                        help="Simulated bus throughput in bytes per second (0: unlimited)")
+    parser.add_argument("--json", help="Also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    logging.getLogger().setLevel(logging.WARNING)  # Keep driver chatter out of the report
+    results = run_benchmarks(args.points, args.query_latency, args.write_latency, args.transfer_rate)
+    print(format_results(results))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+
+log = logging.getLogger(__name__)
+
+# Recipe keys that name files, resolved relative to the recipe file
+RECIPE_PATH_KEYS = ("list_file", "output_directory")
+
+
+def load_recipe(path):
+    """
+    Read a recipe file (.json, or .yaml/.yml with PyYAML installed) and return a list of run settings.
+    A recipe is one settings dictionary, a list of them, or {"defaults": {...}, "runs": [...]}
+    where every run is merged over the defaults.
+    """
+    with open(path, encoding="utf-8") as f:
+        if path.endswith((".yaml", ".yml")):
+            try:
+                import yaml
+            except ImportError:
+                raise ValueError("YAML recipes need PyYAML (pip install pyyaml); use a .json recipe instead.")
+            recipe = yaml.safe_load(f)
+        else:
+            recipe = json.load(f)
+
+    if isinstance(recipe, dict) and "runs" in recipe:
+        defaults = recipe.get("defaults") or {}
+        runs = [dict(defaults, **run) for run in recipe["runs"]]
+    elif isinstance(recipe, dict):
+        runs = [recipe]
+    elif isinstance(recipe, list):
+        runs = recipe
+    else:
+        raise ValueError(f"{path}: a recipe must be a settings object, a list of them, or have a 'runs' list.")
+
+    base = os.path.dirname(os.path.abspath(path))
+    for i, run in enumerate(runs):
+        if not isinstance(run, dict) or "source_mode" not in run:
+            raise ValueError(f"{path}: run {i + 1} has no source_mode.")
+        for key in RECIPE_PATH_KEYS:
+            if isinstance(run.get(key), str):
+                run[key] = os.path.join(base, os.path.expanduser(run[key]))
+    return runs
+
+
+def make_backend(resource_name=None, simulate=False):
+    """Connect a KeithleyBackend to an instrument, or to a simulated 2450."""
+    from kscbackend1 import KeithleyBackend
+    if simulate:
+        from kscsimulator1 import SimulatedKeithley2450
+        return KeithleyBackend(instrument=SimulatedKeithley2450())
+    return KeithleyBackend(resource_name=resource_name)
+
+
+def run_recipes(backend, runs, output_directory=".", export=("csv",), on_progress=None):
+    """Run settings dictionaries in order through a JobQueue and return the finished jobs."""
+    from kscjobs1 import JobQueue
+    queue = JobQueue(backend, output_directory=output_directory, on_progress=on_progress)
+    for i, settings in enumerate(runs):
+        queue.submit(settings, name=settings.get("name", f"{i + 1}: {settings['source_mode']}"), export=export)
+    queue.start()
+    try:
+        queue.wait()
+    except KeyboardInterrupt:
+        log.warning("Interrupted, cancelling the remaining runs.")
+        queue.cancel()
+        queue.wait()
+    finally:
+        queue.stop()
+    return queue.jobs
+
+
+def format_job(job):
+    timing = job.timing
+    line = (f"{job.name:<32}{job.status:<11}{len(job.data) if job.data is not None else 0:>9d}"
+            f"{timing.get('acquire', 0.0):>10.3f}{timing.get('post_process', 0.0):>10.3f}")
+    if job.error is not None:
+        line += f"  {job.error}"
+    for path in job.exports.values():
+        line += f"  {path}"
+    return line
+
+
+def main(argv=None):
+    started = time.perf_counter()
+    parser = argparse.ArgumentParser(description="Run Keithley 2450 measurement recipes without the UI.")
+    parser.add_argument("recipe", help="Recipe file (.json, .yaml or .yml)")
+    parser.add_argument("--resource", help="VISA resource name; the first detected 2450 when omitted")
+    parser.add_argument("--simulate", action="store_true", help="Run against a simulated 2450")
+    parser.add_argument("--output-dir", default=".", help="Directory for exported results")
+    parser.add_argument("--format", action="append", choices=["csv", "excel", "image"],
+                        help="Export format (repeatable); csv when omitted")
+    parser.add_argument("--database", nargs="?", const="", metavar="PATH",
+                        help="Record the runs in the run database (default location when PATH is omitted)")
+    parser.add_argument("--record", metavar="PATH",
+                        help="Save a transcript of every SCPI write and read to PATH (.jsonl, .jsonl.gz) for replay")
+    parser.add_argument("--metrics", metavar="PATH", help="Profile the runs and write Prometheus metrics to PATH")
+    parser.add_argument("--check", action="store_true", help="Only validate the recipe")
+    parser.add_argument("-q", "--quiet", action="store_true", help="Only log warnings and errors")
+    args = parser.parse_args(argv)
+
+    # Configured before the backend is imported, so its own basicConfig call does not override the level
+    logging.basicConfig(level=logging.WARNING if args.quiet else logging.INFO,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+    try:
+        runs = load_recipe(args.recipe)
+    except (OSError, ValueError) as e:
+        print(f"Invalid recipe: {e}", file=sys.stderr)
+        return 2
+    if args.check:
+        print(f"{args.recipe}: {len(runs)} runs OK")
+        return 0
+
+    try:
+        backend = make_backend(args.resource, args.simulate)
+    except ConnectionError as e:
+        print(e, file=sys.stderr)
+        return 3
+    # Recording starts first, so the transcript holds everything the replay will ask for
+    transcript = backend.enable_recording() if args.record else None
+    if args.database is not None:
+        if args.database:
+            backend.enable_run_database(args.database)
+        else:
+            backend.enable_run_database()
+    if args.metrics:
+        backend.enable_profiling(prometheus_path=args.metrics)
+    log.info(f"Ready after {time.perf_counter() - started:.3f} s, running {len(runs)} recipe runs.")
+
+    jobs = run_recipes(backend, runs, args.output_dir, args.format or ["csv"])  # Metrics are written after every run
+    if transcript is not None:
+        transcript.metadata.update(instrument=backend.instrument_id, recorded=time.time(), runs=runs)
+        log.info(f"Saved {len(transcript)} SCPI operations to {transcript.save(args.record)}.")
+
+    print(f"{'run':<32}{'status':<11}{'points':>9}{'acquire':>10}{'export':>10}")
+    for job in jobs:
+        print(format_job(job))
+    return 0 if all(job.status == "completed" for job in jobs) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
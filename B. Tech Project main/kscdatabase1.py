@@ -0,0 +1,207 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+# Default run history location, next to the instrument registry
+DATABASE_PATH = os.path.join(os.path.expanduser("~"), ".ksc", "runs.sqlite")
+# Settings that label a run or say where it went, not how it was measured; left out of the settings hash
+UNHASHED_SETTINGS = {"name", "device", "output_directory", "stream_format"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    started REAL NOT NULL,
+    finished REAL,
+    status TEXT NOT NULL,
+    instrument TEXT,
+    device TEXT,
+    source_mode TEXT,
+    settings_hash TEXT NOT NULL,
+    settings TEXT NOT NULL,
+    points INTEGER NOT NULL DEFAULT 0,
+    columns TEXT,
+    data_file TEXT,
+    stream_file TEXT,
+    summary TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_device ON runs (device, started);
+CREATE INDEX IF NOT EXISTS runs_started ON runs (started);
+CREATE INDEX IF NOT EXISTS runs_settings_hash ON runs (settings_hash, started);
+CREATE INDEX IF NOT EXISTS runs_instrument ON runs (instrument, started);
+"""
+
+
+def _jsonable(value):
+    """Replace values JSON cannot hold (uploaded files, numpy scalars) with stable equivalents."""
+    if isinstance(value, dict):
+        return {str(key): _jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(item) for item in value]
+    if isinstance(value, np.generic):
+        return value.item()
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return getattr(value, "name", None) or type(value).__name__  # e.g. the list file's name
+
+
+def canonical_settings(settings):
+    """Run settings as sorted, JSON-safe text."""
+    return json.dumps(_jsonable(settings), sort_keys=True, separators=(",", ":"))
+
+
+def settings_hash(settings):
+    """SHA-1 of the measurement-relevant settings; equal recipes hash equal on any device."""
+    relevant = {key: value for key, value in settings.items() if key not in UNHASHED_SETTINGS}
+    return hashlib.sha1(canonical_settings(relevant).encode("utf-8")).hexdigest()
+
+
+class RunDatabase:
+    """
+    Local history of measurement runs.
+
+    Metadata (settings, instrument, device, times) goes into an indexed SQLite table;
+    the readings of each run are stored as one compressed .npz file of float64 columns
+    in a runs/ directory next to the database, so the table stays small and queries by
+    device, date or settings hash only touch the indexes.
+    """
+
+    def __init__(self, path=DATABASE_PATH):
+        """
+        Args:
+            path: SQLite file; created (with its directory) if missing
+        """
+        directory = os.path.dirname(os.path.abspath(path))
+        self.path = path
+        self.data_directory = os.path.join(directory, "runs")
+        os.makedirs(self.data_directory, exist_ok=True)
+        self._lock = threading.Lock()  # One connection shared by the UI and worker threads
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.row_factory = sqlite3.Row
+        self._connection.execute("PRAGMA journal_mode=WAL")  # Readers do not block a run being recorded
+        self._connection.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def record_run(self, settings, data=None, instrument=None, started=None, finished=None,
+                   status="completed", stream_file=None, summary=None, points=None):
+        """
+        Store one run and return its id.
+        Args:
+            settings: run_measurement settings (settings['device'] names the device under test)
+            data: DataFrame or {column: array} of readings, or None
+            instrument: Instrument identification, e.g. the *IDN? reply
+            started, finished: Run start and end in seconds since the epoch
+            status: 'completed' or 'failed'
+            stream_file: File the run was streamed to, if any
+            summary: Small JSON-safe dictionary (e.g. timing statistics)
+            points: Number of readings when they are kept only in stream_file (data None)
+        """
+        columns = {} if data is None else {str(column): np.asarray(data[column], dtype=float) for column in data}
+        stored = len(next(iter(columns.values()), []))
+        points = stored if points is None else points
+        finished = time.time() if finished is None else finished
+        with self._lock, self._connection:
+            cursor = self._connection.execute(
+                "INSERT INTO runs (started, finished, status, instrument, device, source_mode, settings_hash, "
+                "settings, points, columns, stream_file, summary) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (finished if started is None else started, finished, status, instrument, settings.get("device"),
+                 settings.get("source_mode"), settings_hash(settings), canonical_settings(settings), points,
+                 json.dumps(list(columns)), stream_file, json.dumps(_jsonable(summary or {}))),
+            )
+            run_id = cursor.lastrowid
+            if stored:
+                data_file = f"{run_id:08d}.npz"
+                np.savez_compressed(os.path.join(self.data_directory, data_file),
+                                    **{f"c{i}": values for i, values in enumerate(columns.values())})
+                self._connection.execute("UPDATE runs SET data_file = ? WHERE id = ?", (data_file, run_id))
+        return run_id
+
+    def find_runs(self, device=None, since=None, until=None, settings_hash=None, instrument=None,
+                  status=None, limit=100):
+        """
+        Return run metadata, newest first, as a list of dictionaries.
+        Args:
+            device: Device name
+            since, until: Start time bounds in seconds since the epoch
+            settings_hash: Only runs with these settings (see settings_hash())
+            instrument: Instrument identification
+            status: 'completed' or 'failed'
+            limit: Maximum number of runs returned
+        """
+        conditions, arguments = [], []
+        for clause, value in (("device = ?", device), ("started >= ?", since), ("started < ?", until),
+                              ("settings_hash = ?", settings_hash), ("instrument = ?", instrument),
+                              ("status = ?", status)):
+            if value is not None:
+                conditions.append(clause)
+                arguments.append(value)
+        where = f"WHERE {' AND '.join(conditions)} " if conditions else ""
+        with self._lock:
+            rows = self._connection.execute(
+                f"SELECT * FROM runs {where}ORDER BY started DESC LIMIT ?", arguments + [int(limit)]
+            ).fetchall()
+        return [self._metadata(row) for row in rows]
+
+    def get_run(self, run_id):
+        """Return the metadata of one run, or None."""
+        with self._lock:
+            row = self._connection.execute("SELECT * FROM runs WHERE id = ?", (run_id,)).fetchone()
+        return self._metadata(row) if row is not None else None
+
+    def load_run(self, run_id):
+        """Return the readings of a run as a DataFrame (empty if it has none)."""
+        import pandas as pd
+        run = self.get_run(run_id)
+        if run is None:
+            raise KeyError(f"No run with id {run_id}")
+        if not run["data_file"]:
+            if run["stream_file"] and os.path.exists(run["stream_file"]):  # Readings kept only in the run file
+                from kscexport1 import read_run_file
+                return pd.concat(read_run_file(run["stream_file"]), ignore_index=True)
+            return pd.DataFrame(columns=run["columns"])
+        with np.load(os.path.join(self.data_directory, run["data_file"])) as arrays:
+            return pd.DataFrame({column: arrays[f"c{i}"] for i, column in enumerate(run["columns"])})
+
+    def delete_run(self, run_id):
+        """Remove a run and its readings file."""
+        run = self.get_run(run_id)
+        if run is None:
+            return
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM runs WHERE id = ?", (run_id,))
+        if run["data_file"]:
+            try:
+                os.remove(os.path.join(self.data_directory, run["data_file"]))
+            except FileNotFoundError:
+                pass
+
+    def devices(self):
+        """Distinct device names, sorted."""
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT DISTINCT device FROM runs WHERE device IS NOT NULL ORDER BY device"
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    @staticmethod
+    def _metadata(row):
+        run = dict(row)
+        run["settings"] = json.loads(run["settings"])
+        run["columns"] = json.loads(run["columns"] or "[]")
+        run["summary"] = json.loads(run["summary"] or "{}")
+        return run
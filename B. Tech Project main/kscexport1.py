@@ -0,0 +1,294 @@
+import os
+import csv
+import shutil
+import time
+import uuid
+import logging
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+# Largest number of data rows an .xlsx sheet can hold (plus one header row)
+EXCEL_MAX_ROWS = 1048575
+
+
+def unique_run_path(directory, extension, prefix="run"):
+    """Return a new file path like run_20240101-120000_1a2b3c.csv in directory."""
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    return os.path.join(directory, f"{prefix}_{stamp}_{uuid.uuid4().hex[:6]}.{extension}")
+
+
+class StreamingSink:
+    """
+    Appends measurement rows to a file in chunks while acquisition runs.
+
+    Rows are buffered in memory and written every chunk_size rows or flush_interval
+    seconds, whichever comes first, so a crash loses at most one chunk and memory
+    use is bounded by the chunk size rather than the run length.
+    """
+
+    extension = None
+
+    def __init__(self, path=None, directory=".", columns=None, chunk_size=1000, flush_interval=5.0):
+        """
+        Args:
+            path: Output file; a unique per-run name in directory when None
+            directory: Directory for generated file names
+            columns: Column order; taken from the first row when None
+            chunk_size: Rows buffered before a write
+            flush_interval: Maximum seconds between writes
+        """
+        if path is None:
+            os.makedirs(directory, exist_ok=True)
+            path = unique_run_path(directory, self.extension)
+        self.path = path
+        self.columns = list(columns) if columns else None
+        self.chunk_size = chunk_size
+        self.flush_interval = flush_interval
+        self.rows_written = 0
+        self.closed = False
+        self._pending = []
+        self._last_flush = time.monotonic()
+
+    def append(self, row):
+        self._pending.append(row)
+        if len(self._pending) >= self.chunk_size or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def extend(self, rows):
+        for row in rows:
+            self.append(row)
+
+    def extend_columns(self, columns):
+        """Write rows given as {column: array} straight through as one chunk."""
+        self.flush()  # Keep row order with anything appended before
+        count = len(next(iter(columns.values()), []))
+        if count == 0:
+            return
+        if self.columns is None:
+            self.columns = list(columns)
+            self._open()
+        self._write_chunk({column: np.asarray(columns[column], dtype=float) if column in columns
+                           else np.full(count, np.nan) for column in self.columns})
+        self.rows_written += count
+        self._last_flush = time.monotonic()
+
+    def flush(self):
+        """Write the buffered rows and push them to disk."""
+        if self._pending:
+            if self.columns is None:
+                self.columns = list(self._pending[0])
+                self._open()
+            columns = {column: np.array([row.get(column, np.nan) for row in self._pending], dtype=float)
+                       for column in self.columns}
+            self._write_chunk(columns)
+            self.rows_written += len(self._pending)
+            self._pending = []
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        if self.closed:
+            return
+        self.flush()
+        if self.columns is not None:
+            self._close()
+        self.closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    # Format-specific hooks; _open is called once the columns are known
+    def _open(self):
+        raise NotImplementedError
+
+    def _write_chunk(self, columns):
+        raise NotImplementedError
+
+    def _close(self):
+        raise NotImplementedError
+
+
+class CsvSink(StreamingSink):
+    extension = "csv"
+
+    def _open(self):
+        self._file = open(self.path, "w", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(self.columns)
+
+    def _write_chunk(self, columns):
+        self._writer.writerows(zip(*(columns[column].tolist() for column in self.columns)))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def _close(self):
+        self._file.close()
+
+
+class ArrowSink(StreamingSink):
+    """Arrow IPC stream: every flushed chunk is a record batch readable after a crash."""
+
+    extension = "arrows"
+
+    def _open(self):
+        import pyarrow as pa
+        self._pa = pa
+        self._schema = pa.schema([(column, pa.float64()) for column in self.columns])
+        self._file = open(self.path, "wb")
+        self._writer = pa.ipc.new_stream(self._file, self._schema)
+
+    def _write_chunk(self, columns):
+        batch = self._pa.record_batch([columns[column] for column in self.columns], schema=self._schema)
+        self._writer.write_batch(batch)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def _close(self):
+        self._writer.close()
+        self._file.close()
+
+
+class Hdf5Sink(StreamingSink):
+    """HDF5 file with one resizable dataset per column, written in SWMR mode."""
+
+    extension = "h5"
+
+    def _open(self):
+        import h5py
+        self._file = h5py.File(self.path, "w", libver="latest")
+        for column in self.columns:
+            self._file.create_dataset(column, shape=(0,), maxshape=(None,), dtype="f8",
+                                      chunks=(max(self.chunk_size, 1),))
+        self._file.swmr_mode = True  # Readers can follow the file while it is written
+
+    def _write_chunk(self, columns):
+        for column in self.columns:
+            dataset = self._file[column]
+            start = dataset.shape[0]
+            dataset.resize((start + len(columns[column]),))
+            dataset[start:] = columns[column]
+        self._file.flush()
+
+    def _close(self):
+        self._file.close()
+
+
+SINKS = {"csv": CsvSink, "arrow": ArrowSink, "hdf5": Hdf5Sink}
+
+
+def open_sink(format_type, **kwargs):
+    """Create a streaming sink for 'csv', 'arrow' or 'hdf5'."""
+    try:
+        return SINKS[format_type](**kwargs)
+    except KeyError:
+        raise ValueError(f"Unsupported stream format: {format_type}")
+
+
+def read_run_file(path, chunk_size=100000):
+    """Yield a run file written by a sink as DataFrame chunks."""
+    import pandas as pd
+    if path.endswith(".csv"):
+        yield from pd.read_csv(path, chunksize=chunk_size)
+    elif path.endswith(".arrows"):
+        import pyarrow as pa
+        with open(path, "rb") as f:
+            for batch in pa.ipc.open_stream(f):
+                yield batch.to_pandas()
+    elif path.endswith(".h5"):
+        import h5py
+        with h5py.File(path, "r", swmr=True) as f:
+            columns = list(f.keys())
+            length = f[columns[0]].shape[0] if columns else 0
+            for start in range(0, length, chunk_size):
+                yield pd.DataFrame({column: f[column][start:start + chunk_size] for column in columns})
+    else:
+        raise ValueError(f"Unknown run file type: {path}")
+
+
+def export_csv_from_file(path, csv_path):
+    """Convert a run file to CSV chunk by chunk."""
+    for i, chunk in enumerate(read_run_file(path)):
+        chunk.to_csv(csv_path, mode="w" if i == 0 else "a", header=i == 0, index=False)
+    return csv_path
+
+
+def export_excel_from_file(path, excel_path):
+    """Convert a run file to .xlsx chunk by chunk using a write-only workbook."""
+    from openpyxl import Workbook
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Measurements")
+    rows = 0
+    for i, chunk in enumerate(read_run_file(path)):
+        if i == 0:
+            sheet.append(list(chunk.columns))
+        chunk = chunk.iloc[:EXCEL_MAX_ROWS - rows]
+        for row in chunk.itertuples(index=False):
+            sheet.append(list(row))
+        rows += len(chunk)
+        if rows >= EXCEL_MAX_ROWS:
+            log.warning(f"Excel export truncated to {EXCEL_MAX_ROWS} rows.")
+            break
+    workbook.save(excel_path)
+    return excel_path
+
+
+def export_image_from_file(path, image_path, x_key=None, y_keys=None, width=800):
+    """Plot a run file with min/max decimation, streaming it chunk by chunk."""
+    from kscplot1 import MinMaxDecimator
+    import matplotlib.pyplot as plt
+    decimators = None
+    offset = 0
+    for chunk in read_run_file(path):
+        if decimators is None:
+            x_key = x_key or ("Timestamp" if "Timestamp" in chunk.columns else None)
+            y_keys = y_keys or [column for column in chunk.columns if column != x_key]
+            decimators = {key: MinMaxDecimator(width) for key in y_keys}
+        x = chunk[x_key].to_numpy(dtype=float) if x_key else np.arange(offset, offset + len(chunk))
+        offset += len(chunk)
+        for key, decimator in decimators.items():
+            decimator.extend(x, chunk[key].to_numpy(dtype=float))
+
+    figure, ax = plt.subplots()
+    for key, decimator in (decimators or {}).items():
+        ax.plot(*decimator.points(), label=key)
+    ax.set_xlabel(x_key or "Index")
+    ax.legend()
+    figure.savefig(image_path)
+    plt.close(figure)
+    return image_path
+
+
+def export_run(data, format_type, directory=".", run_file=None):
+    """
+    Export one run as 'csv', 'excel' or 'image' under a unique name in directory and return the path.
+    When the run was streamed to run_file, the export is built from that file chunk by chunk.
+    """
+    run_file = run_file if run_file and os.path.exists(run_file) else None
+    os.makedirs(directory, exist_ok=True)
+    if format_type == "csv":
+        path = unique_run_path(directory, "csv", prefix="measurement_data")
+        if run_file and run_file.endswith(".csv"):
+            return shutil.copyfile(run_file, path)  # Already CSV: a plain file copy, no parsing
+        if run_file:
+            return export_csv_from_file(run_file, path)
+        data.to_csv(path, index=False)
+    elif format_type == "excel":
+        path = unique_run_path(directory, "xlsx", prefix="measurement_data")
+        if run_file:
+            return export_excel_from_file(run_file, path)
+        data.to_excel(path, index=False)
+    elif format_type == "image":
+        path = unique_run_path(directory, "png", prefix="graph_image")
+        if run_file:
+            return export_image_from_file(run_file, path)
+        import matplotlib.pyplot as plt
+        figure, ax = plt.subplots()
+        data.plot(ax=ax)
+        figure.savefig(path)
+        plt.close(figure)
+    else:
+        raise ValueError(f"Unsupported export format: {format_type}")
+    return path
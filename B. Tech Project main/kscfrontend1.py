@@ -1,346 +1,560 @@
-import streamlit as st
-import matplotlib.pyplot as plt
-
-st.title("Keithley 2450 Interface")
-st.sidebar.subheader("Export Options")
-st.sidebar.button("Export to Excel")
-st.sidebar.button("Export to CSV")
-st.sidebar.button("Export Graph Image")
-
-tab1, tab2, tab3 = st.tabs(["Source Measure", "Sheet", "Graph"])
-
-def high_precision_input(label, value=0.0, key=None, format_str="%.12f"):
-    input_value = st.text_input(label, value=f"{value:.12f}".rstrip('0').rstrip('.'), key=key)
-    try:
-        input_value = float(input_value)
-        return input_value
-    except ValueError:
-        st.error("Please enter a valid number")
-        return value
-
-data_placeholder = st.empty()
-graph_placeholder = st.empty()
-
-def integer_input(label, value=1, key=None):
-    return int(st.number_input(label, value=value, min_value=1, step=1, key=key))
-
-def plot_graph(data):
-    x_data = [d['Timestamp'] for d in data]
-    y_voltage = [d['Voltage (V)'] for d in data]
-    y_current = [d['Current (A)'] for d in data]
-
-    fig, ax1 = plt.subplots()
-    ax1.plot(x_data, y_voltage, label="Voltage (V)", color="blue")
-    ax1.set_xlabel("Time (s)")
-    ax1.set_ylabel("Voltage (V)", color="blue")
-
-    ax2 = ax1.twinx()
-    ax2.plot(x_data, y_current, label="Current (A)", color="red")
-    ax2.set_ylabel("Current (A)", color="red")
-
-    return fig
-
-#def real_time_data_update():
-    #while st.session_state.get('run_measurement', False):
-        #new_data = backend_fetch_data()  # Replace with actual backend function
-        #if new_data:
-            #st.session_state['data'].append(new_data)
-            #data_placeholder.table(st.session_state['data'])
-            #graph_placeholder.pyplot(plot_graph(st.session_state['data']))
-
-with tab1:
-    st.header("Source Measure Settings")
-
-    col1, col2 = st.columns(2)
-
-    
-with col1:
-    st.subheader("Source Settings")
-
-    source_mode = st.selectbox("Source Mode", [
-        "Voltage Bias", "Voltage Sweep", "Voltage List Sweep", 
-        "Current Bias", "Current Sweep", "Current List Sweep"
-    ])
-
-    # Voltage Bias mode
-    if source_mode == "Voltage Bias":
-        voltage_level = high_precision_input("Voltage Level (V)", value=0.0)
-        voltage_range = st.selectbox("Voltage Range", ["Auto", "Best Fixed", "200mV", "2.0V", "20.0V", "200.0V"])
-        current_limit = high_precision_input("Current Limit (A)", value=0.0)
-        num_measurements = integer_input("Number of Measurements", value=10)
-        delay_seconds = high_precision_input("Delay Seconds", value=0.1)
-
-    # Voltage Sweep mode with number of steps or step voltage
-    elif source_mode == "Voltage Sweep":
-        stepper = st.checkbox('Stepper')
-        dual_sweep = st.checkbox('Dual Sweep')
-        start_voltage = high_precision_input("Start Voltage (V)", value=0.0)
-        stop_voltage = high_precision_input("Stop Voltage (V)", value=5.0)
-
-        # User can input either step voltage or number of steps, the other is auto-calculated
-        st.subheader("Choose Step Voltage or Number of Steps")
-        step_type = st.radio("Input Type", ["Step Voltage", "Number of Steps"])
-
-        if step_type == "Step Voltage":
-            step_voltage = high_precision_input("Step Voltage (V)", value=0.05)
-            # Automatically calculate number of steps
-            num_steps = int((stop_voltage - start_voltage) / step_voltage) + 1
-            st.write(f"Number of Steps: {num_steps}")
-        else:
-            num_steps = integer_input("Number of Steps", value=100)
-            # Automatically calculate step voltage
-            step_voltage = (stop_voltage - start_voltage) / (num_steps - 1)
-            st.write(f"Step Voltage: {step_voltage:.9f}")
-
-        sweep_type = st.selectbox("Sweep Type", ["Linear", "Logarithmic"])
-        voltage_range = st.selectbox("Voltage Range", ["Auto", "Best Fixed", "200mV", "2.0V", "20.0V", "200.0V"])
-        current_limit = high_precision_input("Current Limit (A)", value=0.0)
-        delay_seconds = high_precision_input("Delay Seconds", value=0.1)
-
-    # Voltage List Sweep mode (only CSV import)
-    elif source_mode == "Voltage List Sweep":
-        stepper = st.checkbox('Stepper')
-        st.write("Please import a CSV file for the voltage list sweep:")
-        st.file_uploader("Import File", type=["csv"])
-        voltage_range = st.selectbox("Voltage Range", ["Auto", "Best Fixed", "200mV", "2.0V", "20.0V", "200.0V"])
-        current_limit = high_precision_input("Current Limit (A)", value=0.0)
-        delay_seconds = high_precision_input("Delay Seconds", value=0.1)
-
-    # Current Bias mode (same as Voltage Bias but for current)
-    elif source_mode == "Current Bias":
-        current_level = high_precision_input("Current Level (A)", value=0.0)
-        current_range = st.selectbox("Current Range", [
-            "Auto", "Best Fixed", "1nA", "10nA", "100nA", "1μA", "10μA", 
-            "100μA", "1mA", "10mA", "100mA", "1A", "1.55A"
-        ])
-        voltage_limit = high_precision_input("Voltage Limit (V)", value=0.0)
-        num_measurements = integer_input("Number of Measurements", value=10)
-        delay_seconds = high_precision_input("Delay Seconds", value=0.1)
-
-    # Current Sweep mode (same logic as Voltage Sweep but for current)
-    elif source_mode == "Current Sweep":
-        stepper = st.checkbox('Stepper')
-        dual_sweep = st.checkbox('Dual Sweep')
-        start_current = high_precision_input("Start Current (A)", value=0.0)
-        stop_current = high_precision_input("Stop Current (A)", value=5.0)
-        
-        st.subheader("Choose Step Current or Number of Steps")
-        step_type = st.radio("Input Type", ["Step Current", "Number of Steps"])
-
-        if step_type == "Step Current":
-            step_current = high_precision_input("Step Current (A)", value=0.05)
-            num_steps = int((stop_current - start_current) / step_current) + 1
-            st.write(f"Number of Steps: {num_steps}")
-        else:
-            num_steps = integer_input("Number of Steps", value=100)
-            step_current = (stop_current - start_current) / (num_steps - 1)
-            st.write(f"Step Current: {step_current:.9f}")
-
-        sweep_type = st.selectbox("Sweep Type", ["Linear", "Logarithmic"])
-        current_range = st.selectbox("Current Range", [
-            "Auto", "Best Fixed", "1nA", "10nA", "100nA", "1μA", "10μA", 
-            "100μA", "1mA", "10mA", "100mA", "1A", "1.55A"
-        ])
-        voltage_limit = high_precision_input("Voltage Limit (V)", value=0.0)
-        delay_seconds = high_precision_input("Delay Seconds", value=0.1)
-
-    # Current List Sweep mode (only CSV import)
-    elif source_mode == "Current List Sweep":
-        stepper = st.checkbox('Stepper')
-        st.write("Please import a CSV file for the current list sweep:")
-        st.file_uploader("Import File", type=["csv"])
-        current_range = st.selectbox("Current Range", [
-            "Auto", "Best Fixed", "1nA", "10nA", "100nA", "1μA", "10μA", 
-            "100μA", "1mA", "10mA", "100mA", "1A", "1.55A"
-        ])
-        voltage_limit = high_precision_input("Voltage Limit (V)", value=0.0)
-        delay_seconds = high_precision_input("Delay Seconds", value=0.1)
-
-    # Add "Run Measurement" Button
-    if st.button("Run Measurement"):
-        st.session_state['run_measurement'] = True
-        st.session_state['data'] = []  # Initialize data storage
-    #real_time_data_update()
-
-
-with col2:
-    st.subheader('Measurement Settings')
-
-    if source_mode in ['Voltage Bias', 'Voltage Sweep', 'Voltage List Sweep']:
-        # Measure Current section
-        st.text('Measure Current:')
-        enable_measure_current = st.checkbox('Enable Measure Current', value=True)
-        if enable_measure_current:
-            current_range = st.selectbox('Range:', ['Auto', 'Best Fixed', '1nA', '10nA', '100nA', '1μA', '10μA', '100μA', '1mA', '10mA', '100mA', '1.0A'])
-            if current_range == 'Auto':
-                min_auto_range = st.selectbox('Min Auto Range:', ['1nA', '10nA', '100nA', '1μA', '10μA', '100μA', '1mA', '10mA', '100mA'])
-
-        # Measure Voltage section
-        st.text('Measure Voltage:')
-        enable_measure_voltage = st.checkbox('Enable Measure Voltage', value=True)
-        if enable_measure_voltage:
-            voltage_type = st.selectbox('Type:', ['Programmed', 'Measured'])
-
-    elif source_mode in ['Current Bias', 'Current Sweep', 'Current List Sweep']:
-        # Measure Voltage section
-        st.text('Measure Voltage:')
-        enable_measure_voltage = st.checkbox('Enable Measure Voltage', value=True)
-        if enable_measure_voltage:
-            voltage_range = st.selectbox('Range:', ['Auto', 'Best Fixed', '20mV', '200mV', '2.0V', '20.0V', '200.0V'])
-            if voltage_range == 'Auto':
-                min_volt_range = st.selectbox('Min Auto Range:', ['20mV', '200mV', '2.0V', '20.0V'])
-
-        # Measure Current section
-        st.text('Measure Current:')
-        enable_measure_current = st.checkbox('Enable Measure Current', value=True)
-        if enable_measure_current:
-            current_type = st.selectbox('Type:', ['Programmed', 'Measured'])
-
-    # Common measurement settings for all modes
-    st.text('Measure Resistance:')
-    enable_measure_resistance = st.checkbox('Enable Measure Resistance', value=True)
-    if enable_measure_resistance:
-        resistance_range = st.selectbox('Range:', ['Auto', 'Other Options TBD'])
-        if resistance_range == 'Auto':
-            min_resistance_range = st.selectbox('Min Auto Range:', ['20Ω', 'Other Options TBD'])
-
-    enable_timestamp = st.checkbox('Enable Timestamp')
-    enable_measure_power = st.checkbox('Enable Measure Power')
-
-    # Measurement Speed Settings
-    st.subheader('Measurement Speed Settings')
-    nplc = high_precision_input('NPLC', 1.0)
-    auto_zero = st.selectbox('Auto Zero:', ['On', 'Off'])
-
-    # Advanced Configuration as a dropdown
-    with st.expander('Advanced Configuration'):
-        input_jacks = st.selectbox('Input Jacks:', ['Front', 'Rear'])
-        sensing_mode = st.selectbox('Sensing Mode:', ['2-Wire', '4-Wire'])
-        output_off_state = st.selectbox('Output OFF State:', ['Normal', 'High-Z', 'Zero', 'Guard'])
-        high_capacitance = st.selectbox('High Capacitance:', ['Off', 'On'])
-        offset_compensated_ohms = st.selectbox('Offset Compensated Ohms:', ['Off', 'On'])
-
-# Tab 2: Sheet (Placeholder)
-with tab2:
-    st.header("Real-Time Data (Sheet)")
-
-    # Initialize data sheet columns based on enabled measurement settings
-    data_columns = []
-
-    # Add columns if corresponding settings are enabled
-    if enable_measure_current:
-        data_columns.append("Current (A)")
-    if enable_measure_voltage:
-        data_columns.append("Voltage (V)")
-    if enable_measure_resistance:
-        data_columns.append("Resistance (Ω)")
-    if enable_timestamp:
-        data_columns.append("Timestamp (s)")
-    if enable_measure_power:
-        data_columns.append("Power (W)")
-
-    # Placeholder for the data values (replace with actual measurements as you gather data)
-    data_values = {column: [] for column in data_columns}
-
-    # Display the table with selected columns
-    if data_columns:
-        st.write("### Data Sheet")
-        st.table(data_values)  # Displays an empty table initially with chosen columns
-    else:
-        st.write("No measurements selected for display in the data sheet.")
-
-
-# Tab 3: Graph 
-with tab3:
-
-    with st.container():
-        col1, col2 = st.columns([1, 3])
-
-    # Left Column: Axis and Options Selection
-    with col1:
-        st.header("Graph Settings")
-
-        # X-Axis Selection
-        st.subheader("X-Axis")
-        x_axis_options = []
-        if enable_measure_voltage:
-            x_axis_options.append("Smu1.V")
-        if enable_measure_current:
-            x_axis_options.append("Smu1.I")
-        if enable_measure_resistance:
-            x_axis_options.append("Smu1.R")
-        if enable_timestamp:
-            x_axis_options.append("Smu1.Time")
-        if enable_measure_power:
-            x_axis_options.append("Smu1.Power")
-        selected_x_axis = st.selectbox("Select X-Axis Measurement", x_axis_options)
-
-        # Y1-Axis Selection
-        st.subheader("Y1-Axis")
-        selected_y1_axis = st.selectbox("Select Y1-Axis Measurement", x_axis_options)
-
-        # Y2-Axis Selection
-        st.subheader("Y2-Axis")
-        selected_y2_axis = st.selectbox("Select Y2-Axis Measurement", x_axis_options)
-
-        # Options for Scaling
-        st.subheader("Options")
-        scale_type = st.radio("Scale Type", ["Auto Scale", "Manual Scale"])
-
-        # Manual Scale Options
-        if scale_type == "Manual Scale":
-            def high_precision_manual_input(label, value=0.0, key=None, format_str="%.12f"):
-            # Input field for user entry
-                input_value = st.text_input(label, value=f"{value:.12f}".rstrip('0').rstrip('.'), key=key)
-                try:
-                    input_value = float(input_value)
-                    return input_value
-                except ValueError:
-                    st.error("Please enter a valid number")
-                    return value
-            
-            st.write("X-Axis Scale")
-            x_min = high_precision_manual_input("Min:", 0.0, key="x_min")
-            x_max = high_precision_manual_input("Max:", 0.0, key="x_max")
-
-            st.write("Y1-Axis Scale")
-            y1_min = high_precision_manual_input("Min:", 0.0, key="y1_min")
-            y1_max = high_precision_manual_input("Max:", 0.0, key="y1_max")
-
-            st.write("Y2-Axis Scale")
-            y2_min = high_precision_manual_input("Min:", 0.0, key="y2_min")
-            y2_max = high_precision_manual_input("Max:", 0.0, key="y2_max")
-
-    # Right Column: Graph Display
-    with col2:
-        st.header("Real-Time Graph")
-
-        # Sample data for plotting (replace with actual data)
-        import numpy as np
-        x_data = np.linspace(1e-12, 4e-3, 100)
-        y1_data = np.sin(x_data * 1e6)
-        y2_data = np.cos(x_data * 1e6)
-
-        # Plotting the graph
-        fig, ax1 = plt.subplots()
-
-        # Plotting selected data on Y1-Axis
-        ax1.plot(x_data, y1_data, label=selected_y1_axis, color="blue")
-        ax1.set_xlabel(selected_x_axis)
-        ax1.set_ylabel(selected_y1_axis, color="blue")
-
-        # If Y2-Axis is different, plot it as a second y-axis
-        if selected_y1_axis != selected_y2_axis:
-            ax2 = ax1.twinx()
-            ax2.plot(x_data, y2_data, label=selected_y2_axis, color="red")
-            ax2.set_ylabel(selected_y2_axis, color="red")
-
-        # Applying manual scaling if enabled
-        if scale_type == "Manual Scale":
-            ax1.set_xlim(float(x_min), float(x_max))
-            ax1.set_ylim(float(y1_min), float(y1_max))
-            if selected_y1_axis != selected_y2_axis:
-                ax2.set_ylim(float(y2_min), float(y2_max))
-
-        # Display the plot
-        st.pyplot(fig)
+import time
+import uuid
+import streamlit as st
+from kscsession1 import get_session_manager
+from kscworker1 import AcquisitionWorker
+from kscplot1 import LivePlot
+
+# Rows of live data kept in the session for the sheet
+MAX_SESSION_ROWS = 100000
+# Graph axis selections and the measurement columns they plot
+AXIS_COLUMNS = {
+    "Smu1.V": "Voltage (V)", "Smu1.I": "Current (A)", "Smu1.R": "Resistance (Ω)",
+    "Smu1.Time": "Timestamp", "Smu1.Power": "Power (W)",
+}
+
+st.title("Keithley 2450 Interface")
+st.sidebar.subheader("Export Options")
+st.sidebar.button("Export to Excel")
+st.sidebar.button("Export to CSV")
+st.sidebar.button("Export Graph Image")
+
+tab1, tab2, tab3 = st.tabs(["Source Measure", "Sheet", "Graph"])
+
+def high_precision_input(label, value=0.0, key=None, format_str="%.12f"):
+    input_value = st.text_input(label, value=f"{value:.12f}".rstrip('0').rstrip('.'), key=key)
+    try:
+        input_value = float(input_value)
+        return input_value
+    except ValueError:
+        st.error("Please enter a valid number")
+        return value
+
+data_placeholder = st.empty()
+graph_placeholder = st.empty()
+
+def integer_input(label, value=1, key=None):
+    return int(st.number_input(label, value=value, min_value=1, step=1, key=key))
+
+def plot_graph(data):
+    plot = LivePlot("Timestamp", "Voltage (V)", "Current (A)")
+    return plot.update(data)
+
+def get_live_plot(x_key, y1_key, y2_key):
+    """Reuse the session's live plot; rebuild it from the session data when the axes change."""
+    plot = st.session_state.get('live_plot')
+    if plot is None or not plot.matches(x_key, y1_key, y2_key):
+        if plot is not None:
+            plot.close()
+        plot = LivePlot(x_key, y1_key, y2_key)
+        plot.update(st.session_state.get('data', []))
+        st.session_state['live_plot'] = plot
+        st.session_state['plot_pending'] = []
+    return plot
+
+def get_owner_id():
+    """Identify this browser session to the session manager."""
+    return st.session_state.setdefault('owner_id', uuid.uuid4().hex)
+
+def get_worker():
+    """Return this session's acquisition worker, if one was started."""
+    session = st.session_state.get('instrument_session')
+    return session.worker if session is not None else None
+
+def start_live_acquisition(settings, run=False):
+    """
+    Start a background worker on the shared backend; it keeps acquiring across reruns.
+    Args:
+        settings: Settings from build_settings
+        run: Take one run_measurement (Run Measurement) instead of live bias readings
+    """
+    manager = get_session_manager()
+    session = manager.connect()  # Connects once per process, reused by every rerun and tab
+    manager.claim(session, get_owner_id())  # Raises if another tab drives this SMU
+    st.session_state['instrument_session'] = session
+    if session.busy():
+        return session.worker
+    worker = AcquisitionWorker(session.backend, settings['measurements'],
+                               interval=settings.get('delay_seconds', 0.1))
+    worker.start(settings, run=run)
+    session.worker = worker
+    st.session_state['data'] = []
+    return worker
+
+def stop_live_acquisition():
+    """Stop the worker and hand the instrument back to the session manager."""
+    session = st.session_state.get('instrument_session')
+    if session is not None:
+        if session.worker is not None:
+            session.worker.stop()
+        get_session_manager().release(session, get_owner_id())
+
+def real_time_data_update():
+    """Move the readings collected by the worker since the last rerun into the session."""
+    worker = get_worker()
+    if worker is not None:
+        if worker.is_alive():
+            get_session_manager().claim(st.session_state['instrument_session'], get_owner_id())  # Heartbeat
+        new_rows = worker.drain()
+        data = st.session_state.setdefault('data', [])
+        data.extend(new_rows)
+        del data[:-MAX_SESSION_ROWS]
+        st.session_state.setdefault('plot_pending', []).extend(new_rows)  # Only new rows go to the plot
+
+def show_diagnostics():
+    """Sidebar panel with the backend's SCPI latencies and per-phase run times."""
+    session = st.session_state.get('instrument_session')
+    with st.sidebar.expander("Diagnostics"):
+        if session is None:
+            st.write("Connect to an instrument to profile it.")
+            return
+        backend = session.backend
+        if st.checkbox("Enable Profiling", value=backend.profiler is not None):
+            prometheus_path = st.text_input("Prometheus Metrics File", value="ksc_metrics.prom")
+            backend.enable_profiling(prometheus_path=prometheus_path or None)
+            if prometheus_path and st.button("Write Metrics File"):
+                backend.profiler.write_prometheus(prometheus_path)
+        elif backend.profiler is not None:
+            backend.disable_profiling()
+
+        report = backend.profile_report()
+        if report:
+            st.write(f"Runs: {report['runs']}, VISA I/O: {report['io_seconds']:.3f} s")
+            st.dataframe([{"Phase": name, "Last Run (s)": report['last_run'].get(name, 0.0), "Total (s)": seconds}
+                          for name, seconds in report['phases'].items()])
+            st.dataframe([{"Command": command, "Count": stats['count'], "Mean (ms)": 1e3 * stats['mean'],
+                           "p50 (ms)": 1e3 * stats['p50'], "p99 (ms)": 1e3 * stats['p99'], "Max (ms)": 1e3 * stats['max']}
+                          for command, stats in report['commands'].items()])
+
+def show_run_history():
+    """Sidebar panel listing earlier runs from the backend's run database."""
+    session = st.session_state.get('instrument_session')
+    with st.sidebar.expander("Run History"):
+        if session is None:
+            st.write("Connect to an instrument to record runs.")
+            return
+        backend = session.backend
+        if st.checkbox("Record Runs", value=backend.run_database is not None):
+            database = backend.enable_run_database()
+        else:
+            backend.disable_run_database()
+            return
+        devices = database.devices()
+        device_filter = st.selectbox("Filter by Device", ["All"] + devices)
+        runs = database.find_runs(device=None if device_filter == "All" else device_filter, limit=200)
+        st.dataframe([{"Run": run['id'], "Started": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(run['started'])),
+                       "Device": run['device'], "Mode": run['source_mode'], "Points": run['points'],
+                       "Status": run['status'], "Settings": run['settings_hash'][:10]} for run in runs])
+        if runs:
+            run_id = st.selectbox("Load Run", [run['id'] for run in runs])
+            if st.button("Load into Sheet"):
+                st.session_state['data'] = database.load_run(run_id).to_dict('records')
+                plot = st.session_state.pop('live_plot', None)
+                if plot is not None:
+                    plot.close()  # Rebuilt from the loaded rows on the next draw
+
+def build_settings(source_mode, source_settings, measure_settings, measurements):
+    """
+    Combine the settings gathered by the source and measurement panels into a backend settings dictionary.
+    Args:
+        source_mode: Selected source mode
+        source_settings: Values of the widgets shown for the selected source mode
+        measure_settings: Values of the measurement panel widgets
+        measurements: List of enabled measurements (e.g., ['Voltage', 'Current'])
+    """
+    return dict(source_settings, **measure_settings, source_mode=source_mode, measurements=measurements)
+
+with tab1:
+    st.header("Source Measure Settings")
+
+    col1, col2 = st.columns(2)
+
+    
+with col1:
+    st.subheader("Source Settings")
+
+    source_mode = st.selectbox("Source Mode", [
+        "Voltage Bias", "Voltage Sweep", "Voltage List Sweep", 
+        "Current Bias", "Current Sweep", "Current List Sweep"
+    ])
+
+    # Voltage Bias mode
+    if source_mode == "Voltage Bias":
+        voltage_level = high_precision_input("Voltage Level (V)", value=0.0)
+        voltage_range = st.selectbox("Voltage Range", ["Auto", "Best Fixed", "200mV", "2.0V", "20.0V", "200.0V"])
+        current_limit = high_precision_input("Current Limit (A)", value=0.0)
+        num_measurements = integer_input("Number of Measurements", value=10)
+        delay_seconds = high_precision_input("Delay Seconds", value=0.1)
+        hardware_timed = st.checkbox('Hardware Timed', key=f'hardware_timed_{source_mode}')  # Instrument paces the readings
+        bias_statistics = st.checkbox('Statistics Only', key=f'bias_statistics_{source_mode}')  # Mean/std instead of every row
+        keep_every = 0
+        if bias_statistics:
+            keep_every = int(st.number_input("Keep Every Nth Reading (0 = none)", value=0, min_value=0, step=1,
+                                             key=f'keep_every_{source_mode}'))
+        source_settings = {"voltage_level": voltage_level, "voltage_range": voltage_range, "current_limit": current_limit,
+                           "num_measurements": num_measurements, "delay_seconds": delay_seconds,
+                           "hardware_timed": hardware_timed, "bias_statistics": bias_statistics, "keep_every": keep_every}
+
+    # Voltage Sweep mode with number of steps or step voltage
+    elif source_mode == "Voltage Sweep":
+        stepper = st.checkbox('Stepper')
+        dual_sweep = st.checkbox('Dual Sweep')
+        buffered = st.checkbox('Buffered Sweep')  # Run the sweep from the instrument's own buffer
+        start_voltage = high_precision_input("Start Voltage (V)", value=0.0)
+        stop_voltage = high_precision_input("Stop Voltage (V)", value=5.0)
+
+        # User can input either step voltage or number of steps, the other is auto-calculated
+        st.subheader("Choose Step Voltage or Number of Steps")
+        step_type = st.radio("Input Type", ["Step Voltage", "Number of Steps"])
+
+        if step_type == "Step Voltage":
+            step_voltage = high_precision_input("Step Voltage (V)", value=0.05)
+            # Automatically calculate number of steps
+            num_steps = int((stop_voltage - start_voltage) / step_voltage) + 1
+            st.write(f"Number of Steps: {num_steps}")
+        else:
+            num_steps = integer_input("Number of Steps", value=100)
+            # Automatically calculate step voltage
+            step_voltage = (stop_voltage - start_voltage) / (num_steps - 1)
+            st.write(f"Step Voltage: {step_voltage:.9f}")
+
+        sweep_type = st.selectbox("Sweep Type", ["Linear", "Logarithmic", "Adaptive"])
+        if sweep_type == "Adaptive":  # Steps above set the coarse grid; points are added where the curve bends
+            tolerance = high_precision_input("Tolerance (fraction of full scale)", value=0.02)
+            min_step = high_precision_input("Minimum Step", value=0.001)
+            max_step = high_precision_input("Maximum Step", value=0.5)
+        voltage_range = st.selectbox("Voltage Range", ["Auto", "Best Fixed", "200mV", "2.0V", "20.0V", "200.0V"])
+        current_limit = high_precision_input("Current Limit (A)", value=0.0)
+        delay_seconds = high_precision_input("Delay Seconds", value=0.1)
+        source_settings = {"start": start_voltage, "stop": stop_voltage, "steps": num_steps,
+                           "sweep_type": sweep_type, "stepper": stepper, "dual_sweep": dual_sweep,
+                           "voltage_range": voltage_range, "current_limit": current_limit,
+                           "delay": delay_seconds, "delay_seconds": delay_seconds, "buffered": buffered}
+        if step_type == "Step Voltage":
+            source_settings["step"] = step_voltage
+        if sweep_type == "Adaptive":
+            source_settings.update(tolerance=tolerance, min_step=min_step, max_step=max_step)
+
+    # Voltage List Sweep mode (only CSV import)
+    elif source_mode == "Voltage List Sweep":
+        stepper = st.checkbox('Stepper')
+        buffered = st.checkbox('Buffered Sweep')
+        st.write("Please import a CSV file for the voltage list sweep:")
+        list_file = st.file_uploader("Import File", type=["csv"])
+        voltage_range = st.selectbox("Voltage Range", ["Auto", "Best Fixed", "200mV", "2.0V", "20.0V", "200.0V"])
+        current_limit = high_precision_input("Current Limit (A)", value=0.0)
+        delay_seconds = high_precision_input("Delay Seconds", value=0.1)
+        source_settings = {"list_file": list_file, "voltage_range": voltage_range, "current_limit": current_limit,
+                           "delay_seconds": delay_seconds, "buffered": buffered}
+
+    # Current Bias mode (same as Voltage Bias but for current)
+    elif source_mode == "Current Bias":
+        current_level = high_precision_input("Current Level (A)", value=0.0)
+        current_range = st.selectbox("Current Range", [
+            "Auto", "Best Fixed", "1nA", "10nA", "100nA", "1μA", "10μA", 
+            "100μA", "1mA", "10mA", "100mA", "1A", "1.55A"
+        ])
+        voltage_limit = high_precision_input("Voltage Limit (V)", value=0.0)
+        num_measurements = integer_input("Number of Measurements", value=10)
+        delay_seconds = high_precision_input("Delay Seconds", value=0.1)
+        hardware_timed = st.checkbox('Hardware Timed', key=f'hardware_timed_{source_mode}')  # Instrument paces the readings
+        bias_statistics = st.checkbox('Statistics Only', key=f'bias_statistics_{source_mode}')  # Mean/std instead of every row
+        keep_every = 0
+        if bias_statistics:
+            keep_every = int(st.number_input("Keep Every Nth Reading (0 = none)", value=0, min_value=0, step=1,
+                                             key=f'keep_every_{source_mode}'))
+        source_settings = {"current_level": current_level, "current_range": current_range, "voltage_limit": voltage_limit,
+                           "num_measurements": num_measurements, "delay_seconds": delay_seconds,
+                           "hardware_timed": hardware_timed, "bias_statistics": bias_statistics, "keep_every": keep_every}
+
+    # Current Sweep mode (same logic as Voltage Sweep but for current)
+    elif source_mode == "Current Sweep":
+        stepper = st.checkbox('Stepper')
+        dual_sweep = st.checkbox('Dual Sweep')
+        buffered = st.checkbox('Buffered Sweep')  # Run the sweep from the instrument's own buffer
+        start_current = high_precision_input("Start Current (A)", value=0.0)
+        stop_current = high_precision_input("Stop Current (A)", value=5.0)
+        
+        st.subheader("Choose Step Current or Number of Steps")
+        step_type = st.radio("Input Type", ["Step Current", "Number of Steps"])
+
+        if step_type == "Step Current":
+            step_current = high_precision_input("Step Current (A)", value=0.05)
+            num_steps = int((stop_current - start_current) / step_current) + 1
+            st.write(f"Number of Steps: {num_steps}")
+        else:
+            num_steps = integer_input("Number of Steps", value=100)
+            step_current = (stop_current - start_current) / (num_steps - 1)
+            st.write(f"Step Current: {step_current:.9f}")
+
+        sweep_type = st.selectbox("Sweep Type", ["Linear", "Logarithmic", "Adaptive"])
+        if sweep_type == "Adaptive":  # Steps above set the coarse grid; points are added where the curve bends
+            tolerance = high_precision_input("Tolerance (fraction of full scale)", value=0.02)
+            min_step = high_precision_input("Minimum Step", value=0.001)
+            max_step = high_precision_input("Maximum Step", value=0.5)
+        current_range = st.selectbox("Current Range", [
+            "Auto", "Best Fixed", "1nA", "10nA", "100nA", "1μA", "10μA", 
+            "100μA", "1mA", "10mA", "100mA", "1A", "1.55A"
+        ])
+        voltage_limit = high_precision_input("Voltage Limit (V)", value=0.0)
+        delay_seconds = high_precision_input("Delay Seconds", value=0.1)
+        source_settings = {"start": start_current, "stop": stop_current, "steps": num_steps,
+                           "sweep_type": sweep_type, "stepper": stepper, "dual_sweep": dual_sweep,
+                           "current_range": current_range, "voltage_limit": voltage_limit,
+                           "delay": delay_seconds, "delay_seconds": delay_seconds, "buffered": buffered}
+        if step_type == "Step Current":
+            source_settings["step"] = step_current
+        if sweep_type == "Adaptive":
+            source_settings.update(tolerance=tolerance, min_step=min_step, max_step=max_step)
+
+    # Current List Sweep mode (only CSV import)
+    elif source_mode == "Current List Sweep":
+        stepper = st.checkbox('Stepper')
+        buffered = st.checkbox('Buffered Sweep')
+        st.write("Please import a CSV file for the current list sweep:")
+        list_file = st.file_uploader("Import File", type=["csv"])
+        current_range = st.selectbox("Current Range", [
+            "Auto", "Best Fixed", "1nA", "10nA", "100nA", "1μA", "10μA", 
+            "100μA", "1mA", "10mA", "100mA", "1A", "1.55A"
+        ])
+        voltage_limit = high_precision_input("Voltage Limit (V)", value=0.0)
+        delay_seconds = high_precision_input("Delay Seconds", value=0.1)
+        source_settings = {"list_file": list_file, "current_range": current_range, "voltage_limit": voltage_limit,
+                           "delay_seconds": delay_seconds, "buffered": buffered}
+
+    device = st.text_input("Device", value="")  # Device under test, recorded with each run
+    source_settings["device"] = device
+
+    # Add "Run Measurement" Button; the run starts once the measurement settings below are read
+    run_clicked = st.button("Run Measurement")
+
+
+with col2:
+    st.subheader('Measurement Settings')
+
+    measure_settings = {}
+    if source_mode in ['Voltage Bias', 'Voltage Sweep', 'Voltage List Sweep']:
+        # Measure Current section
+        st.text('Measure Current:')
+        enable_measure_current = st.checkbox('Enable Measure Current', value=True)
+        if enable_measure_current:
+            current_range = st.selectbox('Range:', ['Auto', 'Predictive', 'Best Fixed', '1nA', '10nA', '100nA', '1μA', '10μA', '100μA', '1mA', '10mA', '100mA', '1.0A'])
+            measure_settings["current_range"] = current_range
+            if current_range == 'Auto':
+                min_auto_range = st.selectbox('Min Auto Range:', ['1nA', '10nA', '100nA', '1μA', '10μA', '100μA', '1mA', '10mA', '100mA'])
+
+        # Measure Voltage section
+        st.text('Measure Voltage:')
+        enable_measure_voltage = st.checkbox('Enable Measure Voltage', value=True)
+        if enable_measure_voltage:
+            voltage_type = st.selectbox('Type:', ['Programmed', 'Measured'])
+            measure_settings["voltage_type"] = voltage_type
+
+    elif source_mode in ['Current Bias', 'Current Sweep', 'Current List Sweep']:
+        # Measure Voltage section
+        st.text('Measure Voltage:')
+        enable_measure_voltage = st.checkbox('Enable Measure Voltage', value=True)
+        if enable_measure_voltage:
+            voltage_range = st.selectbox('Range:', ['Auto', 'Predictive', 'Best Fixed', '20mV', '200mV', '2.0V', '20.0V', '200.0V'])
+            measure_settings["voltage_range"] = voltage_range
+            if voltage_range == 'Auto':
+                min_volt_range = st.selectbox('Min Auto Range:', ['20mV', '200mV', '2.0V', '20.0V'])
+
+        # Measure Current section
+        st.text('Measure Current:')
+        enable_measure_current = st.checkbox('Enable Measure Current', value=True)
+        if enable_measure_current:
+            current_type = st.selectbox('Type:', ['Programmed', 'Measured'])
+            measure_settings["current_type"] = current_type
+
+    # Common measurement settings for all modes
+    st.text('Measure Resistance:')
+    enable_measure_resistance = st.checkbox('Enable Measure Resistance', value=True)
+    if enable_measure_resistance:
+        resistance_range = st.selectbox('Range:', ['Auto', 'Other Options TBD'])
+        if resistance_range == 'Auto':
+            min_resistance_range = st.selectbox('Min Auto Range:', ['20Ω', 'Other Options TBD'])
+
+    enable_timestamp = st.checkbox('Enable Timestamp')
+    enable_measure_power = st.checkbox('Enable Measure Power')
+    enable_measure_conductance = st.checkbox('Enable Measure Conductance')
+
+    # Measurement Speed Settings
+    st.subheader('Measurement Speed Settings')
+    nplc = high_precision_input('NPLC', 1.0)
+    auto_zero = st.selectbox('Auto Zero:', ['On', 'Off'])
+    filter_type = st.selectbox('Averaging Filter:', ['Off', 'Repeat', 'Moving'])
+    measure_settings.update(nplc=nplc, filter_type=filter_type)
+    if filter_type != 'Off':
+        filter_count = integer_input('Filter Count', value=10)
+        measure_settings["filter_count"] = filter_count
+
+    # Advanced Configuration as a dropdown
+    with st.expander('Advanced Configuration'):
+        input_jacks = st.selectbox('Input Jacks:', ['Front', 'Rear'])
+        sensing_mode = st.selectbox('Sensing Mode:', ['2-Wire', '4-Wire'])
+        output_off_state = st.selectbox('Output OFF State:', ['Normal', 'High-Z', 'Zero', 'Guard'])
+        high_capacitance = st.selectbox('High Capacitance:', ['Off', 'On'])
+        offset_compensated_ohms = st.selectbox('Offset Compensated Ohms:', ['Off', 'On'])
+        measure_settings.update(input_jacks=input_jacks, sensing_mode=sensing_mode, output_off_state=output_off_state,
+                                high_capacitance=high_capacitance, offset_compensated_ohms=offset_compensated_ohms)
+
+    measurements = [name for name, enabled in [
+        ("Voltage", enable_measure_voltage), ("Current", enable_measure_current),
+        ("Resistance", enable_measure_resistance), ("Timestamp", enable_timestamp),
+        ("Power", enable_measure_power), ("Conductance", enable_measure_conductance)] if enabled]
+
+# Tab 2: Sheet (Placeholder)
+with tab2:
+    st.header("Real-Time Data (Sheet)")
+
+    # Live acquisition and Run Measurement run in a background worker; each rerun only drains new rows
+    settings = build_settings(source_mode, source_settings, measure_settings, measurements)
+    if run_clicked:
+        try:
+            start_live_acquisition(settings, run=True)
+        except Exception as e:
+            st.error(f"Could not start the measurement: {e}")
+    live_col1, live_col2, live_col3 = st.columns(3)
+    if source_mode in ("Voltage Bias", "Current Bias") and live_col1.button("Start Live"):
+        try:
+            start_live_acquisition(settings)
+        except Exception as e:
+            st.error(f"Could not start acquisition: {e}")
+    worker = get_worker()
+    running = worker is not None and worker.is_alive()
+    if live_col2.button("Resume" if running and worker.paused else "Pause",
+                        disabled=not running or worker.single_run):  # Single runs (sweeps, statistics) cannot pause
+        worker.resume() if worker.paused else worker.pause()
+    if live_col3.button("Stop", disabled=not running):
+        stop_live_acquisition()
+    if worker is not None and worker.error is not None:
+        st.error(f"Acquisition stopped: {worker.error}")
+    elif worker is not None and worker.single_run and not running and worker.backend.statistics:
+        st.write("### Statistics")
+        st.dataframe([dict(summary, Measurement=column) for column, summary in worker.backend.statistics.items()])
+    real_time_data_update()
+
+    # Initialize data sheet columns based on enabled measurement settings
+    data_columns = []
+
+    # Add columns if corresponding settings are enabled
+    if enable_measure_current:
+        data_columns.append("Current (A)")
+    if enable_measure_voltage:
+        data_columns.append("Voltage (V)")
+    if enable_measure_resistance:
+        data_columns.append("Resistance (Ω)")
+    if enable_timestamp:
+        data_columns.append("Timestamp (s)")
+    if enable_measure_power:
+        data_columns.append("Power (W)")
+    if enable_measure_conductance:
+        data_columns.append("Conductance (S)")
+
+    # Placeholder for the data values (replace with actual measurements as you gather data)
+    data_values = {column: [] for column in data_columns}
+
+    # Display the table with selected columns
+    if st.session_state.get('data'):
+        st.write("### Data Sheet")
+        st.dataframe(st.session_state['data'][-1000:])  # Most recent rows
+    elif data_columns:
+        st.write("### Data Sheet")
+        st.table(data_values)  # Displays an empty table initially with chosen columns
+    else:
+        st.write("No measurements selected for display in the data sheet.")
+
+
+# Tab 3: Graph 
+with tab3:
+
+    with st.container():
+        col1, col2 = st.columns([1, 3])
+
+    # Left Column: Axis and Options Selection
+    with col1:
+        st.header("Graph Settings")
+
+        # X-Axis Selection
+        st.subheader("X-Axis")
+        x_axis_options = []
+        if enable_measure_voltage:
+            x_axis_options.append("Smu1.V")
+        if enable_measure_current:
+            x_axis_options.append("Smu1.I")
+        if enable_measure_resistance:
+            x_axis_options.append("Smu1.R")
+        if enable_timestamp:
+            x_axis_options.append("Smu1.Time")
+        if enable_measure_power:
+            x_axis_options.append("Smu1.Power")
+        selected_x_axis = st.selectbox("Select X-Axis Measurement", x_axis_options)
+
+        # Y1-Axis Selection
+        st.subheader("Y1-Axis")
+        selected_y1_axis = st.selectbox("Select Y1-Axis Measurement", x_axis_options)
+
+        # Y2-Axis Selection
+        st.subheader("Y2-Axis")
+        selected_y2_axis = st.selectbox("Select Y2-Axis Measurement", x_axis_options)
+
+        # Options for Scaling
+        st.subheader("Options")
+        scale_type = st.radio("Scale Type", ["Auto Scale", "Manual Scale"])
+
+        # Manual Scale Options
+        if scale_type == "Manual Scale":
+            def high_precision_manual_input(label, value=0.0, key=None, format_str="%.12f"):
+            # Input field for user entry
+                input_value = st.text_input(label, value=f"{value:.12f}".rstrip('0').rstrip('.'), key=key)
+                try:
+                    input_value = float(input_value)
+                    return input_value
+                except ValueError:
+                    st.error("Please enter a valid number")
+                    return value
+            
+            st.write("X-Axis Scale")
+            x_min = high_precision_manual_input("Min:", 0.0, key="x_min")
+            x_max = high_precision_manual_input("Max:", 0.0, key="x_max")
+
+            st.write("Y1-Axis Scale")
+            y1_min = high_precision_manual_input("Min:", 0.0, key="y1_min")
+            y1_max = high_precision_manual_input("Max:", 0.0, key="y1_max")
+
+            st.write("Y2-Axis Scale")
+            y2_min = high_precision_manual_input("Min:", 0.0, key="y2_min")
+            y2_max = high_precision_manual_input("Max:", 0.0, key="y2_max")
+
+    # Right Column: Graph Display
+    with col2:
+        st.header("Real-Time Graph")
+
+        if selected_x_axis and selected_y1_axis:
+            # The figure persists across reruns and only receives the rows drained since the last one
+            plot = get_live_plot(AXIS_COLUMNS[selected_x_axis], AXIS_COLUMNS[selected_y1_axis],
+                                 AXIS_COLUMNS[selected_y2_axis])
+            plot.update(st.session_state.get('plot_pending', []))
+            st.session_state['plot_pending'] = []
+
+            # Applying manual scaling if enabled
+            if scale_type == "Manual Scale":
+                plot.set_scale((float(x_min), float(x_max)), (float(y1_min), float(y1_max)),
+                               (float(y2_min), float(y2_max)))
+            else:
+                plot.set_scale()
+
+            # Display the plot
+            st.pyplot(plot.figure)
+        else:
+            st.write("Enable at least one measurement to plot.")
+
+show_diagnostics()
+show_run_history()
+
+# Rerun periodically while the worker acquires; the worker keeps the instrument timing
+live_worker = get_worker()
+if live_worker is not None and live_worker.is_alive() and not live_worker.paused:
+    time.sleep(0.5)
+    st.rerun()
@@ -0,0 +1,271 @@
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from kscexport1 import export_run
+from kscbackend1 import RunAborted
+
+log = logging.getLogger(__name__)
+
+# Job states, in the order a job normally passes through them
+JOB_STATES = ["pending", "running", "processing", "completed"]
+# States a job does not leave
+FINISHED_STATES = {"completed", "failed", "cancelled"}
+
+
+class MeasurementJob:
+    """One recipe in a JobQueue: run_measurement settings plus what to do with the result."""
+
+    def __init__(self, settings, name=None, export=None, post_process=None):
+        """
+        Args:
+            settings: run_measurement settings
+            name: Label for progress reports; the source mode when None
+            export: Export formats ('csv', 'excel', 'image') written after the run
+            post_process: Optional callable(job) run after the export, off the acquisition thread
+        """
+        self.settings = settings
+        self.name = name or settings.get("source_mode", "job")
+        self.export = [export] if isinstance(export, str) else list(export or [])
+        self.post_process = post_process
+        self.status = "pending"
+        self.error = None
+        self.data = None
+        self.run_file = None  # File the run was streamed to, if any
+        self.exports = {}  # Format -> exported path
+        self.run_id = None  # Run database id
+        self.summary = {}
+        self.started = None  # Acquisition start and end in seconds since the epoch
+        self.finished = None
+        self.timing = {}  # Seconds spent queued, acquiring, post-processing and in total
+        self._submitted = time.monotonic()
+        self._cancel = threading.Event()
+        self._done = threading.Event()
+
+    @property
+    def done(self):
+        return self.status in FINISHED_STATES
+
+    def wait(self, timeout=None):
+        """Block until the job is finished; returns True if it did within timeout."""
+        return self._done.wait(timeout)
+
+    def __repr__(self):
+        return f"MeasurementJob({self.name!r}, {self.status})"
+
+
+class JobQueue:
+    """
+    Runs a batch of measurement recipes in order on one KeithleyBackend.
+
+    Acquisition happens on one background thread; the source stays on between jobs and
+    the backend only writes settings that differ from the previous job. Each finished
+    job's post-processing (export, run database record, user callback) runs on a second
+    thread while the next job is already acquiring.
+    """
+
+    def __init__(self, backend, output_directory=".", on_progress=None):
+        """
+        Args:
+            backend: KeithleyBackend to drive; nothing else should use it while the queue runs
+            output_directory: Directory for job exports
+            on_progress: Optional callable(job) called whenever a job changes state
+        """
+        self.backend = backend
+        self.output_directory = output_directory
+        self.on_progress = on_progress
+        self.jobs = []
+        self._lock = threading.RLock()  # Re-entrant so progress callbacks may call progress()
+        self._wake = threading.Condition(self._lock)
+        self._stop = False
+        self._source_on = False  # Output left on by the last job for the next one
+        self._thread = None
+        self._post = None  # Single post-processing thread, so exports finish in job order
+
+    def submit(self, settings, name=None, export=None, post_process=None):
+        """Queue one recipe and return its MeasurementJob (see MeasurementJob for the arguments)."""
+        job = MeasurementJob(settings, name, export, post_process)
+        with self._wake:
+            self.jobs.append(job)
+            self._wake.notify()
+        return job
+
+    def submit_batch(self, recipes, export=None):
+        """Queue several settings dictionaries in order and return their jobs."""
+        return [self.submit(settings, export=export) for settings in recipes]
+
+    def start(self):
+        """Start running queued jobs in the background (jobs submitted later run too)."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop = False
+        if self._post is None:
+            self._post = ThreadPoolExecutor(max_workers=1, thread_name_prefix="keithley-post")
+        self._thread = threading.Thread(target=self._run, name="keithley-jobs", daemon=True)
+        self._thread.start()
+
+    def cancel(self, job=None):
+        """
+        Cancel one job, or every unfinished job when job is None.
+        A pending job is skipped; a running job is aborted at its next point.
+        """
+        with self._lock:
+            jobs = [job] if job is not None else [job for job in self.jobs if not job.done]
+            running = False
+            for job in jobs:
+                job._cancel.set()
+                if job.status == "pending":
+                    self._finish(job, "cancelled")
+                running = running or job.status == "running"
+        if running:
+            self.backend.abort()
+
+    def stop(self, timeout=None):
+        """Cancel everything, switch the source off and wait for the threads to end."""
+        self.cancel()
+        with self._wake:
+            self._stop = True
+            self._wake.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        if self._post is not None:
+            self._post.shutdown(wait=True)
+            self._post = None
+
+    def wait(self, timeout=None):
+        """Block until every submitted job is finished; returns True if they all did."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for job in list(self.jobs):
+            remaining = None if deadline is None else max(deadline - time.monotonic(), 0.0)
+            if not job.wait(remaining):
+                return False
+        return True
+
+    def progress(self):
+        """Job counts per state, the name of the job acquiring now and the fraction of jobs finished."""
+        with self._lock:
+            counts = {state: 0 for state in JOB_STATES + ["failed", "cancelled"]}
+            current = None
+            for job in self.jobs:
+                counts[job.status] += 1
+                if job.status == "running":
+                    current = job.name
+            total = len(self.jobs)
+            finished = sum(counts[state] for state in FINISHED_STATES)
+        return {"total": total, "finished": finished, "current": current,
+                "fraction": finished / total if total else 1.0, **counts}
+
+    def _next_job(self):
+        while True:
+            with self._wake:
+                if self._stop:
+                    return None
+                for job in self.jobs:
+                    if job.status == "pending":
+                        job.status = "running"
+                        return job
+                if not self._source_on:
+                    self._wake.wait()
+                    continue
+            self._disable_source()  # Nothing left to run: do not wait with the output on
+
+    def _pending(self):
+        with self._lock:
+            return any(job.status == "pending" for job in self.jobs)
+
+    def _disable_source(self):
+        try:
+            self.backend.instrument.disable_source()
+        except Exception as e:
+            log.warning(f"Could not disable source after the job queue: {e}")
+        self._source_on = False
+
+    def _run(self):
+        backend = self.backend
+        try:
+            backend.instrument_id  # Query *IDN? here, never from the post-processing thread
+        except Exception as e:
+            log.warning(f"Could not identify the instrument: {e}")
+        try:
+            while True:
+                job = self._next_job()
+                if job is None:
+                    break
+                self._notify(job)
+                self._acquire(job)
+        finally:
+            self._disable_source()
+
+    def _acquire(self, job):
+        backend = self.backend
+        started = time.monotonic()
+        job.timing["queued"] = started - job._submitted
+        job.started = time.time()
+        try:
+            if job._cancel.is_set():
+                raise RunAborted("Run aborted.")
+            # Keep the source on when another job follows; the backend skips settings that did not change
+            keep_output = self._pending()
+            self._source_on = keep_output
+            backend.run_measurement(job.settings, keep_output=keep_output, record=False)
+        except RunAborted:
+            job.timing["acquire"] = time.monotonic() - started
+            self._finish(job, "cancelled")
+            return
+        except Exception as e:
+            job.timing["acquire"] = time.monotonic() - started
+            job.error = e
+            log.error(f"Job {job.name} failed: {e}")
+            self._finish(job, "failed")
+            return
+        job.timing["acquire"] = time.monotonic() - started
+        job.finished = time.time()
+        if job._cancel.is_set():  # Cancelled too late to interrupt the run
+            self._finish(job, "cancelled")
+            return
+
+        # Everything the next run overwrites is captured here, on the acquisition thread
+        job.data = backend.data
+        job.run_file = backend.last_run_path if job.settings.get("stream_format") else None
+        job.summary = {"timing": backend.timing_stats, "range_changes": backend.range_changes,
+                       "statistics": backend.statistics}
+        if backend.profiler is not None:
+            job.summary["phases"] = dict(backend.profiler.last_run)
+        job.status = "processing"
+        self._notify(job)
+        self._post.submit(self._post_process, job)
+
+    def _post_process(self, job):
+        started = time.monotonic()
+        try:
+            directory = job.settings.get("output_directory", self.output_directory)
+            for format_type in job.export:
+                job.exports[format_type] = export_run(job.data, format_type, directory, job.run_file)
+            database = self.backend.run_database
+            if database is not None:
+                job.run_id = database.record_run(
+                    job.settings, job.data, self.backend.instrument_id, job.started, job.finished,
+                    stream_file=job.run_file, summary=job.summary,
+                )
+            if job.post_process is not None:
+                job.post_process(job)
+            status = "completed"
+        except Exception as e:
+            log.exception(f"Post-processing of job {job.name} failed: {e}")
+            job.error = e
+            status = "failed"
+        job.timing["post_process"] = time.monotonic() - started
+        self._finish(job, status)
+
+    def _finish(self, job, status):
+        job.status = status
+        job.timing["total"] = time.monotonic() - job._submitted
+        job._done.set()
+        self._notify(job)
+
+    def _notify(self, job):
+        if self.on_progress is not None:
+            try:
+                self.on_progress(job)
+            except Exception as e:
+                log.warning(f"Progress callback failed: {e}")
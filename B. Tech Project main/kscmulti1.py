@@ -0,0 +1,236 @@
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_EXCEPTION
+from kscbackend1 import KeithleyBackend, RunAborted, discover_keithleys, parse_range
+from kscplan1 import plan_from_params
+
+log = logging.getLogger(__name__)
+
+# Column of the merged table holding seconds since the first reading of any instrument
+TIME_COLUMN = "Time (s)"
+# Seconds the instruments wait for each other before a synchronised start is abandoned
+START_TIMEOUT = 60.0
+
+
+def merge_readings(frames, origin=None, tolerance=None):
+    """
+    Align the readings of several instruments on one timebase.
+
+    Every instrument's Timestamp is host time (seconds since the epoch), so readings from
+    different units are directly comparable. The frame with the most rows sets the time
+    grid; each other instrument contributes its reading nearest in time to every row.
+    Args:
+        frames: {name: DataFrame with a Timestamp column}
+        origin: Time that becomes 0 s; the earliest reading when None
+        tolerance: Largest time difference in seconds for a reading to be matched (NaN beyond)
+    Returns:
+        DataFrame with TIME_COLUMN followed by '<name>: <column>' for every instrument
+    """
+    import pandas as pd
+    frames = {name: frame for name, frame in frames.items() if frame is not None and len(frame)}
+    if not frames:
+        return pd.DataFrame(columns=[TIME_COLUMN])
+    for name, frame in frames.items():
+        if "Timestamp" not in frame:
+            raise ValueError(f"Readings of {name} have no Timestamp column; enable the Timestamp measurement.")
+    if origin is None:
+        origin = min(frame["Timestamp"].min() for frame in frames.values())
+
+    aligned = []
+    for name, frame in frames.items():
+        frame = frame.sort_values("Timestamp").reset_index(drop=True)
+        key = frame["Timestamp"] - origin
+        frame = frame.rename(columns={column: f"{name}: {column}" for column in frame.columns})
+        frame.insert(0, TIME_COLUMN, key)
+        aligned.append(frame)
+    aligned.sort(key=len, reverse=True)
+    merged = aligned[0]
+    for frame in aligned[1:]:
+        merged = pd.merge_asof(merged, frame, on=TIME_COLUMN, direction="nearest", tolerance=tolerance)
+    return merged
+
+
+class MultiKeithleyBackend:
+    """
+    Several Keithley 2450s driven together, e.g. the gate and drain of a transistor.
+
+    Each instrument keeps its own KeithleyBackend; runs on different instruments happen
+    concurrently on a thread pool (one thread per instrument, VISA I/O releases the GIL),
+    so a combined run takes about as long as its slowest instrument. Instruments are
+    configured in parallel with their outputs off, then switch their outputs on and start
+    acquiring together at a barrier.
+    """
+
+    def __init__(self, backends):
+        """
+        Args:
+            backends: {name: KeithleyBackend}, e.g. {"gate": ..., "drain": ...}
+        """
+        if not backends:
+            raise ValueError("At least one instrument is needed.")
+        self.backends = dict(backends)
+        self.data = None  # Merged table of the last run
+        self.timing = {}  # Seconds each instrument spent in the last parallel run, plus the total
+        self._pool = ThreadPoolExecutor(max_workers=len(self.backends), thread_name_prefix="keithley-smu")
+
+    @classmethod
+    def discover(cls, names=None, timeout=2.0, use_cache=False):
+        """
+        Connect to every Keithley 2450 found by discover_keithleys.
+        Args:
+            names: Optional names given to the instruments in resource order (e.g. ["gate", "drain"]);
+                   serial numbers are used otherwise
+            timeout: Per-resource discovery timeout in seconds
+            use_cache: Trust the instrument registry when its resources still answer; off by default
+                       because a unit attached since the last scan would be missed
+        """
+        found = discover_keithleys(timeout, use_cache)
+        if not found:
+            raise ConnectionError("No Keithley 2450 detected.")
+        if names is not None and len(names) > len(found):
+            raise ConnectionError(f"{len(names)} instruments named but only {len(found)} detected.")
+        labels = list(names) if names is not None else []
+        for i, (_, idn) in enumerate(found[len(labels):], start=len(labels)):
+            parts = [part.strip() for part in idn.split(",")]
+            labels.append(parts[2] if len(parts) > 2 and parts[2] else f"smu{i + 1}")
+        found = found[:len(labels)]
+        with ThreadPoolExecutor(max_workers=len(found)) as pool:  # Opening sessions is I/O bound too
+            backends = list(pool.map(lambda entry: KeithleyBackend(resource_name=entry[0]), found))
+        log.info("Connected " + ", ".join(f"{label} ({resource})" for label, (resource, _) in zip(labels, found)))
+        return cls(dict(zip(labels, backends)))
+
+    def __getitem__(self, name):
+        return self.backends[name]
+
+    @property
+    def names(self):
+        return list(self.backends)
+
+    def run_parallel(self, settings, keep_output=False, record=True, tolerance=None, origin=None):
+        """
+        Run one measurement on each named instrument at the same time and merge the readings.
+        Args:
+            settings: {name: run_measurement settings}; instruments not named stay idle
+            keep_output: Leave the sources on after a successful run
+            record: Record each instrument's run in its run database, when enabled
+            tolerance: See merge_readings
+            origin: Host time that becomes 0 s; the first reading of the run when None (see merge_readings)
+        Returns:
+            The merged DataFrame (also kept in self.data)
+        """
+        unknown = set(settings) - set(self.backends)
+        if unknown:
+            raise ValueError(f"Unknown instruments: {', '.join(sorted(unknown))}")
+        barrier = threading.Barrier(len(settings), timeout=START_TIMEOUT)
+        failures = []  # (name, error) in the order the instruments failed
+        started = time.perf_counter()
+
+        def run(name):
+            t0 = time.perf_counter()
+            try:
+                self.backends[name].run_measurement(settings[name], keep_output=keep_output, record=record,
+                                                    ready=barrier.wait)
+            except BaseException as e:
+                failures.append((name, e))
+                barrier.abort()  # Release instruments still waiting to start
+                raise
+            return time.perf_counter() - t0
+
+        futures = {self._pool.submit(run, name): name for name in settings}
+        wait(futures, return_when=FIRST_EXCEPTION)
+        if failures:
+            self.abort()  # One instrument failed: stop the others instead of finishing their runs
+        wait(futures)
+
+        self.timing = {name: future.result() for future, name in futures.items() if future.exception() is None}
+        self.timing["total"] = time.perf_counter() - started
+        if failures:
+            self.data = None
+            name, error = failures[0]  # The instrument that failed first, not the ones stopped because of it
+            if isinstance(error, RunAborted):
+                raise error
+            raise RuntimeError(f"Measurement on {name} failed: {error}")
+
+        self.data = merge_readings({name: self.backends[name].data for name in settings}, origin=origin,
+                                   tolerance=tolerance)
+        log.info(f"Parallel run on {len(settings)} instruments took {self.timing['total']:.3f} s (" +
+                 ", ".join(f"{name} {self.timing[name]:.3f} s" for name in settings) + ").")
+        return self.data
+
+    def run_nested_sweep(self, outer, outer_settings, inner, inner_settings, tolerance=None):
+        """
+        Step one instrument through a sweep and run a full sweep on another at every step,
+        e.g. transistor output curves: gate voltage steps (outer) x drain voltage sweep (inner).
+
+        At each outer step the outer instrument is biased at the step value and keeps
+        reading over the inner sweep, so both instruments acquire concurrently and the
+        outer readings (e.g. gate leakage) are aligned with the inner sweep.
+        Args:
+            outer: Name of the stepping instrument
+            outer_settings: 'Voltage Sweep' or 'Current Sweep' settings giving the step values
+                            (start, stop, steps / step, sweep_type, limits, measurements, ...)
+            inner: Name of the sweeping instrument
+            inner_settings: run_measurement settings of the inner sweep
+            tolerance: See merge_readings
+        Returns:
+            DataFrame of all steps with a 'Step' column and the '<outer> level' value; its time
+            column counts from the start of the first step, so it keeps rising across steps
+        """
+        import pandas as pd
+        source_mode = outer_settings.get("source_mode", "")
+        if source_mode not in ("Voltage Sweep", "Current Sweep"):
+            raise ValueError(f"The outer instrument must run a Voltage or Current Sweep, not {source_mode!r}.")
+        sweep_type = "voltage" if source_mode == "Voltage Sweep" else "current"
+        steps = plan_from_params(sweep_type, outer_settings, parse_range(outer_settings.get(f"{sweep_type}_range")))
+
+        # The outer instrument reads as often as the inner one, when the inner sweep length is known
+        inner_points = outer_settings.get("num_measurements")
+        if inner_points is None:
+            inner_points = 1
+            inner_mode = inner_settings.get("source_mode")
+            if inner_mode in ("Voltage Sweep", "Current Sweep") and inner_settings.get("sweep_type") != "Adaptive":
+                inner_type = "voltage" if inner_mode == "Voltage Sweep" else "current"
+                inner_points = len(plan_from_params(inner_type, inner_settings,
+                                                    parse_range(inner_settings.get(f"{inner_type}_range"))))
+        bias = dict(outer_settings, source_mode="Voltage Bias" if sweep_type == "voltage" else "Current Bias",
+                    num_measurements=inner_points,
+                    delay_seconds=inner_settings.get("delay", inner_settings.get("delay_seconds", 0.1)))
+        level_key = "voltage_level" if sweep_type == "voltage" else "current_level"
+
+        tables = []
+        started = time.perf_counter()
+        origin = time.time()  # One timebase for every step
+        try:
+            for i, level in enumerate(steps.values):
+                last = i == len(steps) - 1
+                # Both sources stay on between steps; unchanged settings are not rewritten
+                table = self.run_parallel({outer: dict(bias, **{level_key: float(level)}), inner: inner_settings},
+                                          keep_output=not last, record=False, tolerance=tolerance, origin=origin)
+                table.insert(0, f"{outer} level", float(level))
+                table.insert(0, "Step", i)
+                tables.append(table)
+        except BaseException:
+            self.disable_sources()
+            raise
+        self.data = pd.concat(tables, ignore_index=True)
+        log.info(f"Nested sweep: {len(steps)} {outer} steps x {inner} sweep, {len(self.data)} rows "
+                 f"in {time.perf_counter() - started:.3f} s.")
+        return self.data
+
+    def abort(self):
+        """Stop the runs on every instrument."""
+        for backend in self.backends.values():
+            backend.abort()
+
+    def disable_sources(self):
+        for name, backend in self.backends.items():
+            try:
+                backend.instrument.disable_source()
+            except Exception as e:
+                log.warning(f"Could not disable source of {name}: {e}")
+
+    def shutdown(self):
+        """Switch every source off and stop the worker threads."""
+        self.disable_sources()
+        self._pool.shutdown(wait=True)
@@ -0,0 +1,166 @@
+import functools
+import numpy as np
+
+# SCPI source functions for each sweep type
+SWEEP_FUNCTIONS = {"voltage": "VOLT", "current": "CURR"}
+# Largest source levels of the 2450 (105% of the top range) when no fixed source range is set
+SOURCE_MAXIMA = {"VOLT": 210.0, "CURR": 1.05}
+# Power envelope: above this source level the compliance limit must not exceed the second value
+POWER_ENVELOPE = {"VOLT": (21.0, 0.105), "CURR": (0.105, 21.0)}
+# Compiled plans kept for repeated recipes
+PLAN_CACHE_SIZE = 128
+
+
+def validate_list_values(values, function, source_range=None, limit=None, offset=0):
+    """
+    Check source values against the source range and the 2450 power envelope in one pass.
+    Args:
+        values: Source values
+        function: 'VOLT' or 'CURR'
+        source_range: Fixed source range in base units, or None for autorange
+        limit: Compliance limit (ILIM when sourcing voltage, VLIM when sourcing current)
+        offset: Index of values[0] in the whole list, for error messages
+    """
+    magnitude = np.abs(values)
+    bound = SOURCE_MAXIMA[function] if source_range is None else 1.05 * source_range
+    over = np.flatnonzero(magnitude > bound)
+    if len(over):
+        raise ValueError(f"{len(over)} list values exceed the {bound:g} source limit "
+                         f"(first: {values[over[0]]:g} at point {offset + over[0] + 1}).")
+    knee, reduced = POWER_ENVELOPE[function]
+    if limit is not None and abs(limit) > reduced:
+        high = np.flatnonzero(magnitude > knee)
+        if len(high):
+            raise ValueError(f"List values above {knee:g} need a compliance limit of at most {reduced:g}, "
+                             f"got {limit:g} (first: {values[high[0]]:g} at point {offset + high[0] + 1}).")
+
+
+class SweepPlan:
+    """
+    Immutable, validated sweep: the source values in execution order plus what is needed
+    to run them (sweep type, delay) and to program the 2450's own sweep engine.
+
+    Plans compare and hash by the recipe they were compiled from, so identical settings
+    map to the same cached plan. Both the point-by-point loop and the instrument-side
+    paths consume plan.values.
+    """
+
+    __slots__ = ("sweep_type", "grid_type", "start", "stop", "num_steps", "dual_sweep", "stepper",
+                 "delay", "values", "key")
+
+    def __init__(self, sweep_type, grid_type, start, stop, num_steps, dual_sweep, stepper, delay, values, key):
+        values = np.asarray(values, dtype=float)
+        values.flags.writeable = False  # Shared between cache hits
+        for name, value in (("sweep_type", sweep_type), ("grid_type", grid_type), ("start", start),
+                            ("stop", stop), ("num_steps", num_steps), ("dual_sweep", dual_sweep),
+                            ("stepper", stepper), ("delay", delay), ("values", values), ("key", key)):
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("SweepPlan is immutable.")
+
+    def __len__(self):
+        return len(self.values)
+
+    def __eq__(self, other):
+        return isinstance(other, SweepPlan) and self.key == other.key
+
+    def __hash__(self):
+        return hash(self.key)
+
+    def __repr__(self):
+        return f"SweepPlan({self.sweep_type}, {self.grid_type}, {len(self)} points)"
+
+    @property
+    def function(self):
+        return SWEEP_FUNCTIONS[self.sweep_type]
+
+    @property
+    def native_grid(self):
+        """True if the 2450's :SOUR:SWE LIN/LOG command reproduces the values exactly."""
+        return self.grid_type in ("Linear", "Logarithmic") and not self.stepper
+
+    @property
+    def duration(self):
+        """Lower bound of the run time from the source delays alone."""
+        return len(self.values) * self.delay
+
+
+def _grid(grid_type, start, stop, num_steps, stepper, step):
+    if stepper:
+        # Each value is start + k * step, so no rounding accumulates and no point is gained or lost
+        if step is None:
+            step = (stop - start) / (num_steps - 1) if num_steps > 1 else 0.0
+            count = num_steps
+        else:
+            if step == 0 or (stop - start) * step < 0:
+                raise ValueError(f"Step {step:g} does not lead from {start:g} to {stop:g}.")
+            count = int(np.floor((stop - start) / step * (1 + 1e-12) + 1e-9)) + 1
+        return start + step * np.arange(count)
+    if grid_type == "Linear":
+        return np.linspace(start, stop, num_steps)
+    if grid_type == "Logarithmic":
+        if start <= 0 or stop <= 0:
+            raise ValueError("Logarithmic sweep requires positive start and stop values.")
+        return np.logspace(np.log10(start), np.log10(stop), num_steps)
+    raise ValueError(f"Unknown sweep type: {grid_type}")
+
+
+@functools.lru_cache(maxsize=PLAN_CACHE_SIZE)
+def compile_sweep_plan(sweep_type, grid_type="Linear", start=0.0, stop=1.0, num_steps=10, dual_sweep=False,
+                       stepper=False, delay=0.1, step=None, source_range=None, limit=None):
+    """
+    Build and validate a SweepPlan. Results are cached, so repeating a recipe costs a dictionary lookup.
+    Args:
+        sweep_type: 'voltage' or 'current'
+        grid_type: 'Linear' or 'Logarithmic'
+        start, stop: Sweep end points
+        num_steps: Number of points per direction
+        dual_sweep: Append the reverse sweep
+        stepper: Use exact start + k * step values (step, or the step implied by num_steps)
+        delay: Source delay per point in seconds
+        step: Optional step size for the stepper
+        source_range: Fixed source range in base units, or None for autorange
+        limit: Compliance limit, checked against the power envelope
+    """
+    if sweep_type not in SWEEP_FUNCTIONS:
+        raise ValueError(f"Unknown sweep function: {sweep_type}")
+    if not (np.isfinite(start) and np.isfinite(stop)):
+        raise ValueError("Sweep start and stop must be finite.")
+    if num_steps < 1:
+        raise ValueError("A sweep needs at least one point.")
+    if delay < 0:
+        raise ValueError("Sweep delay cannot be negative.")
+
+    values = _grid(grid_type, start, stop, num_steps, stepper, step)
+    if dual_sweep:
+        values = np.concatenate([values, values[::-1]])
+    validate_list_values(values, SWEEP_FUNCTIONS[sweep_type], source_range, limit)
+    key = (sweep_type, grid_type, start, stop, num_steps, dual_sweep, stepper, delay, step, source_range, limit)
+    return SweepPlan(sweep_type, grid_type, start, stop, len(values) // (2 if dual_sweep else 1),
+                     dual_sweep, stepper, delay, values, key)
+
+
+def plan_from_params(sweep_type, params, source_range=None):
+    """
+    Compile (or fetch from the cache) the plan for setup_sweep-style parameters.
+    Args:
+        sweep_type: 'voltage' or 'current'
+        params: start, stop, steps, step, delay, sweep_type, dual_sweep, stepper and the compliance limit
+        source_range: Fixed source range in base units, or None
+    """
+    limit = params.get("current_limit" if sweep_type == "voltage" else "voltage_limit")
+    step = params.get("step")
+    return compile_sweep_plan(
+        sweep_type, params.get("sweep_type", "Linear"), float(params.get("start", 0.0)),
+        float(params.get("stop", 1.0)), int(params.get("steps", 10)), bool(params.get("dual_sweep", False)),
+        bool(params.get("stepper", False)), float(params.get("delay", 0.1)),
+        None if step is None else float(step), source_range, None if limit is None else float(limit),
+    )
+
+
+def list_plan(sweep_type, values, delay):
+    """Wrap already validated list values (e.g. one chunk of a list file) in an uncached plan."""
+    values = np.array(values, dtype=float)
+    return SweepPlan(sweep_type, "List", None, None, len(values), False, True, delay, values,
+                     ("List", sweep_type, delay, values.tobytes()))
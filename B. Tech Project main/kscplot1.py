@@ -0,0 +1,145 @@
+import numpy as np
+import matplotlib.pyplot as plt
+
+
+class MinMaxDecimator:
+    """
+    Incremental min/max decimation of one (x, y) series for display.
+
+    Points are folded into at most 2 * width buckets as they arrive, keeping the
+    minimum and maximum of each bucket. When the buckets run out, neighbouring
+    pairs are merged and the bucket size doubles, so appending costs O(new points)
+    and the drawn line never exceeds about 4 * width vertices however long the run.
+    """
+
+    def __init__(self, width=800):
+        self.width = width  # Roughly the plot width in pixels
+        self.bucket_size = 1
+        size = 2 * width
+        self._x_min = np.empty(size)
+        self._y_min = np.empty(size)
+        self._x_max = np.empty(size)
+        self._y_max = np.empty(size)
+        self._count = np.zeros(size, dtype=int)
+        self._buckets = 0
+        self.total = 0
+
+    def extend(self, x, y):
+        """Add new points (arrays of equal length)."""
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        keep = ~np.isnan(y)
+        x, y = x[keep], y[keep]
+        i = 0
+        while i < len(y):
+            if self._buckets == 0 or self._count[self._buckets - 1] >= self.bucket_size:
+                if self._buckets == len(self._count):
+                    self._compact()
+                self._open_bucket()
+            b = self._buckets - 1
+            take = min(self.bucket_size - self._count[b], len(y) - i)
+            xs, ys = x[i:i + take], y[i:i + take]
+            low, high = np.argmin(ys), np.argmax(ys)
+            if ys[low] < self._y_min[b]:
+                self._x_min[b], self._y_min[b] = xs[low], ys[low]
+            if ys[high] > self._y_max[b]:
+                self._x_max[b], self._y_max[b] = xs[high], ys[high]
+            self._count[b] += take
+            i += take
+        self.total += len(y)
+
+    def _open_bucket(self):
+        b = self._buckets
+        self._y_min[b], self._y_max[b] = np.inf, -np.inf
+        self._count[b] = 0
+        self._buckets += 1
+
+    def _compact(self):
+        """Merge bucket pairs (all buckets are full here) and double the bucket size."""
+        def merge(values):
+            return values.reshape(-1, 2)
+
+        y_min, x_min = merge(self._y_min), merge(self._x_min)
+        y_max, x_max = merge(self._y_max), merge(self._x_max)
+        first_low = y_min[:, 0] <= y_min[:, 1]
+        first_high = y_max[:, 0] >= y_max[:, 1]
+        half = self.width
+        self._y_min[:half] = np.where(first_low, y_min[:, 0], y_min[:, 1])
+        self._x_min[:half] = np.where(first_low, x_min[:, 0], x_min[:, 1])
+        self._y_max[:half] = np.where(first_high, y_max[:, 0], y_max[:, 1])
+        self._x_max[:half] = np.where(first_high, x_max[:, 0], x_max[:, 1])
+        self._count[:half] = merge(self._count).sum(axis=1)
+        self._buckets = half
+        self.bucket_size *= 2
+
+    def points(self):
+        """Return the decimated (x, y) arrays, min and max of each bucket in arrival order."""
+        n = self._buckets
+        x_min, y_min = self._x_min[:n], self._y_min[:n]
+        x_max, y_max = self._x_max[:n], self._y_max[:n]
+        min_first = x_min <= x_max
+        x = np.empty(2 * n)
+        y = np.empty(2 * n)
+        x[0::2] = np.where(min_first, x_min, x_max)
+        x[1::2] = np.where(min_first, x_max, x_min)
+        y[0::2] = np.where(min_first, y_min, y_max)
+        y[1::2] = np.where(min_first, y_max, y_min)
+        return x, y
+
+
+class LivePlot:
+    """
+    Matplotlib figure that is created once and updated with new rows only.
+    Each update folds the new points into the decimators and redraws a bounded
+    number of vertices, so redraw time stays flat as the dataset grows.
+    """
+
+    def __init__(self, x_key, y1_key, y2_key=None, width=800):
+        self.keys = (x_key, y1_key, y2_key)
+        self.figure, self.ax1 = plt.subplots()
+        self.line1, = self.ax1.plot([], [], label=y1_key, color="blue")
+        self.ax1.set_xlabel(x_key)
+        self.ax1.set_ylabel(y1_key, color="blue")
+        self.decimator1 = MinMaxDecimator(width)
+        self.ax2 = self.line2 = self.decimator2 = None
+        if y2_key is not None and y2_key != y1_key:
+            self.ax2 = self.ax1.twinx()
+            self.line2, = self.ax2.plot([], [], label=y2_key, color="red")
+            self.ax2.set_ylabel(y2_key, color="red")
+            self.decimator2 = MinMaxDecimator(width)
+
+    def matches(self, x_key, y1_key, y2_key=None):
+        return self.keys == (x_key, y1_key, y2_key)
+
+    def update(self, rows):
+        """Add new measurement rows (list of dictionaries) and return the figure."""
+        if rows:
+            x_key, y1_key, y2_key = self.keys
+            x = np.array([row.get(x_key, np.nan) for row in rows], dtype=float)
+            self._extend(self.decimator1, self.line1, self.ax1, x, rows, y1_key)
+            if self.decimator2 is not None:
+                self._extend(self.decimator2, self.line2, self.ax2, x, rows, y2_key)
+        return self.figure
+
+    @staticmethod
+    def _extend(decimator, line, ax, x, rows, key):
+        y = np.array([row.get(key, np.nan) for row in rows], dtype=float)
+        decimator.extend(x, y)
+        line.set_data(*decimator.points())
+        ax.relim()
+        ax.autoscale_view()
+
+    def set_scale(self, x_lim=None, y1_lim=None, y2_lim=None):
+        """Apply manual (min, max) limits; None autoscales that axis."""
+        for ax, axis, limits in ((self.ax1, "x", x_lim), (self.ax1, "y", y1_lim), (self.ax2, "y", y2_lim)):
+            if ax is None:
+                continue
+            if limits is None:
+                ax.autoscale(enable=True, axis=axis)
+            elif axis == "x":
+                ax.set_xlim(*limits)
+            else:
+                ax.set_ylim(*limits)
+
+    def close(self):
+        plt.close(self.figure)
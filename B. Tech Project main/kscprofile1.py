@@ -0,0 +1,227 @@
+import os
+import time
+import logging
+import threading
+from contextlib import contextmanager
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the latency histogram buckets, 10 µs to 100 s
+LATENCY_BUCKETS = np.logspace(-5, 2, 22)
+# Phases a run's time is split into
+PHASES = ["configure", "source", "settle", "read", "post-process"]
+
+
+class LatencyHistogram:
+    """Cumulative-bucket latency histogram (Prometheus layout) with exact count, sum and max."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = np.asarray(buckets, dtype=float)
+        self.counts = np.zeros(len(self.buckets) + 1, dtype=np.int64)  # Last bucket is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.counts[np.searchsorted(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q):
+        """Estimate a quantile as the upper bound of the bucket that contains it."""
+        if self.count == 0:
+            return 0.0
+        index = int(np.searchsorted(np.cumsum(self.counts), q * self.count))
+        return min(float(self.buckets[index]), self.max) if index < len(self.buckets) else self.max
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "total": self.sum,
+            "mean": self.sum / self.count if self.count else 0.0,
+            "p50": self.quantile(0.5),
+            "p99": self.quantile(0.99),
+            "max": self.max,
+        }
+
+
+def command_key(command):
+    """Group SCPI commands by header: ':SOUR:VOLT 1.5' -> ':SOUR:VOLT', queries keep their '?'."""
+    return command.strip().split(" ", 1)[0].split(";", 1)[0] or "<empty>"
+
+
+class Profiler:
+    """
+    Opt-in timing for a KeithleyBackend: per-SCPI-command latency histograms (fed by a
+    TimedAdapter) and the time each run spends per phase.
+
+    Phases nest safely: entering a phase pauses the enclosing one, so every second of a
+    run is charged to exactly one phase. Time outside all phases is reported as 'other'.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.commands = {}
+            self.phases = dict.fromkeys(PHASES, 0.0)  # Totals over all runs
+            self.last_run = {}
+            self.runs = 0
+            self.io_seconds = 0.0
+            self._run_start = None
+            self._run_phases = None
+
+    # SCPI timing ---------------------------------------------------------
+
+    def observe_command(self, key, seconds):
+        with self._lock:
+            histogram = self.commands.get(key)
+            if histogram is None:
+                histogram = self.commands[key] = LatencyHistogram()
+            histogram.observe(seconds)
+            self.io_seconds += seconds
+
+    # Phase timing --------------------------------------------------------
+
+    def _stack(self):
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []  # [phase, started] per thread
+        return self._local.stack
+
+    def _charge(self, phase, seconds):
+        with self._lock:
+            self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+            if self._run_phases is not None:
+                self._run_phases[phase] = self._run_phases.get(phase, 0.0) + seconds
+
+    @contextmanager
+    def phase(self, name):
+        """Charge the enclosed time to phase name (pausing any enclosing phase)."""
+        stack = self._stack()
+        now = time.perf_counter()
+        if stack:
+            self._charge(stack[-1][0], now - stack[-1][1])
+        stack.append([name, now])
+        try:
+            yield
+        finally:
+            now = time.perf_counter()
+            self._charge(name, now - stack.pop()[1])
+            if stack:
+                stack[-1][1] = now  # Resume the enclosing phase
+
+    def start_run(self):
+        with self._lock:
+            self._run_start = time.perf_counter()
+            self._run_phases = dict.fromkeys(PHASES, 0.0)
+
+    def end_run(self):
+        """Close the current run and return its phase breakdown in seconds."""
+        with self._lock:
+            if self._run_start is None:
+                return {}
+            phases = self._run_phases
+            total = time.perf_counter() - self._run_start
+            phases["other"] = max(total - sum(phases.values()), 0.0)
+            phases["total"] = total
+            self.last_run = phases
+            self.runs += 1
+            self._run_start = self._run_phases = None
+            return dict(phases)
+
+    # Reporting -----------------------------------------------------------
+
+    def report(self):
+        """Snapshot of everything recorded so far as plain dictionaries."""
+        with self._lock:
+            return {
+                "runs": self.runs,
+                "io_seconds": self.io_seconds,
+                "phases": dict(self.phases),
+                "last_run": dict(self.last_run),
+                "commands": {key: histogram.summary() for key, histogram in sorted(self.commands.items())},
+            }
+
+    def prometheus_text(self, prefix="ksc"):
+        """Render the metrics in the Prometheus text exposition format."""
+        def label(value):
+            return value.replace("\\", "\\\\").replace('"', '\\"')
+
+        with self._lock:
+            lines = [
+                f"# HELP {prefix}_scpi_latency_seconds Round-trip time of SCPI writes and reads by command.",
+                f"# TYPE {prefix}_scpi_latency_seconds histogram",
+            ]
+            for key, histogram in sorted(self.commands.items()):
+                command = label(key)
+                cumulative = np.cumsum(histogram.counts)
+                for bound, count in zip(histogram.buckets, cumulative):
+                    lines.append(f'{prefix}_scpi_latency_seconds_bucket{{command="{command}",le="{bound:.6g}"}} {count}')
+                lines.append(f'{prefix}_scpi_latency_seconds_bucket{{command="{command}",le="+Inf"}} {cumulative[-1]}')
+                lines.append(f'{prefix}_scpi_latency_seconds_sum{{command="{command}"}} {histogram.sum:.9g}')
+                lines.append(f'{prefix}_scpi_latency_seconds_count{{command="{command}"}} {histogram.count}')
+            lines += [
+                f"# HELP {prefix}_phase_seconds_total Time spent per run phase.",
+                f"# TYPE {prefix}_phase_seconds_total counter",
+            ]
+            for phase, seconds in self.phases.items():
+                lines.append(f'{prefix}_phase_seconds_total{{phase="{label(phase)}"}} {seconds:.9g}')
+            lines += [
+                f"# HELP {prefix}_runs_total Completed measurement runs.",
+                f"# TYPE {prefix}_runs_total counter",
+                f"{prefix}_runs_total {self.runs}",
+            ]
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        """Write the metrics atomically (for a node_exporter textfile collector or a local scrape)."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp_path, path)
+        return path
+
+
+class TimedAdapter:
+    """
+    Proxy around a pymeasure adapter that times every write and read.
+    Reads are charged to the query that preceded them (e.g. ':READ?').
+    """
+
+    def __init__(self, adapter, profiler):
+        self._adapter = adapter
+        self._profiler = profiler
+        self._last_command = "<read>"
+
+    def __getattr__(self, name):
+        return getattr(self._adapter, name)
+
+    def write(self, command, **kwargs):
+        key = command_key(command)
+        self._last_command = key
+        start = time.perf_counter()
+        try:
+            return self._adapter.write(command, **kwargs)
+        finally:
+            self._profiler.observe_command(key, time.perf_counter() - start)
+
+    def _timed_read(self, method, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            self._profiler.observe_command(f"{self._last_command} <read>", time.perf_counter() - start)
+
+    def read(self, **kwargs):
+        return self._timed_read(self._adapter.read, **kwargs)
+
+    def read_bytes(self, count=-1, **kwargs):
+        return self._timed_read(self._adapter.read_bytes, count, **kwargs)
@@ -0,0 +1,138 @@
+import numpy as np
+
+# Derived quantity per measurement name and the column it is stored under
+MEASUREMENT_NAMES = {
+    "Voltage": "Voltage (V)",
+    "Current": "Current (A)",
+    "Resistance": "Resistance (Ω)",
+    "Conductance": "Conductance (S)",
+    "Power": "Power (W)",
+    "Timestamp": "Timestamp",
+}
+
+
+def derive_columns(voltage, current, timestamp, measurements):
+    """
+    Compute the enabled measurement columns from voltage/current/timestamp arrays in one pass.
+    Resistance is NaN where the current is zero and conductance where the voltage is zero.
+    Args:
+        voltage: Voltage readings (array)
+        current: Current readings (array)
+        timestamp: Reading times in seconds since the epoch (array)
+        measurements: List of enabled measurements (e.g., ['Voltage', 'Current', 'Power'])
+    """
+    columns = {}
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for name in MEASUREMENT_NAMES:
+            if name not in measurements:
+                continue
+            if name == "Voltage":
+                values = voltage
+            elif name == "Current":
+                values = current
+            elif name == "Resistance":
+                values = np.where(current != 0, voltage / current, np.nan)
+            elif name == "Conductance":
+                values = np.where(voltage != 0, current / voltage, np.nan)
+            elif name == "Power":
+                values = voltage * current
+            else:
+                values = timestamp
+            columns[MEASUREMENT_NAMES[name]] = values
+    return columns
+
+
+class MeasurementRecords:
+    """
+    Raw readings of one sweep in a preallocated (n, 3) float64 array of
+    (source value, sensed reading, timestamp) rows.
+
+    Only what the instrument returns is stored while acquiring; voltage, current and
+    the derived quantities are computed afterwards by columns()/to_frame(), so a
+    reading costs one array write instead of a dictionary per point.
+    """
+
+    def __init__(self, sweep_type, capacity=0):
+        """
+        Args:
+            sweep_type: Sourced quantity, 'voltage' or 'current'
+            capacity: Expected number of points (e.g. the sweep length); grows if exceeded
+        """
+        self.sweep_type = sweep_type
+        self._data = np.empty((max(int(capacity), 1), 3))
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def _reserve(self, count):
+        needed = self._size + count
+        if needed > len(self._data):
+            grown = np.empty((max(needed, 2 * len(self._data)), 3))
+            grown[:self._size] = self._data[:self._size]
+            self._data = grown
+
+    def append(self, source, reading, timestamp):
+        """Add one reading."""
+        self._reserve(1)
+        self._data[self._size] = (source, reading, timestamp)
+        self._size += 1
+
+    def extend(self, block, epoch=0.0):
+        """
+        Add a block of readings as returned by :TRAC:DATA? (source, reading, relative time).
+        Args:
+            block: (n, 3) array
+            epoch: Time origin added to the relative times
+        """
+        count = len(block)
+        self._reserve(count)
+        rows = self._data[self._size:self._size + count]
+        rows[:] = block
+        rows[:, 2] += epoch
+        self._size += count
+
+    def extend_records(self, other):
+        """Add the readings of another MeasurementRecords of the same sweep type."""
+        self.extend(other._data[:len(other)])
+
+    def view(self, start, stop=None):
+        """Readings start:stop as a MeasurementRecords sharing this one's array (no copy)."""
+        part = MeasurementRecords(self.sweep_type)
+        part._data = self._data[start:self._size if stop is None else stop]
+        part._size = len(part._data)
+        return part
+
+    def sort(self):
+        """Order the readings by source value (stable, so repeated values keep their order)."""
+        rows = self._data[:self._size]
+        rows[:] = rows[np.argsort(rows[:, 0], kind="stable")]
+
+    @property
+    def source(self):
+        return self._data[:self._size, 0]
+
+    @property
+    def reading(self):
+        return self._data[:self._size, 1]
+
+    @property
+    def time(self):
+        return self._data[:self._size, 2]
+
+    @property
+    def voltage(self):
+        return self.source if self.sweep_type == "voltage" else self.reading
+
+    @property
+    def current(self):
+        return self.reading if self.sweep_type == "voltage" else self.source
+
+    def columns(self, measurements):
+        """Return {column name: array} for the enabled measurements."""
+        return derive_columns(self.voltage, self.current, self.time, measurements)
+
+    def to_frame(self, measurements):
+        """Build a DataFrame of the enabled measurements (one copy per column)."""
+        import pandas as pd
+        return pd.DataFrame(self.columns(measurements))
@@ -0,0 +1,110 @@
+import numpy as np
+
+
+class RingBuffer:
+    """
+    Fixed-capacity columnar ring buffer with one float64 array per quantity.
+
+    Every value is stored twice (at i and i + capacity), so the most recent n rows
+    are always one contiguous slice: append and latest() are O(1) and window()
+    returns read-only views without copying.
+    """
+
+    def __init__(self, columns, capacity=100000):
+        if capacity < 1:
+            raise ValueError("Ring buffer capacity must be at least 1.")
+        self.columns = list(columns)
+        self.capacity = capacity
+        self._arrays = {column: np.full(2 * capacity, np.nan) for column in self.columns}
+        self._seen = set()  # Columns that have received at least one value
+        self._next = 0  # Write position in [0, capacity)
+        self._size = 0
+        self.total = 0  # Rows appended since creation/clear, including overwritten ones
+
+    def __len__(self):
+        return self._size
+
+    def clear(self):
+        """Drop all rows (storage is reused)."""
+        self._seen.clear()
+        self._next = 0
+        self._size = 0
+        self.total = 0
+
+    def append(self, row):
+        """Append one row given as a {column: value} dictionary."""
+        i = self._next
+        for column in self.columns:
+            value = row.get(column, np.nan)
+            array = self._arrays[column]
+            array[i] = value
+            array[i + self.capacity] = value
+        self._seen.update(column for column in row if column in self._arrays)
+        self._advance(1)
+
+    def extend(self, rows):
+        """Append several rows given as a list of dictionaries."""
+        if not rows:
+            return
+        rows = rows[-self.capacity:]  # Older rows would be overwritten anyway
+        columns = {column: np.array([row.get(column, np.nan) for row in rows], dtype=float)
+                   for column in self.columns}
+        present = set()
+        for row in rows:
+            present.update(row)
+        self._extend_columns(columns, len(rows))
+        self._seen.update(column for column in present if column in self._arrays)
+
+    def extend_columns(self, columns):
+        """Append rows given as {column: array}; all arrays must have the same length."""
+        count = len(next(iter(columns.values()), []))
+        if count == 0:
+            return
+        start = max(count - self.capacity, 0)  # Older rows would be overwritten anyway
+        count -= start
+        arrays = {column: np.asarray(columns[column], dtype=float)[start:] if column in columns
+                  else np.full(count, np.nan) for column in self.columns}
+        self._extend_columns(arrays, count)
+        self._seen.update(column for column in columns if column in self._arrays)
+
+    def _extend_columns(self, columns, count):
+        positions = (self._next + np.arange(count)) % self.capacity
+        for column, values in columns.items():
+            array = self._arrays[column]
+            array[positions] = values
+            array[positions + self.capacity] = values
+        self._advance(count)
+
+    def _advance(self, count):
+        self._next = (self._next + count) % self.capacity
+        self._size = min(self._size + count, self.capacity)
+        self.total += count
+
+    def _active_columns(self):
+        return [column for column in self.columns if column in self._seen]
+
+    def latest(self):
+        """Return the most recent row as a dictionary, or {} when empty."""
+        if self._size == 0:
+            return {}
+        i = self._next - 1 + self.capacity
+        return {column: float(self._arrays[column][i]) for column in self._active_columns()}
+
+    def window(self, n=None):
+        """
+        Return the most recent n rows (all rows when None) as {column: read-only view}.
+        The views alias the live storage and are overwritten as new rows arrive.
+        """
+        n = self._size if n is None else min(n, self._size)
+        end = self._next + self.capacity
+        views = {}
+        for column in self._active_columns():
+            view = self._arrays[column][end - n:end]
+            view.flags.writeable = False
+            views[column] = view
+        return views
+
+    def to_frame(self, n=None):
+        """Copy the most recent n rows into a pandas DataFrame."""
+        import pandas as pd
+        return pd.DataFrame(self.window(n))
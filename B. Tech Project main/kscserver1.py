@@ -0,0 +1,270 @@
+import sys
+import json
+import time
+import struct
+import asyncio
+import logging
+import argparse
+import numpy as np
+from kscringbuffer1 import RingBuffer
+
+log = logging.getLogger(__name__)
+
+DEFAULT_PORT = 8502  # Next to Streamlit's default 8501
+# Rows kept for the snapshot a newly connected client receives
+SNAPSHOT_ROWS = 10000
+# Frames queued per client before it is considered lagging and resynchronised with a snapshot
+CLIENT_QUEUE_FRAMES = 256
+# Every row of a data frame has one float64 per column, in this order (NaN when not measured)
+FRAME_COLUMNS = ["Voltage (V)", "Current (A)", "Resistance (Ω)", "Conductance (S)", "Power (W)", "Timestamp"]
+
+# Frame header: type, column count, row count (or JSON byte count), sequence number of the first row
+FRAME_HEADER = struct.Struct("<BxHIQ")
+HELLO, SNAPSHOT, DELTA, RUN_START, RUN_END = 1, 2, 3, 4, 5
+FRAME_TYPES = {HELLO: "hello", SNAPSHOT: "snapshot", DELTA: "delta", RUN_START: "run_start", RUN_END: "run_end"}
+
+
+def encode_rows(frame_type, first_seq, rows):
+    """Frame an (n, len(FRAME_COLUMNS)) array of readings as little-endian float64 rows."""
+    rows = np.ascontiguousarray(rows, dtype="<f8")
+    return FRAME_HEADER.pack(frame_type, rows.shape[1], rows.shape[0], first_seq) + rows.tobytes()
+
+
+def encode_message(frame_type, seq, message):
+    """Frame a JSON message (hello, run start/end); the column count is 0 and the row count is its length."""
+    payload = json.dumps(message, separators=(",", ":"), default=str).encode("utf-8")
+    return FRAME_HEADER.pack(frame_type, 0, len(payload), seq) + payload
+
+
+def decode_frame(header, payload):
+    """
+    Decode one frame into (type name, sequence number, rows array or message dictionary).
+    Args:
+        header: FRAME_HEADER.size bytes
+        payload: The bytes that follow (see payload_size)
+    """
+    frame_type, columns, count, seq = FRAME_HEADER.unpack(header)
+    if columns == 0:
+        return FRAME_TYPES.get(frame_type, frame_type), seq, json.loads(payload.decode("utf-8"))
+    rows = np.frombuffer(payload, dtype="<f8").reshape(count, columns)
+    return FRAME_TYPES.get(frame_type, frame_type), seq, rows
+
+
+def payload_size(header):
+    _, columns, count, _ = FRAME_HEADER.unpack(header)
+    return count if columns == 0 else count * columns * 8
+
+
+async def read_frames(host="127.0.0.1", port=DEFAULT_PORT):
+    """Connect to a MeasurementServer and yield decoded frames (see decode_frame) until it closes."""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while True:
+            try:
+                header = await reader.readexactly(FRAME_HEADER.size)
+                payload = await reader.readexactly(payload_size(header))
+            except asyncio.IncompleteReadError:
+                return
+            yield decode_frame(header, payload)
+    finally:
+        writer.close()
+
+
+class _Client:
+    def __init__(self, writer, queue_frames):
+        self.writer = writer
+        self.queue = asyncio.Queue(maxsize=queue_frames)
+        self.resyncs = 0  # Times the client fell behind and was sent a fresh snapshot
+        self.peer = writer.get_extra_info("peername")
+
+
+class MeasurementServer:
+    """
+    asyncio TCP server that owns a KeithleyBackend's acquisition and publishes its readings.
+
+    Readings reach the server through backend.subscribe, so any number of clients add no
+    instrument queries. Every row gets a sequence number. A client first receives a hello
+    message and a snapshot of the most recent rows, then delta frames as readings arrive.
+    Each client has a bounded frame queue: a client too slow to keep up has its queue
+    replaced by a fresh snapshot instead of slowing acquisition or the other clients.
+    """
+
+    def __init__(self, backend, host="127.0.0.1", port=DEFAULT_PORT, snapshot_rows=SNAPSHOT_ROWS,
+                 client_queue=CLIENT_QUEUE_FRAMES):
+        """
+        Args:
+            backend: KeithleyBackend to drive; only this server should use it
+            host, port: Address to listen on (localhost by default)
+            snapshot_rows: Recent rows kept for late joiners
+            client_queue: Frames buffered per client before it is resynchronised
+        """
+        self.backend = backend
+        self.host = host
+        self.port = port
+        self.client_queue = client_queue
+        self.clients = set()
+        self.history = RingBuffer(FRAME_COLUMNS, snapshot_rows)
+        self.next_seq = 0
+        self.run_state = {"running": False}
+        self.instrument = None  # *IDN? reply, sent to clients in the hello message
+        self._loop = None
+        self._server = None
+        self._run_lock = None
+
+    # Server lifecycle ----------------------------------------------------
+
+    async def start(self):
+        """Start listening and subscribe to the backend's readings."""
+        self._loop = asyncio.get_running_loop()
+        self._run_lock = asyncio.Lock()
+        try:
+            self.instrument = await asyncio.to_thread(lambda: self.backend.instrument_id)
+        except Exception as e:
+            log.warning(f"Could not identify the instrument: {e}")
+        self._server = await asyncio.start_server(self._handle_client, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]  # Resolved when port was 0
+        self.backend.subscribe(self._on_readings)
+        log.info(f"Measurement server listening on {self.host}:{self.port}")
+        return self
+
+    async def close(self):
+        self.backend.unsubscribe(self._on_readings)
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for client in list(self.clients):
+            client.writer.close()
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    # Acquisition ---------------------------------------------------------
+
+    async def run_measurement(self, settings):
+        """Run one measurement on a worker thread, announcing its start and end to every client."""
+        async with self._run_lock:
+            self.run_state = {"running": True, "source_mode": settings.get("source_mode"), "started": time.time()}
+            self._broadcast(encode_message(RUN_START, self.next_seq, self.run_state))
+            status = "completed"
+            try:
+                await asyncio.to_thread(self.backend.run_measurement, settings)
+            except Exception:
+                status = "failed"
+                raise
+            finally:
+                self.run_state = {"running": False, "status": status, "finished": time.time(),
+                                  "statistics": self.backend.statistics}
+                self._broadcast(encode_message(RUN_END, self.next_seq, self.run_state))
+
+    def abort(self):
+        """Stop the running measurement."""
+        self.backend.abort()
+
+    def _on_readings(self, columns):
+        # Acquisition thread: pack the block here, hand it to the event loop
+        count = len(next(iter(columns.values()), []))
+        if count == 0 or self._loop is None:
+            return
+        rows = np.column_stack([np.asarray(columns[column], dtype=float) if column in columns
+                                else np.full(count, np.nan) for column in FRAME_COLUMNS])
+        self._loop.call_soon_threadsafe(self._publish_rows, rows)
+
+    def _publish_rows(self, rows):
+        self.history.extend_columns(dict(zip(FRAME_COLUMNS, rows.T)))
+        frame = encode_rows(DELTA, self.next_seq, rows)
+        self.next_seq += len(rows)
+        self._broadcast(frame)
+
+    # Clients -------------------------------------------------------------
+
+    def snapshot_frame(self):
+        """The most recent rows as one snapshot frame; its sequence number is that of the first row."""
+        count = len(self.history)
+        window = self.history.window()
+        rows = np.column_stack([window.get(column, np.full(count, np.nan)) for column in FRAME_COLUMNS]) \
+            if count else np.empty((0, len(FRAME_COLUMNS)))
+        return encode_rows(SNAPSHOT, self.next_seq - count, rows)
+
+    def _broadcast(self, frame):
+        for client in self.clients:
+            try:
+                client.queue.put_nowait(frame)
+            except asyncio.QueueFull:
+                # Lagging client: drop its backlog and resynchronise it from a snapshot
+                while not client.queue.empty():
+                    client.queue.get_nowait()
+                client.queue.put_nowait(self.snapshot_frame())
+                client.resyncs += 1
+                log.warning(f"Client {client.peer} fell behind; sent a snapshot (resync {client.resyncs}).")
+
+    async def _handle_client(self, reader, writer):
+        client = _Client(writer, self.client_queue)
+        hello = {"columns": FRAME_COLUMNS, "instrument": self.instrument, "run": self.run_state,
+                 "snapshot_rows": self.history.capacity}
+        client.queue.put_nowait(encode_message(HELLO, self.next_seq, hello))
+        client.queue.put_nowait(self.snapshot_frame())
+        self.clients.add(client)
+        log.info(f"Client {client.peer} connected ({len(self.clients)} connected).")
+        sender = asyncio.create_task(self._send(client))
+        closed = asyncio.create_task(reader.read())  # Clients only listen; EOF means they left
+        try:
+            await asyncio.wait([sender, closed], return_when=asyncio.FIRST_COMPLETED)
+        except asyncio.CancelledError:
+            pass  # Server shutting down
+        finally:
+            sender.cancel()
+            closed.cancel()
+            self.clients.discard(client)
+            writer.close()
+            log.info(f"Client {client.peer} disconnected ({len(self.clients)} connected).")
+
+    async def _send(self, client):
+        try:
+            while True:
+                frame = await client.queue.get()
+                client.writer.write(frame)
+                await client.writer.drain()  # Socket backpressure: wait while the client's receive window is full
+        except ConnectionError:
+            pass
+
+
+async def serve(backend, runs, host, port, repeat=False):
+    """Serve readings while running recipe runs (forever when repeat, else until interrupted)."""
+    async with MeasurementServer(backend, host, port) as server:
+        while True:
+            for settings in runs:
+                try:
+                    await server.run_measurement(settings)
+                except Exception as e:
+                    log.error(f"Run failed: {e}")
+            if not repeat:
+                break
+        await asyncio.Event().wait()  # Keep serving the last snapshot until interrupted
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Publish Keithley 2450 readings to local clients.")
+    parser.add_argument("recipe", nargs="?", help="Recipe file to run (see ksccli1)")
+    parser.add_argument("--resource", help="VISA resource name; the first detected 2450 when omitted")
+    parser.add_argument("--simulate", action="store_true", help="Run against a simulated 2450")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="TCP port")
+    parser.add_argument("--repeat", action="store_true", help="Run the recipe over and over")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    from ksccli1 import load_recipe, make_backend
+    runs = load_recipe(args.recipe) if args.recipe else []
+    backend = make_backend(args.resource, args.simulate)
+    try:
+        asyncio.run(serve(backend, runs, args.host, args.port, args.repeat))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
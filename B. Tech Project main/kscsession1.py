@@ -0,0 +1,144 @@
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from kscbackend1 import KeithleyBackend, auto_detect_keithley
+
+log = logging.getLogger(__name__)
+
+# Seconds without a heartbeat after which another owner may take over an instrument
+STALE_CLAIM_SECONDS = 60.0
+
+
+class InstrumentBusyError(RuntimeError):
+    """Raised when another owner (e.g. a second browser tab) controls the instrument."""
+
+
+class InstrumentSession:
+    """One connected backend, its current owner and the worker acquiring on it."""
+
+    def __init__(self, resource_name, backend):
+        self.resource_name = resource_name
+        self.backend = backend
+        self.owner = None
+        self.heartbeat = 0.0
+        self.worker = None
+
+    def busy(self):
+        return self.worker is not None and self.worker.is_alive()
+
+
+class SessionManager:
+    """
+    Process-wide registry of connected KeithleyBackends.
+
+    Streamlit reruns the script on every widget change; keeping backends here means
+    discovery and the VISA session happen once per instrument, not once per rerun,
+    and every browser session shares the same connection.
+    """
+
+    def __init__(self, backend_factory=KeithleyBackend):
+        """
+        Args:
+            backend_factory: Callable taking resource_name=... and returning a KeithleyBackend
+        """
+        self._backend_factory = backend_factory
+        self._sessions = {}
+        self._default_resource = None
+        self._lock = threading.RLock()
+
+    def connect(self, resource_name=None):
+        """
+        Return the session for an instrument, connecting on first use.
+        Idle sessions are health-checked and reconnected if the instrument stopped answering.
+        Args:
+            resource_name: VISA resource name; the first detected 2450 when None
+        """
+        with self._lock:
+            if resource_name is None:
+                if self._default_resource is None:
+                    self._default_resource = auto_detect_keithley()
+                resource_name = self._default_resource
+
+            session = self._sessions.get(resource_name)
+            if session is None:
+                session = InstrumentSession(resource_name, self._backend_factory(resource_name=resource_name))
+                self._sessions[resource_name] = session
+            elif not session.busy() and not self.health_check(session):
+                self._reconnect(session)
+            return session
+
+    def health_check(self, session):
+        """True if the instrument answers *IDN?. Never call while a worker is acquiring."""
+        try:
+            return bool(session.backend.instrument.ask("*IDN?").strip())
+        except Exception as e:
+            log.warning(f"Health check failed for {session.resource_name}: {e}")
+            return False
+
+    def _reconnect(self, session):
+        log.info(f"Reconnecting to {session.resource_name}.")
+        try:
+            session.backend.instrument.adapter.close()
+        except Exception:
+            pass
+        session.backend = self._backend_factory(resource_name=session.resource_name)
+
+    def claim(self, session, owner, stale_after=STALE_CLAIM_SECONDS):
+        """
+        Give owner exclusive control of the instrument, or refresh its heartbeat.
+        A claim that has not been refreshed for stale_after seconds can be taken over;
+        the previous owner's worker is stopped first.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if session.owner not in (None, owner):
+                if now - session.heartbeat < stale_after:
+                    raise InstrumentBusyError(f"{session.resource_name} is in use by another session.")
+                log.warning(f"Taking over stale claim on {session.resource_name}.")
+                if session.busy():
+                    session.worker.stop()
+                session.worker = None
+            session.owner = owner
+            session.heartbeat = now
+
+    def release(self, session, owner):
+        """Give up control of the instrument (no-op if owner does not hold it)."""
+        with self._lock:
+            if session.owner == owner:
+                session.owner = None
+
+    @contextmanager
+    def control(self, owner, resource_name=None):
+        """Context manager yielding the backend while owner holds the instrument."""
+        session = self.connect(resource_name)
+        self.claim(session, owner)
+        try:
+            yield session.backend
+        finally:
+            self.release(session, owner)
+
+    def shutdown_all(self):
+        """Stop all workers and shut every instrument down."""
+        with self._lock:
+            for session in self._sessions.values():
+                if session.busy():
+                    session.worker.stop()
+                try:
+                    session.backend.shutdown()
+                except Exception as e:
+                    log.warning(f"Error shutting down {session.resource_name}: {e}")
+            self._sessions.clear()
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_session_manager():
+    """Return the process-wide SessionManager."""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = SessionManager()
+        return _manager
@@ -0,0 +1,415 @@
+import time
+import logging
+import numpy as np
+from pymeasure.adapters import Adapter
+from pymeasure.instruments.keithley import Keithley2450
+
+log = logging.getLogger(__name__)
+
+SIMULATED_IDN = "KEITHLEY INSTRUMENTS,MODEL 2450,SIM0001,1.7.12b"
+SCPI_VOWELS = "AEIOU"
+# Measure ranges of the 2450; readings beyond OVERRANGE * range are reported as OVERFLOW
+MEASURE_RANGES = {
+    "CURR": np.array([10e-9, 100e-9, 1e-6, 10e-6, 100e-6, 1e-3, 10e-3, 100e-3, 1.0]),
+    "VOLT": np.array([0.02, 0.2, 2.0, 20.0, 200.0]),
+}
+OVERRANGE = 1.05
+OVERFLOW = 9.9e37
+
+
+class ResistorModel:
+    """Ohmic device: I = V / R."""
+
+    def __init__(self, resistance=1e3):
+        self.resistance = resistance
+
+    def current(self, voltage):
+        return np.asarray(voltage, dtype=float) / self.resistance
+
+    def voltage(self, current):
+        return np.asarray(current, dtype=float) * self.resistance
+
+
+class DiodeModel:
+    """Shockley diode with a parallel shunt resistance."""
+
+    def __init__(self, saturation_current=1e-12, ideality=1.8, thermal_voltage=0.02585, shunt_resistance=1e9):
+        self.saturation_current = saturation_current
+        self.ideality = ideality
+        self.thermal_voltage = thermal_voltage
+        self.shunt_resistance = shunt_resistance
+
+    def current(self, voltage):
+        v = np.asarray(voltage, dtype=float)
+        exponent = np.clip(v / (self.ideality * self.thermal_voltage), -100.0, 100.0)
+        return self.saturation_current * np.expm1(exponent) + v / self.shunt_resistance
+
+    def voltage(self, current, v_min=-210.0, v_max=210.0, iterations=80):
+        """Invert current() by bisection (the I-V curve is monotonic)."""
+        target = np.asarray(current, dtype=float)
+        low = np.full_like(target, v_min)
+        high = np.full_like(target, v_max)
+        for _ in range(iterations):
+            middle = 0.5 * (low + high)
+            above = self.current(middle) > target
+            high = np.where(above, middle, high)
+            low = np.where(above, low, middle)
+        return 0.5 * (low + high)
+
+
+def _short_form(node):
+    """Reduce a SCPI mnemonic to its short form (e.g. VOLTAGE -> VOLT, LEVEL -> LEV)."""
+    suffix = ""
+    while node and node[-1].isdigit():  # SOUR1, SENS1 ...
+        suffix = node[-1] + suffix
+        node = node[:-1]
+    if len(node) > 4:
+        node = node[:3] if node[3] in SCPI_VOWELS else node[:4]
+    return node
+
+
+def normalize_header(header):
+    """Canonical short-form header without leading colon or optional nodes."""
+    nodes = [_short_form(node) for node in header.strip().lstrip(":").upper().split(":") if node]
+    if len(nodes) > 1 and nodes[-1] == "LEV":  # :SOUR:VOLT:LEV is the same as :SOUR:VOLT
+        nodes.pop()
+    return ":".join(nodes)
+
+
+class SimulatedAdapter(Adapter):
+    """
+    pymeasure adapter that emulates the SCPI subset of a Keithley 2450 used by KeithleyBackend.
+    Args:
+        device: I-V model with current(voltage) and voltage(current) methods
+        query_latency: Seconds added to every read (one VISA round trip)
+        write_latency: Seconds added to every write
+        integration: If True, each reading also costs NPLC / line_frequency seconds
+        line_frequency: Mains frequency used for the integration time
+        noise: Relative gaussian noise added to readings
+        seed: Seed for the noise generator
+        range_change_time: Seconds lost every time the measure range changes (auto or manual)
+        transfer_rate: Bus throughput in bytes per second charged to every response (0: unlimited)
+    """
+
+    def __init__(self, device=None, query_latency=1e-3, write_latency=0.0, integration=False,
+                 line_frequency=50.0, noise=0.0, seed=None, range_change_time=0.0, transfer_rate=0.0, **kwargs):
+        super().__init__(**kwargs)
+        self.device = device if device is not None else ResistorModel()
+        self.query_latency = query_latency
+        self.write_latency = write_latency
+        self.integration = integration
+        self.line_frequency = line_frequency
+        self.noise = noise
+        self.rng = np.random.default_rng(seed)
+        self.range_change_time = range_change_time
+        self.transfer_rate = transfer_rate
+        self.bytes_read = 0
+        self.range_changes = 0
+        self.write_count = 0
+        self.query_count = 0
+        self.reset_state()
+
+    def reset_state(self):
+        """Return the simulated instrument to its power-on state."""
+        self.settings = {}
+        self.responses = []
+        self._unread = b""  # Rest of a response being read with read_bytes
+        self.source_function = "VOLT"
+        self.sense_function = "CURR"
+        self.levels = {"VOLT": 0.0, "CURR": 0.0}
+        self.limits = {"VOLT": 1.05e-1, "CURR": 21.0}  # ILIM when sourcing V, VLIM when sourcing I
+        self.output = False
+        self.source_list = {"VOLT": [], "CURR": []}
+        self.pending_sweep = None
+        self.busy_until = 0.0
+        self.active_range = {"CURR": None, "VOLT": None}
+        self.clear_buffer()
+
+    def clear_buffer(self):
+        self.buffer = []  # (source, reading, time) tuples
+
+    # Transport -----------------------------------------------------------
+
+    def _write(self, command, **kwargs):
+        self.write_count += 1
+        if self.write_latency:
+            time.sleep(self.write_latency)
+        for part in command.split(";"):
+            if part.strip():
+                self._execute(part.strip())
+
+    def _read(self, **kwargs):
+        self.query_count += 1
+        if self.query_latency:
+            time.sleep(self.query_latency)
+        if not self.responses:
+            raise TimeoutError("Simulated VISA read timeout: no response queued.")
+        response = self.responses.pop(0)
+        size = len(response) + 1  # Plus the line feed terminator
+        self.bytes_read += size
+        if self.transfer_rate:
+            time.sleep(size / self.transfer_rate)
+        return response
+
+    def _read_bytes(self, count, break_on_termchar=False, **kwargs):
+        """Read from the current response as a byte stream (binary blocks, then their terminator)."""
+        if not self._unread:
+            response = self._read(**kwargs)
+            self._unread = (response if isinstance(response, bytes) else response.encode()) + b"\n"
+        if count < 0:
+            end = self._unread.find(b"\n") + 1 if break_on_termchar else len(self._unread)
+        else:
+            end = count
+        data, self._unread = self._unread[:end], self._unread[end:]
+        return data
+
+    def flush_read_buffer(self):
+        self.responses = []
+        self._unread = b""
+
+    # SCPI parser ---------------------------------------------------------
+
+    def _execute(self, command):
+        header, _, argument = command.partition(" ")
+        is_query = header.endswith("?")
+        header = normalize_header(header.rstrip("?"))
+        args = [arg.strip().strip('"').strip("'") for arg in argument.split(",")] if argument.strip() else []
+        if is_query:
+            self.responses.append(self._query(header, args))
+        else:
+            self._set(header, args)
+
+    def _set(self, header, args):
+        value = args[0] if args else ""
+        if header == "*RST":
+            self.reset_state()
+        elif header == "SOUR:FUNC":
+            self.source_function = _short_form(value.upper())
+        elif header in ("SOUR:VOLT", "SOUR:CURR"):
+            self.levels[header.split(":")[1]] = float(value)
+        elif header == "SOUR:VOLT:ILIM":
+            self.limits["VOLT"] = abs(float(value))
+        elif header == "SOUR:CURR:VLIM":
+            self.limits["CURR"] = abs(float(value))
+        elif header == "SENS:FUNC":
+            self.sense_function = _short_form(value.upper())
+        elif header == "OUTP":
+            self.output = value.upper() in ("ON", "1")
+        elif header.startswith("SOUR:LIST:"):
+            function = header.split(":")[2]
+            values = [float(arg) for arg in args]
+            if header.endswith(":APP"):
+                self.source_list[function].extend(values)
+            else:
+                self.source_list[function] = values
+        elif header.startswith("SOUR:SWE:"):
+            self._configure_sweep(header, args)
+        elif header == "TRIG:LOAD":
+            self._configure_trigger_model(args)
+        elif header == "TRAC:CLE":
+            self.clear_buffer()
+        elif header in ("INIT", "INIT:IMM"):
+            self._run_sweep()
+        elif header == "ABOR":
+            self.pending_sweep = None
+            self.busy_until = 0.0
+        else:
+            self.settings[header] = value
+
+    def _query(self, header, args):
+        if header == "*IDN":
+            return SIMULATED_IDN
+        if header == "*OPC":
+            self._wait_until_idle()
+            return "1"
+        if header == "SYST:ERR":
+            return '0,"No error"'
+        if header == "SOUR:FUNC":
+            return self.source_function
+        if header in ("SOUR:VOLT", "SOUR:CURR"):
+            return f"{self.levels[header.split(':')[1]]:g}"
+        if header == "SENS:FUNC":
+            return f'"{self.sense_function}:DC"'
+        if header == "OUTP":
+            return "1" if self.output else "0"
+        if header == "READ":
+            return self._format_elements([self._take_reading()], args[1:] or ["READ"])
+        if header == "TRAC:ACT":
+            return str(len(self.buffer))
+        if header == "TRAC:DATA":
+            start, end = int(args[0]), int(args[1])
+            return self._format_elements(self.buffer[start - 1:end], args[3:] or ["READ"])
+        if header.startswith("TRAC:STAT:"):
+            readings = np.array([reading for _, reading, _ in self.buffer], dtype=float)
+            if len(readings) == 0:
+                return "9.91e37"  # NaN, as the instrument reports for an empty buffer
+            statistic = header.split(":")[2]
+            if statistic == "AVER":
+                return f"{readings.mean():.9e}"
+            if statistic == "STDD":
+                return f"{readings.std(ddof=1) if len(readings) > 1 else 0.0:.9e}"
+            if statistic == "MIN":
+                return f"{readings.min():.9e}"
+            if statistic == "MAX":
+                return f"{readings.max():.9e}"
+            if statistic == "PK2P":
+                return f"{readings.max() - readings.min():.9e}"
+        if header == "TRIG:STAT":
+            state = "RUNNING" if time.perf_counter() < self.busy_until else "IDLE"
+            return f"{state};{state};"
+        return self.settings.get(header, "0")
+
+    # Measurement model ---------------------------------------------------
+
+    def _nplc(self):
+        return float(self.settings.get(f"SENS:{self.sense_function}:NPLC", 1.0))
+
+    def _filter(self):
+        """(conversions averaged per reading, True for the repeat filter) of the sense function."""
+        function = self.sense_function
+        if self.settings.get(f"SENS:{function}:AVER", "OFF").upper() not in ("ON", "1"):
+            return 1, False
+        count = max(int(float(self.settings.get(f"SENS:{function}:AVER:COUN", 10))), 1)
+        return count, self.settings.get(f"SENS:{function}:AVER:TCON", "REP").upper().startswith("REP")
+
+    def _integration_time(self):
+        if not self.integration:
+            return 0.0
+        count, repeat = self._filter()
+        conversions = count if repeat else 1  # The repeat filter takes count fresh conversions per reading
+        return conversions * self._nplc() / self.line_frequency
+
+    def _respond(self, source_values):
+        """Device response (sensed quantity) for an array of source values, with compliance."""
+        source_values = np.asarray(source_values, dtype=float)
+        if self.source_function == "VOLT":
+            response = self.device.current(source_values)
+        else:
+            response = self.device.voltage(source_values)
+        limit = self.limits[self.source_function]
+        response = np.clip(response, -limit, limit)
+        if self.noise:
+            count, _ = self._filter()  # Averaging n conversions cuts the noise by sqrt(n)
+            response = response * (1.0 + self.noise / np.sqrt(count) * self.rng.standard_normal(response.shape))
+        return response
+
+    def _apply_range(self, response):
+        """
+        Range the readings like the instrument: autorange steps one range at a time to follow
+        each value, a fixed range reports OVERFLOW above OVERRANGE. Returns (readings, settling
+        time per reading).
+        """
+        function = self.sense_function
+        ranges = MEASURE_RANGES.get(function)
+        if ranges is None or len(response) == 0:
+            return response, np.zeros(len(response))
+        autorange = self.settings.get(f"SENS:{function}:RANG:AUTO", "ON").upper() in ("ON", "1")
+        if autorange:
+            index = np.minimum(np.searchsorted(ranges * OVERRANGE, np.abs(response)), len(ranges) - 1)
+        else:
+            fixed = float(self.settings.get(f"SENS:{function}:RANG", ranges[-1]))
+            index = np.full(len(response), np.searchsorted(ranges, fixed * (1 - 1e-9)))
+            response = np.where(np.abs(response) > fixed * OVERRANGE, OVERFLOW, response)
+        first = self.active_range[function]
+        previous = np.concatenate([[index[0] if first is None else first], index[:-1]])
+        steps = np.abs(index - previous)
+        if not autorange:
+            steps = np.minimum(steps, 1)  # A programmed range is selected directly
+        self.active_range[function] = int(index[-1])
+        self.range_changes += int(np.count_nonzero(steps))
+        return response, steps * self.range_change_time
+
+    def _take_reading(self):
+        integration = self._integration_time()
+        if integration:
+            time.sleep(integration)
+        level = self.levels[self.source_function] if self.output else 0.0
+        response, settling = self._apply_range(self._respond([level]))
+        if settling[0]:
+            time.sleep(settling[0])
+        reading = (level, float(response[0]), time.perf_counter())
+        self.buffer.append(reading)
+        return reading
+
+    def _format_elements(self, readings, elements):
+        """Reading data in the :FORM:DATA format: ASCII text, or an IEEE 488.2 block of float64 values."""
+        values = self._element_values(readings, elements)
+        if self.settings.get("FORM:DATA", "ASC").upper().startswith("REAL"):
+            order = "<" if self.settings.get("FORM:BORD", "NORM").upper().startswith("SWAP") else ">"
+            data = np.asarray(values, dtype=order + "f8").tobytes()
+            return f"#{len(str(len(data)))}{len(data)}".encode() + data
+        return ",".join(f"{value:.9e}" for value in values)
+
+    def _element_values(self, readings, elements):
+        origin = self.buffer[0][2] if self.buffer else 0.0
+        values = []
+        for source, reading, timestamp in readings:
+            for element in elements:
+                element = element.upper()
+                if element.startswith("SOUR"):
+                    values.append(source)
+                elif element.startswith("REL"):
+                    values.append(timestamp - origin)
+                else:
+                    values.append(reading)
+        return values
+
+    # Sweeps --------------------------------------------------------------
+
+    def _configure_sweep(self, header, args):
+        function, shape = header.split(":")[2:4]
+        if shape == "LIST":
+            start_index, delay = int(float(args[0])), float(args[1])
+            values = np.asarray(self.source_list[function][start_index - 1:], dtype=float)
+            count = int(float(args[2])) if len(args) > 2 else 1
+        else:
+            start, stop, points, delay = float(args[0]), float(args[1]), int(float(args[2])), float(args[3])
+            count = int(float(args[4])) if len(args) > 4 else 1
+            if shape == "LOG":
+                values = np.logspace(np.log10(start), np.log10(stop), points)
+            else:
+                values = np.linspace(start, stop, points)
+            if len(args) > 7 and args[7].upper() in ("ON", "1"):
+                values = np.concatenate([values, values[::-1]])
+        self.source_function = function
+        self.pending_sweep = (np.tile(values, count), delay)
+
+    def _configure_trigger_model(self, args):
+        """Predefined trigger models; only SimpleLoop (count, delay) is modelled."""
+        if not args or args[0].upper() != "SIMPLELOOP":
+            self.settings["TRIG:LOAD"] = ",".join(args)
+            return
+        count = int(float(args[1])) if len(args) > 1 else 1
+        delay = float(args[2]) if len(args) > 2 else 0.0
+        level = self.levels[self.source_function] if self.output else 0.0
+        self.pending_sweep = (np.full(count, level), delay)
+
+    def _run_sweep(self):
+        """Execute the configured sweep; timestamps follow the simulated hardware timing."""
+        if self.pending_sweep is None:
+            return
+        values, delay = self.pending_sweep
+        self.output = True
+        period = delay + self._integration_time()
+        start = time.perf_counter()
+        readings, settling = self._apply_range(self._respond(values))
+        times = start + np.cumsum(period + settling)
+        self.buffer.extend(zip(values.tolist(), readings.tolist(), times.tolist()))
+        if len(values):
+            self.levels[self.source_function] = float(values[-1])
+        self.busy_until = times[-1] if len(values) else start
+
+    def _wait_until_idle(self):
+        remaining = self.busy_until - time.perf_counter()
+        if remaining > 0:
+            time.sleep(remaining)
+
+
+class SimulatedKeithley2450(Keithley2450):
+    """
+    Keithley2450 driver running on a SimulatedAdapter, for use without hardware:
+        backend = KeithleyBackend(instrument=SimulatedKeithley2450(query_latency=1e-3))
+    """
+
+    def __init__(self, device=None, name="Simulated Keithley 2450", **kwargs):
+        super().__init__(SimulatedAdapter(device=device, **kwargs), name=name)
@@ -0,0 +1,79 @@
+import math
+import numpy as np
+
+
+class RunningStatistics:
+    """
+    Streaming count, mean, standard deviation, minimum and maximum of one quantity.
+
+    Single values use Welford's update; blocks of values and pre-computed statistics
+    (e.g. from the instrument's :TRAC:STAT queries) are combined with Chan's parallel
+    formula, so memory stays constant however many readings are added.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0  # Sum of squared deviations from the mean
+        self.min = math.inf
+        self.max = -math.inf
+
+    def update(self, value):
+        """Add one value (NaN, e.g. an overflowed reading, is skipped)."""
+        if value != value:
+            return
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def update_array(self, values):
+        """Add a block of values."""
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if len(values):
+            mean = float(np.mean(values))
+            self.merge(len(values), mean, float(np.sum((values - mean) ** 2)), float(values.min()), float(values.max()))
+
+    def merge(self, count, mean, m2, minimum, maximum):
+        """
+        Add the statistics of a separate group of values.
+        Args:
+            count: Number of values in the group
+            mean: Group mean
+            m2: Group sum of squared deviations from its mean (variance * (count - 1))
+            minimum, maximum: Group extremes
+        """
+        if count <= 0:
+            return
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self._m2 += m2 + delta * delta * self.count * count / total
+        self.count = total
+        self.min = min(self.min, minimum)
+        self.max = max(self.max, maximum)
+
+    def merge_summary(self, count, mean, std, minimum, maximum):
+        """Add a group given by its sample standard deviation instead of m2."""
+        self.merge(count, mean, std * std * max(count - 1, 0), minimum, maximum)
+
+    @property
+    def variance(self):
+        """Sample variance (NaN for fewer than two values)."""
+        return self._m2 / (self.count - 1) if self.count > 1 else math.nan
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance) if self.count > 1 else math.nan
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean": self.mean if self.count else math.nan,
+            "std": self.std,
+            "min": self.min if self.count else math.nan,
+            "max": self.max if self.count else math.nan,
+        }
@@ -0,0 +1,318 @@
+import sys
+import gzip
+import json
+import time
+import base64
+import logging
+import argparse
+from collections import Counter
+from pymeasure.adapters import Adapter
+from pymeasure.instruments.keithley import Keithley2450
+from kscprofile1 import command_key
+
+log = logging.getLogger(__name__)
+
+TRANSCRIPT_VERSION = 1
+
+
+class ReplayMismatch(RuntimeError):
+    """The code under replay sent a command the transcript cannot answer."""
+
+
+class Transcript:
+    """
+    Every write and read exchanged with an instrument, in order, with completion times.
+
+    Saved as JSON Lines (gzip-compressed when the file name ends in .gz): a header line
+    with metadata, then one line per operation:
+        {"t": seconds since recording started, "op": "write" | "read" | "read_bytes",
+         "data": text} or {"t": ..., "op": "read_bytes", "b64": base64 of binary data}
+    """
+
+    def __init__(self, entries=None, metadata=None):
+        self.entries = list(entries or [])
+        self.metadata = dict(metadata or {})  # e.g. instrument, recorded, runs
+
+    def __len__(self):
+        return len(self.entries)
+
+    @property
+    def duration(self):
+        return self.entries[-1]["t"] if self.entries else 0.0
+
+    def writes(self):
+        return [entry["data"] for entry in self.entries if entry["op"] == "write"]
+
+    def command_counts(self):
+        """Number of writes per SCPI header (see kscprofile1.command_key), queries included."""
+        return Counter(command_key(command) for command in self.writes())
+
+    def summary(self):
+        writes = self.writes()
+        reads = [entry for entry in self.entries if entry["op"] != "write"]
+        return {
+            "writes": len(writes),
+            "queries": sum(1 for command in writes if "?" in command),
+            "reads": len(reads),
+            "bytes_read": sum(len(_payload(entry)) for entry in reads),
+            "duration": self.duration,
+        }
+
+    def save(self, path):
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "wt", encoding="utf-8") as f:
+            f.write(json.dumps({"transcript": TRANSCRIPT_VERSION, "metadata": self.metadata}, default=str) + "\n")
+            for entry in self.entries:
+                f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        return path
+
+    @classmethod
+    def load(cls, path):
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt", encoding="utf-8") as f:
+            header = json.loads(f.readline() or "{}")
+            if header.get("transcript") != TRANSCRIPT_VERSION:
+                raise ValueError(f"{path} is not a version {TRANSCRIPT_VERSION} SCPI transcript.")
+            entries = [json.loads(line) for line in f if line.strip()]
+        return cls(entries, header.get("metadata"))
+
+
+def _payload(entry):
+    """Bytes of a read entry as the instrument sent them."""
+    if "b64" in entry:
+        return base64.b64decode(entry["b64"])
+    return entry["data"].encode()
+
+
+def compare_counts(before, after):
+    """
+    Per-command counts of two transcripts, biggest change first.
+    Returns:
+        List of (command, count before, count after) tuples
+    """
+    counts_before, counts_after = before.command_counts(), after.command_counts()
+    commands = set(counts_before) | set(counts_after)
+    rows = [(command, counts_before[command], counts_after[command]) for command in commands]
+    rows.sort(key=lambda row: (-abs(row[2] - row[1]), row[0]))
+    return rows
+
+
+class RecordingAdapter:
+    """
+    Proxy around a pymeasure adapter that appends every write and read to a Transcript.
+    Enabled on a backend with KeithleyBackend.enable_recording().
+    """
+
+    def __init__(self, adapter, transcript=None):
+        self._adapter = adapter
+        self.transcript = transcript if transcript is not None else Transcript()
+        self._start = time.perf_counter() - self.transcript.duration  # Appending continues the clock
+
+    def __getattr__(self, name):
+        return getattr(self._adapter, name)
+
+    def _append(self, op, data):
+        entry = {"t": round(time.perf_counter() - self._start, 7), "op": op}
+        if isinstance(data, bytes):
+            entry["b64"] = base64.b64encode(data).decode("ascii")
+        else:
+            entry["data"] = data
+        self.transcript.entries.append(entry)
+
+    def write(self, command, **kwargs):
+        result = self._adapter.write(command, **kwargs)
+        self._append("write", command)
+        return result
+
+    def read(self, **kwargs):
+        response = self._adapter.read(**kwargs)
+        self._append("read", response)
+        return response
+
+    def read_bytes(self, count=-1, **kwargs):
+        response = self._adapter.read_bytes(count, **kwargs)
+        self._append("read_bytes", response)
+        return response
+
+
+class ReplayAdapter(Adapter):
+    """
+    pymeasure adapter that answers from a recorded Transcript instead of an instrument.
+    Args:
+        transcript: Transcript (or path of a saved one)
+        speed: 1.0 replays at the recorded pace, 2.0 twice as fast; 0 (or None) as fast as possible
+        strict: Every write must match the next recorded write. When False only queries are matched
+                (against the next recorded copy of the same query) and other writes are accepted,
+                so code that sends fewer or more settings than the recording can still be replayed.
+    """
+
+    def __init__(self, transcript, speed=0.0, strict=True, **kwargs):
+        super().__init__(**kwargs)
+        self.transcript = Transcript.load(transcript) if isinstance(transcript, str) else transcript
+        self.speed = speed or 0.0
+        self.strict = strict
+        self.position = 0  # Index of the next transcript entry
+        self.write_count = 0
+        self.query_count = 0
+        self._start = None
+
+    def rewind(self):
+        self.position = 0
+        self.write_count = 0
+        self.query_count = 0
+        self._start = None
+
+    @property
+    def finished(self):
+        return self.position >= len(self.transcript.entries)
+
+    def _pace(self, entry):
+        """At recorded speed, hold each operation until its recorded completion time."""
+        if not self.speed:
+            return
+        if self._start is None:
+            self._start = time.perf_counter() - entry["t"] / self.speed
+        remaining = self._start + entry["t"] / self.speed - time.perf_counter()
+        if remaining > 0:
+            time.sleep(remaining)
+
+    def _write(self, command, **kwargs):
+        self.write_count += 1
+        entries = self.transcript.entries
+        index = self.position
+        if self.strict:
+            if index >= len(entries) or entries[index]["op"] != "write" or entries[index]["data"] != command:
+                expected = entries[index].get("data", entries[index]["op"]) if index < len(entries) else "end"
+                raise ReplayMismatch(f"Entry {index}: sent {command!r}, recording has {expected!r}")
+        elif "?" not in command:
+            return  # Settings are not checked in non-strict mode
+        else:
+            while index < len(entries) and not (entries[index]["op"] == "write" and entries[index]["data"] == command):
+                index += 1
+            if index >= len(entries):
+                raise ReplayMismatch(f"Query {command!r} not found after entry {self.position}")
+        self._pace(entries[index])
+        self.position = index + 1
+
+    def _next_read(self):
+        entries = self.transcript.entries
+        if self.position >= len(entries) or entries[self.position]["op"] == "write":
+            raise ReplayMismatch(f"Entry {self.position}: read with no recorded response")
+        entry = entries[self.position]
+        self.position += 1
+        self._pace(entry)
+        return entry
+
+    def _read(self, **kwargs):
+        self.query_count += 1
+        entry = self._next_read()
+        return entry["data"] if "data" in entry else _payload(entry).decode()
+
+    def _read_bytes(self, count, break_on_termchar=False, **kwargs):
+        entry = self._next_read()
+        if entry["op"] == "read":
+            self.query_count += 1
+        return _payload(entry)
+
+    def flush_read_buffer(self):
+        pass
+
+
+class ReplayKeithley2450(Keithley2450):
+    """
+    Keithley2450 driver answering from a transcript, for profiling recorded sessions offline:
+        backend = KeithleyBackend(instrument=ReplayKeithley2450("session.jsonl.gz"))
+    """
+
+    def __init__(self, transcript, speed=0.0, strict=True, name="Replayed Keithley 2450", **kwargs):
+        super().__init__(ReplayAdapter(transcript, speed, strict, **kwargs), name=name)
+
+
+def replay_runs(transcript, runs=None, speed=0.0, strict=True):
+    """
+    Run recipe runs against a recorded transcript, through the same job queue as ksccli1
+    (which records transcripts with --record), and record what the current code sends.
+    Args:
+        transcript: Transcript or path
+        runs: run_measurement settings; the runs stored in the transcript metadata when None
+        speed, strict: See ReplayAdapter
+    Returns:
+        (transcript of this replay, seconds taken)
+    """
+    from kscbackend1 import KeithleyBackend
+    from ksccli1 import run_recipes
+    instrument = ReplayKeithley2450(transcript, speed, strict)
+    recorded = instrument.adapter.transcript
+    runs = runs if runs is not None else recorded.metadata.get("runs")
+    if not runs:
+        raise ValueError("No runs given and none stored in the transcript.")
+    backend = KeithleyBackend(instrument=instrument)
+    replayed = backend.enable_recording()
+    started = time.perf_counter()
+    jobs = run_recipes(backend, runs, export=())
+    elapsed = time.perf_counter() - started
+    backend.disable_recording()
+    for job in jobs:
+        if job.error is not None:
+            raise job.error
+    if strict and not instrument.adapter.finished:  # Non-strict replays pass over trailing settings
+        log.warning(f"Replay ended at entry {instrument.adapter.position} of {len(recorded)}.")
+    return replayed, elapsed
+
+
+def format_comparison(rows, limit=None):
+    lines = [f"{'command':<28}{'before':>8}{'after':>8}{'change':>8}"]
+    for command, before, after in rows[:limit]:
+        lines.append(f"{command:<28}{before:>8d}{after:>8d}{after - before:>+8d}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect, compare and replay SCPI transcripts.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    show = commands.add_parser("summary", help="Operation and per-command counts of a transcript")
+    show.add_argument("transcript")
+    compare = commands.add_parser("compare", help="Per-command counts of two transcripts")
+    compare.add_argument("before")
+    compare.add_argument("after")
+    replay = commands.add_parser("replay", help="Run the recorded recipe against the transcript")
+    replay.add_argument("transcript")
+    replay.add_argument("--recipe", help="Recipe to run instead of the one stored in the transcript")
+    replay.add_argument("--speed", type=float, default=0.0, help="1 for recorded pace; 0 as fast as possible")
+    replay.add_argument("--loose", action="store_true", help="Allow writes the recording does not contain")
+    replay.add_argument("--save", help="Write the transcript of the replay here")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+    if args.command == "summary":
+        transcript = Transcript.load(args.transcript)
+        print(json.dumps(transcript.summary(), indent=2))
+        for command, count in transcript.command_counts().most_common():
+            print(f"{command:<28}{count:>8d}")
+        return 0
+    if args.command == "compare":
+        before, after = Transcript.load(args.before), Transcript.load(args.after)
+        print(format_comparison(compare_counts(before, after)))
+        print(f"{'total writes':<28}{len(before.writes()):>8d}{len(after.writes()):>8d}"
+              f"{len(after.writes()) - len(before.writes()):>+8d}")
+        return 0
+
+    runs = None
+    if args.recipe:
+        from ksccli1 import load_recipe
+        runs = load_recipe(args.recipe)
+    recorded = Transcript.load(args.transcript)
+    try:
+        replayed, elapsed = replay_runs(recorded, runs, args.speed, strict=not args.loose)
+    except RuntimeError as e:  # Includes ReplayMismatch
+        print(f"Replay diverged: {e}", file=sys.stderr)
+        return 1
+    print(f"Replayed {len(recorded)} operations in {elapsed:.3f} s (recorded {recorded.duration:.3f} s).")
+    print(format_comparison(compare_counts(recorded, replayed)))
+    if args.save:
+        replayed.save(args.save)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
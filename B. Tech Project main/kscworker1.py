@@ -0,0 +1,146 @@
+import time
+import queue
+import logging
+import threading
+from kscbackend1 import RunAborted
+
+log = logging.getLogger(__name__)
+
+
+class AcquisitionWorker:
+    """
+    Background thread that owns a KeithleyBackend and takes readings at a fixed interval.
+
+    Readings are pushed into a thread-safe queue (and the backend's ring buffer), so a
+    Streamlit script can drain new rows on each rerun without touching the instrument.
+    Statistics-only and hardware-timed bias settings need a fixed number of readings (the
+    instrument paces a hardware-timed run itself), so they are taken as one run_measurement
+    instead (self.single_run); its rows are queued as the backend stores them.
+    """
+
+    def __init__(self, backend, measurements, interval=0.1, max_queue=100000):
+        """
+        Args:
+            backend: KeithleyBackend to drive; nothing else should use it while the worker runs
+            measurements: List of enabled measurements (e.g., ['Voltage', 'Current'])
+            interval: Seconds between readings (scheduled against a monotonic clock)
+            max_queue: Maximum undrained rows; newer rows are dropped when the queue is full
+        """
+        self.backend = backend
+        self.measurements = measurements
+        self.interval = interval
+        self.error = None
+        self.dropped = 0
+        self.single_run = False  # True while the worker takes one run_measurement instead of live readings
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._active = threading.Event()  # Cleared while paused
+        self._thread = None
+
+    def start(self, settings=None, run=False):
+        """
+        Start acquiring in the background.
+        Args:
+            settings: Optional run_measurement-style settings used to configure a bias source first;
+                      with bias_statistics or hardware_timed they are run as one run_measurement
+            run: Take one run_measurement with settings (e.g. a sweep) instead of live readings
+        """
+        if self.is_alive():
+            return
+        self.error = None
+        self.single_run = bool(run or settings and (settings.get("bias_statistics") or settings.get("hardware_timed")))
+        self._stop.clear()
+        self._active.set()
+        self._thread = threading.Thread(target=self._run, args=(settings,), name="keithley-acquisition", daemon=True)
+        self._thread.start()
+
+    def pause(self):
+        """Stop taking readings but keep the source on."""
+        self._active.clear()
+
+    def resume(self):
+        self._active.set()
+
+    def stop(self, timeout=5.0):
+        """Stop the worker thread and switch the source off."""
+        self._stop.set()
+        self._active.set()  # Wake a paused worker so it can exit
+        if self.single_run:
+            self.backend.abort()  # Stops the run at its next point or trigger-model poll
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def is_alive(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def paused(self):
+        return not self._active.is_set()
+
+    def drain(self, max_rows=None):
+        """Return (and remove) the readings queued since the last drain."""
+        rows = []
+        while max_rows is None or len(rows) < max_rows:
+            try:
+                rows.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return rows
+
+    def _queue_block(self, columns):
+        """Backend subscriber: queue a block of stored readings ({column: array}) as rows."""
+        for values in zip(*columns.values()):
+            try:
+                self._queue.put_nowait(dict(zip(columns, map(float, values))))
+            except queue.Full:
+                self.dropped += 1
+
+    def _run_measurement(self, settings):
+        backend = self.backend
+        backend.subscribe(self._queue_block)
+        try:
+            # A stop that came while the instrument was being configured aborts before the first reading
+            backend.run_measurement(settings, ready=lambda: self._stop.is_set() and backend.abort())
+        finally:
+            backend.unsubscribe(self._queue_block)
+
+    def _run(self, settings):
+        backend = self.backend
+        try:
+            if self.single_run:
+                self._run_measurement(settings)
+                return
+            if settings:
+                backend.configure_source(settings.get("source_mode"), **settings)
+                backend.configure_measurement(**settings)
+
+            next_time = time.monotonic()
+            while not self._stop.is_set():
+                if not self._active.is_set():
+                    self._active.wait(0.1)
+                    next_time = time.monotonic()  # Restart the schedule after a pause
+                    continue
+
+                row = backend.measure(self.measurements, 0)
+                try:
+                    self._queue.put_nowait(row)
+                except queue.Full:
+                    self.dropped += 1
+
+                # Fixed-rate schedule: sleep to the next slot instead of a fixed delay
+                next_time += self.interval
+                remaining = next_time - time.monotonic()
+                if remaining > 0:
+                    self._stop.wait(remaining)
+                else:
+                    next_time = time.monotonic()  # Fell behind; don't try to catch up in a burst
+        except RunAborted:
+            log.info("Acquisition run stopped.")
+        except Exception as e:
+            log.exception(f"Acquisition worker stopped on error: {e}")
+            self.error = e
+        finally:
+            try:
+                backend.instrument.disable_source()
+            except Exception as e:
+                log.warning(f"Could not disable source after acquisition: {e}")